@@ -0,0 +1,140 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from .version_core.classification_benchmark import ClassificationBenchmark
+
+
+class Command(BaseCommand):
+    help = "Измерение скорости и точности классификации файлов расписания по эталону"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--corpus",
+            default=str(ClassificationBenchmark.DEFAULT_CORPUS_PATH),
+            help="Файл корпуса (пути и ссылки файлов)",
+        )
+        parser.add_argument(
+            "--golden",
+            default=str(ClassificationBenchmark.DEFAULT_GOLDEN_PATH),
+            help="Файл эталонных результатов классификации",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Количество повторов измерения (берётся лучшее время)",
+        )
+        parser.add_argument(
+            "--warm",
+            action="store_true",
+            help="Не очищать кэши классификации в памяти между повторами",
+        )
+        parser.add_argument(
+            "--show-mismatches",
+            type=int,
+            default=20,
+            metavar="N",
+            help="Количество выводимых расхождений с эталоном",
+        )
+        parser.add_argument(
+            "--strict",
+            action="store_true",
+            help="Завершиться с ошибкой при любом расхождении с эталоном",
+        )
+        parser.add_argument(
+            "--generate-corpus",
+            action="store_true",
+            help="Сформировать корпус заново (исходные пути и их искажённые варианты)",
+        )
+        parser.add_argument(
+            "--from-site",
+            metavar="URL",
+            help="Взять исходные пути для корпуса с сайта расписаний",
+        )
+        parser.add_argument(
+            "--start-path",
+            default=ClassificationBenchmark.BASE_PATH,
+            help="Начало пути файлов сайта (вместе с --from-site)",
+        )
+        parser.add_argument(
+            "--variants",
+            type=int,
+            default=3,
+            help="Количество искажённых вариантов каждого исходного пути",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Начальное значение генератора"
+        )
+        parser.add_argument(
+            "--update-golden",
+            action="store_true",
+            help="Сохранить текущие результаты классификации как эталон",
+        )
+
+    def handle(self, *args, **kwargs):
+        if kwargs["generate_corpus"]:
+            self.__generate_corpus(kwargs)
+
+        try:
+            corpus = ClassificationBenchmark.load(kwargs["corpus"])
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot load corpus {kwargs['corpus']}: {e}")
+
+        results, files_per_second = ClassificationBenchmark.measure(
+            corpus, kwargs["repeat"], kwargs["warm"]
+        )
+        self.stdout.write(
+            f"Classified {len(corpus)} files: {files_per_second:.0f} files/sec "
+            f"(best of {max(kwargs['repeat'], 1)}, "
+            f"{'warm' if kwargs['warm'] else 'cold'} in-memory caches)"
+        )
+
+        if kwargs["update_golden"]:
+            ClassificationBenchmark.save(kwargs["golden"], results)
+            self.stdout.write(f"Golden file updated: {kwargs['golden']}")
+            return
+
+        try:
+            golden = ClassificationBenchmark.load(kwargs["golden"])
+            agreement, mismatches = ClassificationBenchmark.compare(
+                corpus, results, golden
+            )
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot compare with golden file: {e}")
+
+        for field, count in agreement.items():
+            self.stdout.write(
+                f"{field:>15}: {count}/{len(corpus)} ({count / max(len(corpus), 1):.2%})"
+            )
+        for mismatch in mismatches[: kwargs["show_mismatches"]]:
+            self.stdout.write(
+                f"MISMATCH {mismatch['field']}: {mismatch['path']}\n"
+                f"    expected {mismatch['expected']!r}, got {mismatch['actual']!r}"
+            )
+
+        if mismatches and kwargs["strict"]:
+            raise CommandError(f"{len(mismatches)} mismatches with golden file")
+
+    def __generate_corpus(self, kwargs: dict):
+        """
+        Формирует и сохраняет корпус
+        :param kwargs: Параметры команды
+        """
+        if kwargs["from_site"]:
+            from .version_core.parser import WebParser
+
+            seeds = [
+                (file_data.get_path(), file_data.get_url())
+                for file_data in WebParser.get_files_from_webpage(
+                    kwargs["from_site"], kwargs["start_path"]
+                )
+            ]
+        else:
+            seeds = ClassificationBenchmark.get_default_seeds()
+
+        corpus = ClassificationBenchmark.build_corpus(
+            seeds, kwargs["variants"], kwargs["seed"]
+        )
+        ClassificationBenchmark.save(kwargs["corpus"], corpus)
+        self.stdout.write(
+            f"Corpus saved: {len(seeds)} source paths, {len(corpus)} entries: {kwargs['corpus']}"
+        )
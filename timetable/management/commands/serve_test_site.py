@@ -0,0 +1,196 @@
+import hashlib
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+from .version_core.synthetic_site import SyntheticSite
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Запуск локального искусственного сайта расписания для нагрузочного тестирования"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1", help="Адрес сервера")
+        parser.add_argument("--port", type=int, default=8800, help="Порт сервера")
+        parser.add_argument(
+            "--children",
+            type=int,
+            default=3,
+            help="Количество дочерних страниц у каждой страницы",
+        )
+        parser.add_argument(
+            "--depth", type=int, default=3, help="Глубина вложенности страниц"
+        )
+        parser.add_argument(
+            "--files-per-page",
+            type=int,
+            default=5,
+            help="Количество файлов на каждой странице",
+        )
+        parser.add_argument(
+            "--xls-ratio", type=float, default=0.5, help="Доля файлов в формате .xls"
+        )
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0,
+            help="Задержка перед каждым ответом (секунды)",
+        )
+        parser.add_argument(
+            "--latency-jitter",
+            type=float,
+            default=0,
+            help="Максимальная случайная добавка к задержке (секунды)",
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0,
+            help="Доля запросов, на которые сервер отвечает ошибкой 503",
+        )
+        parser.add_argument(
+            "--no-etag",
+            action="store_true",
+            help="Не отдавать ETag и не отвечать 304 на условные запросы",
+        )
+        parser.add_argument(
+            "--mutate-interval",
+            type=float,
+            default=0,
+            help="Период обновления части файлов (секунды), 0 - файлы не меняются",
+        )
+        parser.add_argument(
+            "--mutate-rate",
+            type=float,
+            default=0.05,
+            help="Доля файлов, обновляемых за один период",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Начальное значение генератора"
+        )
+
+    def handle(self, *args, **kwargs):
+        site = SyntheticSite(
+            kwargs["children"],
+            kwargs["depth"],
+            kwargs["files_per_page"],
+            kwargs["xls_ratio"],
+            kwargs["seed"],
+        )
+        handler = self.__make_handler(
+            site,
+            kwargs["latency"],
+            kwargs["latency_jitter"],
+            kwargs["error_rate"],
+            not kwargs["no_etag"],
+        )
+
+        server = ThreadingHTTPServer((kwargs["host"], kwargs["port"]), handler)
+        server.daemon_threads = True
+
+        if kwargs["mutate_interval"] > 0:
+            threading.Thread(
+                target=self.__mutate_periodically,
+                args=(site, kwargs["mutate_interval"], kwargs["mutate_rate"]),
+                daemon=True,
+            ).start()
+
+        self.stdout.write(
+            f"Synthetic site with {site.get_page_count()} pages and "
+            f"{site.get_file_count()} files: "
+            f"http://{kwargs['host']}:{server.server_port}/"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+    @staticmethod
+    def __mutate_periodically(site: SyntheticSite, interval: float, rate: float):
+        """
+        Периодически обновляет часть файлов сайта
+        :param site: Искусственный сайт
+        :param interval: Период обновления (секунды)
+        :param rate: Доля обновляемых файлов
+        """
+        while True:
+            time.sleep(interval)
+            site.mutate(rate)
+
+    @staticmethod
+    def __make_handler(
+        site: SyntheticSite,
+        latency: float,
+        latency_jitter: float,
+        error_rate: float,
+        use_etag: bool,
+    ):
+        """
+        Создаёт класс обработчика запросов к искусственному сайту
+        :param site: Искусственный сайт
+        :param latency: Задержка перед каждым ответом (секунды)
+        :param latency_jitter: Максимальная случайная добавка к задержке (секунды)
+        :param error_rate: Доля запросов, на которые сервер отвечает ошибкой
+        :param use_etag: Отдавать ETag и отвечать 304 на условные запросы
+        :return: Класс обработчика
+        """
+
+        class SyntheticSiteHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Заголовки и тело ответа пишутся отдельно, без этого ответы задерживаются на 40 мс
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                self.__respond(send_body=True)
+
+            def do_HEAD(self):
+                self.__respond(send_body=False)
+
+            def __respond(self, send_body: bool):
+                time.sleep(latency + random.uniform(0, latency_jitter))
+
+                if random.random() < error_rate:
+                    self.__send_empty(503)
+                    return
+
+                result = site.render(self.path.split("?", 1)[0])
+                if result is None:
+                    self.__send_empty(404)
+                    return
+                content_type, body = result
+
+                etag = None
+                if use_etag:
+                    etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+                    if self.headers.get("If-None-Match") == etag:
+                        self.__send_empty(304, etag)
+                        return
+
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                if etag is not None:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                if send_body:
+                    self.wfile.write(body)
+
+            def __send_empty(self, status_code: int, etag: str | None = None):
+                self.send_response(status_code)
+                self.send_header("Content-Length", "0")
+                if etag is not None:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                logger.debug(f"{self.address_string()} - {format % args}")
+
+        return SyntheticSiteHandler
@@ -1,5 +1,5 @@
 from pathlib import Path
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 import logging
 
 from timetable_project.settings import DATA_STORAGE_DIR, VIS_PATH, GOOGLE_AUTH_FILE
@@ -11,17 +11,84 @@ logger = logging.getLogger(__name__)
 class Command(BaseCommand):
     help = "Запуск обновления данных"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--record",
+            metavar="DIR",
+            help="Записать все HTTP ответы запуска в архив в указанной папке",
+        )
+        parser.add_argument(
+            "--replay",
+            metavar="DIR",
+            help="Воспроизвести HTTP ответы из архива без обращения к сети "
+            "(хранилище Google Drive не используется)",
+        )
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0,
+            metavar="SECONDS",
+            help="Искусственная задержка перед каждым HTTP запросом",
+        )
+        parser.add_argument(
+            "--latency-jitter",
+            type=float,
+            default=0,
+            metavar="SECONDS",
+            help="Максимальная случайная добавка к задержке HTTP запроса",
+        )
+
     @staticmethod
-    def update_timetable():
+    def update_timetable(
+        record_dir: str | None = None,
+        replay_dir: str | None = None,
+        latency: float = 0,
+        latency_jitter: float = 0,
+    ):
+        """
+        Запускает обновление расписания
+        :param record_dir: Папка архива для записи HTTP ответов
+        :param replay_dir: Папка архива для воспроизведения HTTP ответов без сети
+        :param latency: Искусственная задержка перед каждым HTTP запросом (секунды)
+        :param latency_jitter: Максимальная случайная добавка к задержке (секунды)
+        """
         logger.info("Запущена задача обновления расписания")
 
         # Добавить все необходимые библиотеки
         from .version_core.storage_manager_google_drive import StorageManagerGoogleDrive
         from .version_core.storage_manager import StorageManager
         from .version_core.filemanager import FileManager
+        from .version_core.http_client import HttpClient
+        from .version_core.http_fixtures import (
+            HttpArchive,
+            LatencyAdapter,
+            RecordingAdapter,
+            ReplayAdapter,
+        )
 
         import fs.copy
 
+        # Настроить запись или воспроизведение HTTP ответов
+        http_client = HttpClient.get_default()
+        archive = None
+        if record_dir:
+            archive = HttpArchive(record_dir)
+            http_client.wrap_transport(
+                lambda adapter: RecordingAdapter(adapter, archive)
+            )
+            logger.info(f"Запись HTTP ответов в архив: {record_dir}")
+        elif replay_dir:
+            archive = HttpArchive(replay_dir)
+            http_client.wrap_transport(lambda adapter: ReplayAdapter(archive))
+            # Записанный сервер не перегружается, частоту запросов ограничивать не нужно
+            http_client.set_rate_limiting(False)
+            logger.info(f"Воспроизведение HTTP ответов из архива: {replay_dir}")
+        if latency or latency_jitter:
+            http_client.wrap_transport(
+                lambda adapter: LatencyAdapter(adapter, latency, latency_jitter)
+            )
+            logger.info(f"Задержка HTTP запросов: {latency} + до {latency_jitter} с")
+
         # Путь к корневой папке локального хранилища
         local_dir = DATA_STORAGE_DIR
         Path(local_dir).mkdir(exist_ok=True)
@@ -34,11 +101,6 @@ class Command(BaseCommand):
 
         # TODO : Перенести в FileManager
         # Создать хранилища
-        sm_google = StorageManagerGoogleDrive(
-            GOOGLE_DRIVE_STORAGE_MAME, GOOGLE_AUTH_FILE
-        )
-        logger.info(f"Создано Google Drive хранилище: {GOOGLE_DRIVE_STORAGE_MAME}")
-
         sm_local = StorageManager(LOCAL_STORAGE_NAME, local_fs)
         logger.info(f"Создано локальное хранилище: {LOCAL_STORAGE_NAME}")
 
@@ -48,19 +110,36 @@ class Command(BaseCommand):
 
         # Добавить в него проинициализированные хранилища
         file_manager.add_storage(sm_local)
-        file_manager.add_storage(sm_google)
+        # При воспроизведении запуск не должен обращаться к сети
+        if not replay_dir:
+            sm_google = StorageManagerGoogleDrive(
+                GOOGLE_DRIVE_STORAGE_MAME, GOOGLE_AUTH_FILE
+            )
+            logger.info(f"Создано Google Drive хранилище: {GOOGLE_DRIVE_STORAGE_MAME}")
+            file_manager.add_storage(sm_google)
         logger.info("Хранилища добавлены в FileManager")
 
         # Выполнить обновление файлов
         logger.info("Запуск процесса обновления расписания")
-        file_manager.update_timetable()
+        try:
+            file_manager.update_timetable()
+        finally:
+            if record_dir:
+                archive.save()
 
         logger.info("Задача обновления расписания выполнена успешно!")
 
     def handle(self, *args, **kwargs):
         logger.info("Обработка команды обновления расписания")
+        if kwargs["record"] and kwargs["replay"]:
+            raise CommandError("Options --record and --replay can't be used together")
         try:
-            self.update_timetable()
+            self.update_timetable(
+                kwargs["record"],
+                kwargs["replay"],
+                kwargs["latency"],
+                kwargs["latency_jitter"],
+            )
             logger.info("Команда обновления расписания завершена успешно")
         except Exception as e:
             logger.error(
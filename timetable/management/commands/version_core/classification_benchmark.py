@@ -0,0 +1,317 @@
+import json
+import logging
+import random
+import time
+from pathlib import Path
+
+from .file_data import FileData
+
+# Создаем логгер для текущего модуля
+logger = logging.getLogger(__name__)
+
+
+class ClassificationBenchmark:
+    """
+    Измерение скорости и точности классификации файлов (FileData).
+    Корпус - список путей и ссылок файлов: реальные пути с сайта
+    и их искажённые варианты (опечатки, слова "копия"/"автосохраненный", диапазоны курсов).
+    Эталон - результаты классификации корпуса, которые считаются правильными.
+    """
+
+    # Папка с корпусом и эталоном по умолчанию
+    DATA_DIR = Path(__file__).resolve().parent.parent / "benchmark_data"
+
+    # Корпус по умолчанию
+    DEFAULT_CORPUS_PATH = DATA_DIR / "classification_corpus.json"
+
+    # Эталон по умолчанию
+    DEFAULT_GOLDEN_PATH = DATA_DIR / "classification_golden.json"
+
+    # Сравниваемые параметры файла
+    FIELDS = ["degree", "education_form", "faculty", "course", "name", "correct_path"]
+
+    # Начало пути всех файлов расписания занятий
+    BASE_PATH = "Расписания/Расписание занятий/"
+
+    # Адрес, от которого строятся ссылки на файлы корпуса по умолчанию
+    BASE_URL = "https://www.vstu.ru/upload/raspisanie/"
+
+    # Степени обучения (заголовки сайта)
+    DEGREES = ["Бакалавриат, специалитет", "Магистратура", "Аспирантура"]
+
+    # Формы обучения (заголовки сайта)
+    EDUCATION_FORMS = [
+        "Очная форма обучения",
+        "Заочная форма обучения",
+        "Очно-заочная форма обучения",
+    ]
+
+    # Факультеты (заголовки сайта) и их сокращения в именах файлов
+    FACULTIES = [
+        ("Факультет автоматизированных систем, транспорта и вооружений", "ФАСТиВ"),
+        ("Факультет автомобильного транспорта", "ФАТ"),
+        ("Факультет технологии конструкционных материалов", "ФТКМ"),
+        ("Факультет технологии пищевых производств", "ФТПП"),
+        ("Факультет экономики и управления", "ФЭУ"),
+        ("Факультет электроники и вычислительной техники", "ФЭВТ"),
+        ("Химико-технологический факультет", "ХТФ"),
+        ("Факультет подготовки иностранных специалистов", "ФПИС"),
+        ("Вечерний факультет", "ВФ"),
+    ]
+
+    # Сокращения форм обучения в именах файлов
+    FORM_PREFIXES = {
+        "Очная форма обучения": "ОН",
+        "Заочная форма обучения": "ЗО",
+        "Очно-заочная форма обучения": "ОЗ",
+    }
+
+    # Количество курсов для каждой степени обучения
+    COURSE_COUNTS = {
+        "Бакалавриат, специалитет": 5,
+        "Магистратура": 2,
+        "Аспирантура": 3,
+    }
+
+    # Лишние слова, которые появляются в именах файлов
+    NOISE = [" - копия", " (копия)", " копия", "Автосохраненный ", "автосохраненный_"]
+
+    @classmethod
+    def get_default_seeds(cls) -> list[tuple[str, str]]:
+        """
+        Формирует пути и ссылки файлов по структуре сайта расписаний
+        :return: Список кортежей (путь, ссылка)
+        """
+        seeds = []
+        for degree in cls.DEGREES:
+            for form in cls.EDUCATION_FORMS:
+                for faculty, abbreviation in cls.FACULTIES:
+                    for course in range(1, cls.COURSE_COUNTS[degree] + 1):
+                        name = f"{cls.FORM_PREFIXES[form]}_{abbreviation}_{course} курс"
+                        extension = ".xlsx" if course % 2 else ".xls"
+                        seeds.append(
+                            (
+                                f"{cls.BASE_PATH}{degree}/{form}/{faculty}/{name}{extension}",
+                                cls.BASE_URL + name + extension,
+                            )
+                        )
+        return seeds
+
+    @classmethod
+    def build_corpus(
+        cls, seeds: list[tuple[str, str]], variants_per_seed: int, seed: int = 0
+    ) -> list[dict]:
+        """
+        Формирует корпус из исходных путей и их искажённых вариантов
+        :param seeds: Список кортежей (путь, ссылка)
+        :param variants_per_seed: Количество искажённых вариантов каждого пути
+        :param seed: Начальное значение генератора случайных чисел
+        :return: Список записей {"path", "url"}
+        """
+        rnd = random.Random(seed)
+        corpus = []
+        for path, url in seeds:
+            corpus.append({"path": path, "url": url})
+            for _ in range(variants_per_seed):
+                corpus.append(cls.__make_variant(path, url, rnd))
+        return corpus
+
+    @classmethod
+    def __make_variant(cls, path: str, url: str, rnd: random.Random) -> dict:
+        """
+        Искажает путь файла несколькими случайными способами
+        :param path: Путь файла
+        :param url: Ссылка на файл
+        :param rnd: Генератор случайных чисел
+        :return: Запись {"path", "url"}
+        """
+        *dirs, file_name = path.split("/")
+        name, dot, extension = file_name.rpartition(".")
+        if not dot:
+            name, extension = file_name, ""
+
+        for _ in range(rnd.randint(1, 3)):
+            kind = rnd.choice(
+                ["typo", "noise", "course", "delimiter", "spaces", "case"]
+            )
+            if kind == "typo":
+                # Опечатка в случайной директории (кроме начала пути) или в имени файла
+                index = rnd.randrange(2, len(dirs) + 1) if len(dirs) > 2 else len(dirs)
+                if index == len(dirs):
+                    name = cls.__make_typo(name, rnd)
+                else:
+                    dirs[index] = cls.__make_typo(dirs[index], rnd)
+            elif kind == "noise":
+                noise = rnd.choice(cls.NOISE)
+                name = noise + name if noise[-1] in " _" else name + noise
+            elif kind == "course":
+                name = cls.__change_course(name, rnd)
+            elif kind == "delimiter":
+                name = (
+                    name.replace("_", " ", 1)
+                    if "_" in name
+                    else name.replace(" ", "_", 1)
+                )
+            elif kind == "spaces":
+                name = name.replace(" ", "  ", 1)
+            else:
+                index = rnd.randrange(2, len(dirs)) if len(dirs) > 2 else 0
+                if dirs:
+                    dirs[index] = rnd.choice([str.upper, str.lower])(dirs[index])
+
+        file_name = f"{name}.{extension}" if extension else name
+        new_url = url.rsplit("/", 1)[0] + "/" + file_name
+        return {"path": "/".join(dirs + [file_name]), "url": new_url}
+
+    @staticmethod
+    def __make_typo(string: str, rnd: random.Random) -> str:
+        """
+        Делает одну опечатку в случайном слове строки длиннее трёх символов
+        :param string: Строка
+        :param rnd: Генератор случайных чисел
+        :return: Строка с опечаткой
+        """
+        words = string.split(" ")
+        candidates = [index for index, word in enumerate(words) if len(word) > 3]
+        if not candidates:
+            return string
+        index = rnd.choice(candidates)
+        word = words[index]
+        position = rnd.randrange(1, len(word) - 1)
+        kind = rnd.choice(["swap", "drop", "double"])
+        if kind == "swap":
+            word = (
+                word[:position]
+                + word[position + 1]
+                + word[position]
+                + word[position + 2 :]
+            )
+        elif kind == "drop":
+            word = word[:position] + word[position + 1 :]
+        else:
+            word = word[:position] + word[position] + word[position:]
+        words[index] = word
+        return " ".join(words)
+
+    @staticmethod
+    def __change_course(name: str, rnd: random.Random) -> str:
+        """
+        Заменяет номер курса в имени файла диапазоном или другой записью
+        :param name: Имя файла
+        :param rnd: Генератор случайных чисел
+        :return: Новое имя файла
+        """
+        prefix, last = name.rsplit("_", 1) if "_" in name else (None, name)
+        words = last.split(" ")
+        if not words[0].isdigit():
+            return name
+        course = int(words[0])
+        new_course = rnd.choice(
+            [
+                f"{course}-{course + 1} курс",
+                f"{course} - {course + 1} курс",
+                f"{course},{course + 1} курс",
+                f"курс {course}",
+                f"{course} курс 2 поток",
+                f"{course} год",
+            ]
+        )
+        return new_course if prefix is None else f"{prefix}_{new_course}"
+
+    @classmethod
+    def classify(cls, entry: dict) -> dict:
+        """
+        Классифицирует файл корпуса
+        :param entry: Запись {"path", "url"}
+        :return: Словарь (параметр) -> (значение)
+        """
+        file_data = FileData(entry["path"], entry["url"], None)
+        values = json.loads(file_data.get_json(""))
+        values["name"] = file_data.get_name()
+        values["correct_path"] = file_data.get_correct_path()
+        return {field: values[field] for field in cls.FIELDS}
+
+    @classmethod
+    def measure(
+        cls, corpus: list[dict], repeat: int = 1, warm: bool = False
+    ) -> tuple[list[dict], float]:
+        """
+        Классифицирует корпус и измеряет скорость.
+        Постоянный кэш классификации не используется. Кэши в памяти очищаются
+        перед каждым повтором, если не задан прогрев.
+        :param corpus: Корпус
+        :param repeat: Количество повторов
+        :param warm: Не очищать кэши в памяти между повторами
+        :return: Кортеж (результаты последнего повтора, лучшая скорость в файлах в секунду)
+        """
+        previous_cache = FileData._classification_cache
+        FileData.set_classification_cache(None)
+        try:
+            results = []
+            best_time = None
+            for _ in range(max(repeat, 1)):
+                if not warm:
+                    FileData.clear_classification_caches()
+                start = time.perf_counter()
+                results = [cls.classify(entry) for entry in corpus]
+                elapsed = time.perf_counter() - start
+                if best_time is None or elapsed < best_time:
+                    best_time = elapsed
+        finally:
+            FileData.set_classification_cache(previous_cache)
+
+        files_per_second = len(corpus) / best_time if best_time else 0.0
+        return results, files_per_second
+
+    @classmethod
+    def compare(
+        cls, corpus: list[dict], results: list[dict], golden: list[dict]
+    ) -> tuple[dict, list[dict]]:
+        """
+        Сравнивает результаты классификации с эталоном
+        :param corpus: Корпус
+        :param results: Результаты классификации корпуса
+        :param golden: Эталонные результаты
+        :return: Кортеж (параметр -> количество совпадений, список расхождений)
+        """
+        if len(golden) != len(results):
+            raise ValueError(
+                f"Golden file has {len(golden)} entries, corpus has {len(results)}"
+            )
+        agreement = {field: 0 for field in cls.FIELDS}
+        mismatches = []
+        for entry, result, expected in zip(corpus, results, golden):
+            for field in cls.FIELDS:
+                if result[field] == expected.get(field):
+                    agreement[field] += 1
+                else:
+                    mismatches.append(
+                        {
+                            "path": entry["path"],
+                            "field": field,
+                            "expected": expected.get(field),
+                            "actual": result[field],
+                        }
+                    )
+        return agreement, mismatches
+
+    @staticmethod
+    def load(file_path: Path | str) -> list:
+        """
+        Загружает корпус или эталон
+        :param file_path: Путь к файлу
+        :return: Список записей
+        """
+        return json.loads(Path(file_path).read_text(encoding="utf-8"))
+
+    @staticmethod
+    def save(file_path: Path | str, entries: list):
+        """
+        Сохраняет корпус или эталон (по одной записи в строке, чтобы изменения было удобно смотреть)
+        :param file_path: Путь к файлу
+        :param entries: Список записей
+        """
+        file_path = Path(file_path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        lines = [json.dumps(entry, ensure_ascii=False) for entry in entries]
+        file_path.write_text("[\n" + ",\n".join(lines) + "\n]\n", encoding="utf-8")
@@ -0,0 +1,167 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from timetable_project.settings import CACHE_DIR
+
+# Создаем логгер для текущего модуля
+logger = logging.getLogger(__name__)
+
+
+class ClassificationCache:
+    """
+    Постоянный кэш результатов классификации файлов.
+    Для каждого пути файла на сайте хранит рассчитанные по нему параметры:
+    имена, степень и форму обучения, факультет, курсы и корректный путь.
+    Кэш привязан к версии классификатора: при её изменении все записи сбрасываются.
+    """
+
+    # Имя файла кэша по умолчанию
+    DEFAULT_FILE_NAME = "file_classification.json"
+
+    # Через сколько дней без обращений запись удаляется из кэша
+    MAX_AGE_DAYS = 30
+
+    # Общие для всего процесса экземпляры кэша: версия классификатора -> кэш
+    __defaults = {}
+    __default_lock = threading.Lock()
+
+    def __init__(self, file_path: Path | str, classifier_version: int):
+        """
+        Загружает кэш из файла, если он существует и создан той же версией классификатора
+        :param file_path: Путь к файлу кэша
+        :param classifier_version: Версия классификатора
+        """
+        self.__file_path = Path(file_path)
+        self.__classifier_version = classifier_version
+        self.__lock = threading.Lock()
+        self.__entries = self.__load()  # Путь файла -> запись классификации
+        self.__hits = 0
+        self.__misses = 0
+
+    @classmethod
+    def get_default(cls, classifier_version: int):
+        """
+        Возвращает общий экземпляр кэша, хранящийся в папке кэша проекта
+        :param classifier_version: Версия классификатора
+        :return: Кэш классификации
+        """
+        with cls.__default_lock:
+            if classifier_version not in cls.__defaults:
+                cls.__defaults[classifier_version] = cls(
+                    Path(CACHE_DIR) / cls.DEFAULT_FILE_NAME, classifier_version
+                )
+            return cls.__defaults[classifier_version]
+
+    def get(self, path: str) -> dict | None:
+        """
+        Возвращает результат классификации для пути файла
+        :param path: Путь файла на сайте
+        :return: Словарь параметров или None
+        """
+        with self.__lock:
+            entry = self.__entries.get(path)
+            if entry is None:
+                self.__misses += 1
+                return None
+            self.__hits += 1
+            entry["used_at"] = datetime.now().isoformat()
+            return entry["values"]
+
+    def contains(self, path: str) -> bool:
+        """
+        Проверяет наличие пути файла, не меняя счётчики и время использования записи
+        :param path: Путь файла на сайте
+        :return: Путь есть в кэше
+        """
+        with self.__lock:
+            return path in self.__entries
+
+    def put(self, path: str, values: dict):
+        """
+        Сохраняет результат классификации для пути файла
+        :param path: Путь файла на сайте
+        :param values: Словарь параметров (значения должны сериализоваться в JSON)
+        """
+        with self.__lock:
+            self.__entries[path] = {
+                "values": values,
+                "used_at": datetime.now().isoformat(),
+            }
+
+    def get_stats(self) -> dict:
+        """
+        Возвращает статистику использования кэша
+        :return: Словарь с количеством попаданий, промахов и записей
+        """
+        with self.__lock:
+            return {
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "size": len(self.__entries),
+            }
+
+    def save(self):
+        """
+        Сохраняет кэш в файл, удаляя давно не использованные записи
+        """
+        expiration_date = datetime.now() - timedelta(days=self.MAX_AGE_DAYS)
+        with self.__lock:
+            self.__entries = {
+                path: entry
+                for path, entry in self.__entries.items()
+                if datetime.fromisoformat(entry["used_at"]) >= expiration_date
+            }
+            data = json.dumps(
+                {
+                    "classifier_version": self.__classifier_version,
+                    "entries": self.__entries,
+                },
+                ensure_ascii=False,
+            )
+
+        try:
+            self.__file_path.parent.mkdir(parents=True, exist_ok=True)
+            # Пишем во временный файл и подменяем, чтобы не повредить кэш при сбое.
+            # Имя временного файла уникально для процесса, так как обновление
+            # может быть запущено одновременно несколькими процессами
+            tmp_path = self.__file_path.with_suffix(
+                f"{self.__file_path.suffix}.{os.getpid()}.tmp"
+            )
+            tmp_path.write_text(data, encoding="utf-8")
+            os.replace(tmp_path, self.__file_path)
+            logger.debug(f"Classification cache saved: {len(self.__entries)} paths")
+        except OSError as e:
+            logger.warning(
+                f"Failed to save classification cache {self.__file_path}: {e}"
+            )
+
+    def __load(self) -> dict:
+        """
+        Загружает записи кэша из файла
+        :return: Словарь (путь файла) -> (запись классификации)
+        """
+        if not self.__file_path.is_file():
+            return {}
+        try:
+            data = json.loads(self.__file_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(
+                f"Failed to load classification cache {self.__file_path}: {e}"
+            )
+            return {}
+        if not isinstance(data, dict) or "entries" not in data:
+            logger.warning(
+                f"Unknown classification cache format, cache reset: {self.__file_path}"
+            )
+            return {}
+        if data.get("classifier_version") != self.__classifier_version:
+            logger.info(
+                f"Classifier version changed ({data.get('classifier_version')} -> "
+                f"{self.__classifier_version}), classification cache reset"
+            )
+            return {}
+        return data["entries"]
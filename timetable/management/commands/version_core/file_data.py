@@ -2,17 +2,23 @@ from asyncio.log import logger
 import hashlib
 import json
 import re
+import time
 import ipdb
 from datetime import datetime
 from pathlib import Path
 from urllib.parse import unquote
 
-
-import requests
 from openpyxl import load_workbook
 
 from timetable.models import Resource, FileVersion, Tag
+from .http_client import HttpClient
+from .lru_cache import LRUCache
 from .stringlistanalyzer import StringListAnalyzer
+from .tokenizer import Token, Tokenizer
+from .xls_converter import XlsReader
+
+# Признак производного параметра файла, который ещё не рассчитан
+_NOT_CALCULATED = object()
 
 
 class FileData:
@@ -70,12 +76,51 @@ class FileData:
     # Символы, которые могут разделять наименования
     _SENTENCE_DELIMITERS = ["_", " ", "(", ")", ",", ".", '"']
 
+    # Лексический анализатор: каждая строка разбирается один раз, эвристики работают с лексемами
+    _TOKENIZER = Tokenizer(_SENTENCE_DELIMITERS)
+
     # Расширения экселевских таблицы
     _EXCEL_EXTENSION = [".xls", ".xlsx", ".xlsm"]
 
+    # Максимальное количество записей в каждом кэше классификации
+    _CLASSIFICATION_CACHE_SIZE = 4096
+
+    # Кэш эвристик: (вид эвристики, нормализованная часть пути) -> количество слов-маркеров.
+    # Одни и те же директории повторяются у сотен файлов, поэтому эвристика
+    # рассчитывается один раз для каждой различной части пути
+    _WORD_COUNT_CACHE = LRUCache(_CLASSIFICATION_CACHE_SIZE)
+
+    # Кэш корректных имён файлов: имя без лишних пробелов -> корректное имя
+    _CORRECT_FILE_NAME_CACHE = LRUCache(_CLASSIFICATION_CACHE_SIZE)
+
+    # Версия классификатора. Увеличивается при изменении эвристик или слов-маркеров,
+    # чтобы сбросить постоянный кэш классификации
+    CLASSIFIER_VERSION = 1
+
+    # Постоянный кэш классификации по пути файла (None - не используется)
+    _classification_cache = None
+
+    # Все атрибуты перечислены заранее: объектов создаётся столько же, сколько файлов на сайте
+    __slots__ = (
+        "__path",
+        "__url",
+        "__last_changed",
+        "__name_from_path",
+        "__correct_name_from_path",
+        "__name_from_url_with_mimetype",
+        "__name_from_url",
+        "__correct_name_from_url",
+        "__degree",
+        "__education_form",
+        "__faculty",
+        "__course",
+        "__correct_path",
+    )
+
     def __init__(self, path: str, url: str, last_update):
         """
-        Расчёт всех параметров для файла с параметрами
+        Сохраняет параметры файла. Производные параметры рассчитываются
+        при первом обращении, так как для файлов без изменений большинство из них не нужны.
         :param path: Путь к файлу (содержит имя файла, предложенное в иерархии)
         :param url: Ссылка для скачивания
         :param last_update: Последнее время обновления
@@ -84,7 +129,18 @@ class FileData:
         self.__path = path  # Путь по которому хранился файл на сайте
         self.__url = url  # Ссылка для скачивания файла
         self.__last_changed = last_update  # Время последнего обновления
-        self.__calc()
+
+        # Производные параметры (см. соответствующие методы __get_...)
+        self.__name_from_path = _NOT_CALCULATED
+        self.__correct_name_from_path = _NOT_CALCULATED
+        self.__name_from_url_with_mimetype = _NOT_CALCULATED
+        self.__name_from_url = _NOT_CALCULATED
+        self.__correct_name_from_url = _NOT_CALCULATED
+        self.__degree = _NOT_CALCULATED
+        self.__education_form = _NOT_CALCULATED
+        self.__faculty = _NOT_CALCULATED
+        self.__course = _NOT_CALCULATED
+        self.__correct_path = _NOT_CALCULATED
 
     def get_path(self) -> str:
         return self.__path
@@ -95,78 +151,197 @@ class FileData:
     def get_last_changed(self) -> str:
         return self.__last_changed
 
-    def __calc(self):
-        """
-        Рассчитывает все параметры для файла
-        :return: Текущий экземпляр класса
-        """
-        self.__name_from_path_with_mimetype = self.get_file_name_from_path(
-            self.__path, dell_mimetype=False
-        )  # Имя файла с расширением из пути
-        self.__name_from_path = self.get_file_name_from_path(
-            self.__path
-        )  # Имя файла с расширением из пути
-        self.__mimetype_from_path = self.__get_mimetype(
-            self.__path
-        )  # Расширение файла из пути
-        self.__correct_name_from_path = self.get_correct_file_name(
-            self.__name_from_path
-        )  # Корректное имя файла из пути
-
-        self.__name_from_url_with_mimetype = self.get_file_name_from_path(
-            self.__url, dell_mimetype=False
-        )  # Имя файла с расширением из ссылки
-        self.__name_from_url = self.get_file_name_from_path(
-            self.__url
-        )  # Имя файла из ссылки
-        self.__mimetype_from_url = self.__get_mimetype(
-            self.__path
-        )  # Расширение файла из ссылки
-        self.__correct_name_from_url = self.get_correct_file_name(
-            self.__correct_name_from_path
-        )  # Корректное имя файла из url
-
-        self.__degree = self._get_degree(
-            self.__path
-        )  # Степень обучения (бакалавриат, магистратура и другие)
-        self.__education_form = self._get_education_form(
-            self.__path
-        )  # Форма обучения (очная, заочная и другие)
-        self.__faculty = self._get_faculty(self.__path)  # Факультет обучения
-        self.__course = self._get_course_list(self.__name_from_path)  # Список курсов
-
-        self.__correct_path = self.__calc_correct_path(
-            self.__path
-        )  # Корректный путь к файлу
-        self.__hash = None
-
-        return self
+    def get_last_changed_datetime(self) -> datetime | None:
+        """
+        Возвращает время последнего обновления, указанное на сайте
+        :return: Время или None, если его не удалось распознать
+        """
+        try:
+            return datetime.strptime(self.__last_changed, "%Y-%m-%d %H:%M:%S")
+        except (TypeError, ValueError):
+            return None
+
+    def __get_name_from_path(self) -> str:
+        """
+        :return: Имя файла без расширения из пути
+        """
+        if (
+            self.__name_from_path is _NOT_CALCULATED
+            and not self.__load_classification()
+        ):
+            self.__name_from_path = self.get_file_name_from_path(self.__path)
+        return self.__name_from_path
+
+    def __get_correct_name_from_path(self) -> str:
+        """
+        :return: Корректное имя файла из пути
+        """
+        if (
+            self.__correct_name_from_path is _NOT_CALCULATED
+            and not self.__load_classification()
+        ):
+            self.__correct_name_from_path = self.get_correct_file_name(
+                self.__get_name_from_path()
+            )
+        return self.__correct_name_from_path
+
+    def __get_name_from_url_with_mimetype(self) -> str:
+        """
+        :return: Имя файла с расширением из ссылки
+        """
+        if self.__name_from_url_with_mimetype is _NOT_CALCULATED:
+            self.__name_from_url_with_mimetype = self.get_file_name_from_path(
+                self.__url, dell_mimetype=False
+            )
+        return self.__name_from_url_with_mimetype
+
+    def __get_name_from_url(self) -> str:
+        """
+        :return: Имя файла из ссылки
+        """
+        if self.__name_from_url is _NOT_CALCULATED:
+            self.__name_from_url = self.get_file_name_from_path(self.__url)
+        return self.__name_from_url
+
+    def __get_correct_name_from_url(self) -> str:
+        """
+        :return: Корректное имя файла из url
+        """
+        if (
+            self.__correct_name_from_url is _NOT_CALCULATED
+            and not self.__load_classification()
+        ):
+            self.__correct_name_from_url = self.get_correct_file_name(
+                self.__get_correct_name_from_path()
+            )
+        return self.__correct_name_from_url
+
+    def __get_degree_value(self) -> str | None:
+        """
+        :return: Степень обучения (часть пути) или None
+        """
+        if self.__degree is _NOT_CALCULATED and not self.__load_classification():
+            self.__degree = self._get_degree(self.__path)
+        return self.__degree
+
+    def __get_education_form_value(self) -> str | None:
+        """
+        :return: Форма обучения (часть пути) или None
+        """
+        if (
+            self.__education_form is _NOT_CALCULATED
+            and not self.__load_classification()
+        ):
+            self.__education_form = self._get_education_form(self.__path)
+        return self.__education_form
+
+    def __get_faculty_value(self) -> str | None:
+        """
+        :return: Факультет (часть пути) или None
+        """
+        if self.__faculty is _NOT_CALCULATED and not self.__load_classification():
+            self.__faculty = self._get_faculty(self.__path)
+        return self.__faculty
+
+    def __get_course_value(self) -> list[int]:
+        """
+        :return: Список курсов
+        """
+        if self.__course is _NOT_CALCULATED and not self.__load_classification():
+            self.__course = self._get_course_list(self.__get_name_from_path())
+        return self.__course
+
+    def __get_correct_path_value(self) -> str:
+        """
+        :return: Корректный путь к файлу
+        """
+        if self.__correct_path is _NOT_CALCULATED and not self.__load_classification():
+            self.__correct_path = self.__calc_correct_path(self.__path)
+        return self.__correct_path
+
+    def __load_classification(self) -> bool:
+        """
+        Заполняет все параметры, которые зависят только от пути, из постоянного кэша классификации.
+        Если пути нет в кэше, параметры рассчитываются сразу все и сохраняются в кэш.
+        :return: Параметры заполнены (False - кэш не используется)
+        """
+        cache = self._classification_cache
+        if cache is None:
+            return False
+
+        values = cache.get(self.__path)
+        if values is None:
+            values = self.__calc_classification()
+            cache.put(self.__path, values)
+
+        self.__name_from_path = values["name_from_path"]
+        self.__correct_name_from_path = values["correct_name_from_path"]
+        self.__correct_name_from_url = values["correct_name_from_url"]
+        self.__degree = values["degree"]
+        self.__education_form = values["education_form"]
+        self.__faculty = values["faculty"]
+        self.__course = values["course"]
+        self.__correct_path = values["correct_path"]
+        return True
+
+    def __calc_classification(self) -> dict:
+        """
+        Рассчитывает все параметры, которые зависят только от пути, без обращения к кэшу
+        :return: Словарь параметров для постоянного кэша классификации
+        """
+        name_from_path = self.get_file_name_from_path(self.__path)
+        correct_name_from_path = self.get_correct_file_name(name_from_path)
+
+        # Корректный путь строится из уже рассчитанных параметров
+        self.__degree = self._get_degree(self.__path)
+        self.__education_form = self._get_education_form(self.__path)
+        self.__faculty = self._get_faculty(self.__path)
+        self.__course = self._get_course_list(name_from_path)
+
+        return {
+            "name_from_path": name_from_path,
+            "correct_name_from_path": correct_name_from_path,
+            "correct_name_from_url": self.get_correct_file_name(correct_name_from_path),
+            "degree": self.__degree,
+            "education_form": self.__education_form,
+            "faculty": self.__faculty,
+            "course": self.__course,
+            "correct_path": self.__calc_correct_path(self.__path),
+        }
+
+    @classmethod
+    def set_classification_cache(cls, cache):
+        """
+        Задаёт постоянный кэш классификации для всех файлов
+        :param cache: Кэш классификации (ClassificationCache) или None, чтобы не использовать кэш
+        """
+        cls._classification_cache = cache
 
     def get_name(self):
-        name = self.__correct_name_from_path
+        name = self.__get_correct_name_from_path()
         return name
 
     def get_mimetype(self):
-        return self.__mimetype_from_url
+        return self.__get_mimetype(self.__path)
 
     def get_file_name(self):
-        name = self.__name_from_url_with_mimetype
-        words = name.split()
+        name_with_mimetype = self.__get_name_from_url_with_mimetype()
+        words = name_with_mimetype.split()
         name = "".join(word[0].upper() for word in words)
-        if self.__name_from_url_with_mimetype.endswith(".xlsx"):
+        if name_with_mimetype.endswith(".xlsx"):
             return name + ".xlsx"
-        elif self.__name_from_url_with_mimetype.endswith(".xlsm"):
+        elif name_with_mimetype.endswith(".xlsm"):
             return name + ".xlsm"
-        elif self.__name_from_url_with_mimetype.endswith(".xls"):
+        elif name_with_mimetype.endswith(".xls"):
             return name + ".xls"
 
     def get_degree(self) -> str:
-        words = self.__degree.split()
+        words = self.__get_degree_value().split()
         degree = "".join(word[0].upper() for word in words)
         return degree
 
     def get_education_form(self) -> str:
-        words = self.__education_form
+        words = self.__get_education_form_value()
         words = words.replace("-", " ")
         words = words.replace(",", " ")
         words = words.replace("(", "")
@@ -176,9 +351,9 @@ class FileData:
         return education_form
 
     def get_faculty(self) -> str:
-        if self.__faculty is None:
+        if self.__get_faculty_value() is None:
             return "Все расписания"
-        words = self.__faculty
+        words = self.__get_faculty_value()
         words = words.replace("-", " ")
         words = words.replace(",", " ")
         words = words.replace("(", "")
@@ -188,26 +363,26 @@ class FileData:
         return faculty
 
     def get_course(self) -> str:
-        return str(", ".join(map(str, self.__course)))
+        return str(", ".join(map(str, self.__get_course_value())))
 
     def get_name_from_path(self) -> str:
-        name = self.__name_from_path
+        name = self.__get_name_from_path()
         return name
 
     def get_correct_name_from_path(self) -> str:
-        name = self.__correct_name_from_path
+        name = self.__get_correct_name_from_path()
         return name
 
     def get_name_from_url(self) -> str:
-        name = self.__name_from_url
+        name = self.__get_name_from_url()
         return name
 
     def get_correct_name_from_url(self) -> str:
-        name = self.__correct_name_from_url
+        name = self.__get_correct_name_from_url()
         return name
 
     def get_correct_path(self) -> str:
-        path = self.__correct_path
+        path = self.__get_correct_path_value()
         # Удаляем лишние точки перед расширением в имени файла
         path_parts = path.strip("/").split("/")
         abbreviations = []
@@ -337,10 +512,11 @@ class FileData:
             # Список чисел
             number_list = []
 
+            # Лексемы строки
+            tokens = FileData._TOKENIZER.tokenize(string)
+
             # Поиск слов, максимально похожих на наше ключевое слово
-            analyze = StringListAnalyzer(
-                FileData.split_string_by_delimiters(string), [mark_word]
-            )
+            analyze = StringListAnalyzer(tokens.get_pieces(), [mark_word])
             mark_words_in_string = analyze.get_max_ratio_words()
 
             # Вернуть пустой список, если слово недостаточно похоже или ни одно слово не найдено
@@ -364,8 +540,8 @@ class FileData:
                 finish_index = start_index + mark_word_in_string_length
 
                 # Список слов слева и справа
-                left_words = cls.__find_all_words(string[:start_index])[::-1]
-                right_words = cls.__find_all_words(string[finish_index + 1 :])
+                left_words = tokens.get_words(0, start_index)[::-1]
+                right_words = tokens.get_words(finish_index + 1)
 
                 # Список строк чисел и диапазонов чисел слева и справа
                 left_numbers = cls.__get_first_elements_in_list(
@@ -414,15 +590,6 @@ class FileData:
             # Вернуть список индексов
             return indices
 
-        @staticmethod
-        def __find_all_words(string: str):
-            """
-            Ищет все слова и диапазоны чисел.
-            :param string: Строка
-            :return: Список строк
-            """
-            return re.findall(r"\b(\d+\s*-\s*\d+|\w+)\b", string)
-
         @staticmethod
         def __get_first_elements_in_list(elements: list, condition):
             """
@@ -440,27 +607,26 @@ class FileData:
             return first_elements
 
         @staticmethod
-        def __is_number_or_number_range(string: str):
+        def __is_number_or_number_range(word: Token):
             """
-            Проверка строки на число или диапазон чисел.
-            :param string: Строка
+            Проверка слова на число или диапазон чисел.
+            :param word: Лексема слова
             :return: Результат проверки
             """
-            val = re.search(r"\b(\d+\s*-\s*\d+|\d+)\b", string)
-            return re.search(r"\b(\d+\s*-\s*\d+|\d+)\b", string) is not None
+            return word.kind in (Tokenizer.NUMBER, Tokenizer.RANGE)
 
         @staticmethod
-        def __get_number_list(string_list: list[str]) -> list[int]:
+        def __get_number_list(words: list[Token]) -> list[int]:
             """
-            Получить список чисел из списка строк с числами и диапазонами.
-            :param string_list: Список строк
+            Получить список чисел из списка лексем с числами и диапазонами.
+            :param words: Список лексем
             :return: Список чисел
             """
             # Список чисел
             numbers = []
 
             # Для каждой строки
-            for string in string_list:
+            for string in (word.text for word in words):
                 # Добавить диапазон
                 if string.find("-") > 0:
                     left_number, right_number = string.split("-")[0:2]
@@ -515,9 +681,21 @@ class FileData:
         # Удаление лишние пробелы
         new_file_name = cls.__remove_extra_spaces(file_name)
 
+        # Результат зависит только от имени без лишних пробелов
+        return cls._CORRECT_FILE_NAME_CACHE.get_or_compute(
+            new_file_name, lambda: cls.__calc_correct_file_name(new_file_name)
+        )
+
+    @classmethod
+    def __calc_correct_file_name(cls, new_file_name: str):
+        """
+        Рассчитывает корректное имя файла
+        :param new_file_name: Имя файла без лишних пробелов
+        :return: Новое имя файла
+        """
         # Поиск слов, максимально похожих на список запрещённых
         analyze = StringListAnalyzer(
-            cls.split_string_by_delimiters(new_file_name), cls._WORDS_TO_DELETE
+            cls._TOKENIZER.tokenize(new_file_name).get_pieces(), cls._WORDS_TO_DELETE
         )
         del_words = analyze.get_strings_by_ratio_in_range(cls._CONFIDENCE_VALUE, 1)
         # Удаление запрещённых слов
@@ -558,10 +736,12 @@ class FileData:
         new_path.append(
             schedule_type
         )  # Добавляем "Расписание занятий" или "Расписание экзаменов"
-        new_path.append(self.__degree)  # Добавить степень обучения
-        new_path.append(self.__faculty)  # Добавить факультет
-        new_path.append(self.__education_form)  # Добавить форму обучения
-        new_path.append(self.__get_course_string(self.__course))  # Добавить курс
+        new_path.append(self.__get_degree_value())  # Добавить степень обучения
+        new_path.append(self.__get_faculty_value())  # Добавить факультет
+        new_path.append(self.__get_education_form_value())  # Добавить форму обучения
+        new_path.append(
+            self.__get_course_string(self.__get_course_value())
+        )  # Добавить курс
 
         # Вернуть новый путь
         return self.elements_to_path(new_path)
@@ -636,10 +816,7 @@ class FileData:
         :param string: Строка для поиска
         :return: Эвристическое значение
         """
-        analyzer = StringListAnalyzer(
-            cls.split_string_by_delimiters(string.lower()), cls._DEGREE_WORDS
-        )
-        return len(analyzer.get_strings_by_ratio_in_range(cls._CONFIDENCE_VALUE, 1))
+        return cls.__get_word_count("degree", string, cls._DEGREE_WORDS)
 
     @classmethod
     def __get_education_form_word_count(cls, string: str):
@@ -650,10 +827,7 @@ class FileData:
         :param string: Строка для поиска
         :return: Эвристическое значение
         """
-        analyzer = StringListAnalyzer(
-            cls.split_string_by_delimiters(string.lower()), cls._EDUCATION_FORM_WORDS
-        )
-        return len(analyzer.get_strings_by_ratio_in_range(cls._CONFIDENCE_VALUE, 1))
+        return cls.__get_word_count("education_form", string, cls._EDUCATION_FORM_WORDS)
 
     @classmethod
     def __get_faculty_word_count(cls, string: str):
@@ -664,11 +838,118 @@ class FileData:
         :param string: Строка для поиска
         :return: Эвристическое значение
         """
+        return cls.__get_word_count("faculty", string, cls._FACULTY_WORDS)
+
+    @classmethod
+    def __get_word_count(cls, kind: str, string: str, marker_words: list[str]):
+        """
+        Вычисляет количество слов в строке, которые похожи на слова-маркеры.
+        Результат кэшируется по нормализованной строке.
+        :param kind: Вид эвристики (ключ кэша)
+        :param string: Строка для поиска
+        :param marker_words: Слова-маркеры
+        :return: Эвристическое значение
+        """
+        segment = cls._normalize_segment(string)
+        return cls._WORD_COUNT_CACHE.get_or_compute(
+            (kind, segment),
+            lambda: cls.__calc_word_count(segment, marker_words),
+        )
+
+    @classmethod
+    def __calc_word_count(cls, segment: str, marker_words: list[str]):
+        """
+        Вычисляет количество слов в нормализованной строке, которые похожи на слова-маркеры
+        :param segment: Нормализованная строка
+        :param marker_words: Слова-маркеры
+        :return: Эвристическое значение
+        """
         analyzer = StringListAnalyzer(
-            cls.split_string_by_delimiters(string.lower()), cls._FACULTY_WORDS
+            cls._TOKENIZER.tokenize(segment).get_pieces(), marker_words
         )
         return len(analyzer.get_strings_by_ratio_in_range(cls._CONFIDENCE_VALUE, 1))
 
+    @classmethod
+    def warm_classification_cache(cls, paths: list[str]):
+        """
+        Заранее рассчитывает эвристики для всех различных частей путей одним пакетом
+        для каждого списка слов-маркеров, вместо отдельного анализатора для каждой части пути.
+        Пути, уже сохранённые в постоянном кэше классификации, пропускаются:
+        их параметры берутся из кэша и эвристики для них не нужны
+        :param paths: Пути файлов
+        """
+        cache = cls._classification_cache
+        if cache is not None:
+            paths = [path for path in paths if not cache.contains(path)]
+        if not paths:
+            return
+
+        segments = list(
+            dict.fromkeys(
+                cls._normalize_segment(segment)
+                for path in paths
+                for segment in path.split("/")
+            )
+        )
+        for kind, marker_words in (
+            ("degree", cls._DEGREE_WORDS),
+            ("education_form", cls._EDUCATION_FORM_WORDS),
+            ("faculty", cls._FACULTY_WORDS),
+        ):
+            new_segments = [
+                segment
+                for segment in segments
+                if not cls._WORD_COUNT_CACHE.contains((kind, segment))
+            ]
+            if not new_segments:
+                continue
+
+            # Для эвристики важно только, достигнут ли порог, поэтому поиск завершается досрочно
+            scores = StringListAnalyzer.score_batch(
+                [
+                    cls._TOKENIZER.tokenize(segment).get_pieces()
+                    for segment in new_segments
+                ],
+                marker_words,
+                cls._CONFIDENCE_VALUE,
+            )
+            for row, segment in enumerate(new_segments):
+                cls._WORD_COUNT_CACHE.put(
+                    (kind, segment),
+                    scores.count_in_range(row, cls._CONFIDENCE_VALUE, 1),
+                )
+
+    @staticmethod
+    def _normalize_segment(string: str) -> str:
+        """
+        Нормализует часть пути для эвристик: приводит к нижнему регистру и убирает лишние пробелы.
+        Пустые слова между пробелами не похожи ни на одно слово-маркер,
+        поэтому нормализация не меняет значение эвристик.
+        :param string: Часть пути
+        :return: Нормализованная строка
+        """
+        return re.sub(" +", " ", string.lower()).strip(" ")
+
+    @classmethod
+    def get_classification_cache_stats(cls) -> dict:
+        """
+        Возвращает статистику кэшей классификации
+        :return: Словарь (имя кэша) -> (попадания, промахи, количество записей)
+        """
+        return {
+            "word_count": cls._WORD_COUNT_CACHE.get_stats(),
+            "correct_file_name": cls._CORRECT_FILE_NAME_CACHE.get_stats(),
+        }
+
+    @classmethod
+    def clear_classification_caches(cls):
+        """
+        Очищает кэши классификации в памяти (например, для измерения скорости без кэшей)
+        """
+        cls._WORD_COUNT_CACHE.clear()
+        cls._CORRECT_FILE_NAME_CACHE.clear()
+        cls._TOKENIZER.clear_cache()
+
     @classmethod
     def split_string_by_delimiters(
         cls, string: str, delimiters: list | None = None
@@ -679,9 +960,9 @@ class FileData:
         :param delimiters: Список разделителей
         :return: Список слов
         """
-        # Используется стандартный набор разделителей если другой не указан явно
+        # Стандартный набор разделителей обрабатывается лексическим анализатором
         if delimiters is None:
-            delimiters = cls._SENTENCE_DELIMITERS
+            return list(cls._TOKENIZER.tokenize(string).get_pieces())
 
         # Создаем регулярное выражение для поиска всех разделителей
         regex_pattern = "|".join(map(re.escape, delimiters))
@@ -696,10 +977,10 @@ class FileData:
         """
         json_data = {
             "type_timetable": type_timetable,
-            "degree": self.__degree,
-            "education_form": self.__education_form,
-            "faculty": self.__faculty,
-            "course": self.__course,
+            "degree": self.__get_degree_value(),
+            "education_form": self.__get_education_form_value(),
+            "faculty": self.__get_faculty_value(),
+            "course": self.__get_course_value(),
         }
         return json.dumps(json_data, indent=4)
 
@@ -707,22 +988,22 @@ class FileData:
         l = []
         l.append(Tag(name=type_timetable, category="type_timetable"))
 
-        degree = self.__degree
+        degree = self.__get_degree_value()
         if degree is None:
             degree = "Неопределенно"
         l.append(Tag(name=degree, category="degree"))
 
-        education_form = self.__education_form
+        education_form = self.__get_education_form_value()
         if education_form is None:
             education_form = "Неопределенно"
         l.append(Tag(name=education_form, category="education_form"))
 
-        faculty = self.__faculty
+        faculty = self.__get_faculty_value()
         if faculty is None:
             faculty = "Неопределенно"
         l.append(Tag(name=faculty, category="faculty"))
 
-        course_list = self.__course
+        course_list = self.__get_course_value()
         if len(course_list) == 0:
             course_list = ["Неопределенно"]
 
@@ -757,11 +1038,20 @@ class FileData:
         new_vis_resource.derived_from = resource
         return new_vis_resource
 
-    def get_file_version(self, file_path: Path | str, resource_id: int = None):
+    def get_file_version(
+        self,
+        file_path: Path | str,
+        resource_id: int = None,
+        byte_hash: str | None = None,
+        validators: dict | None = None,
+    ):
         """
         Возвращает новую запись версии файла для базы данных.
         :param file_path: Путь к файлу, для которой создаётся запись
         :param resource_id: ID ресурса, к которому привязан файл
+        :param byte_hash: Hash сумма байтов скачанного файла (опционально, см. stream_download).
+            Сохраняется в версии и заменяет чтение файла для hash суммы файлов не Excel
+        :param validators: Валидаторы ответа сервера (опционально, см. get_response_validators)
         :return: Модель записи базы данных
         """
         # Приводим тип к нужному типу
@@ -779,17 +1069,21 @@ class FileData:
         # Добавить остальные параметры
         new_file_version.mimetype = file_path.suffix  # Добавить расширение файла
         # Добавить время обновления, указанное на сайте
-        try:
-            new_file_version.last_changed = datetime.strptime(
-                self.get_last_changed(), "%Y-%m-%d %H:%M:%S"
-            )
-        except ValueError:
+        new_file_version.last_changed = self.get_last_changed_datetime()
+        if new_file_version.last_changed is None:
             # Вернуть текущее время, если не получилось распарсить время с сайта
             new_file_version.last_changed = datetime.now()
         new_file_version.url = self.get_url()  # Добавить ссылку на скачивание
-        new_file_version.hashsum = self.__get_file_hash(
-            file_path
-        )  # Добавляет hash сумму файла
+        # Добавляет hash сумму файла и hash суммы листов книги Excel
+        new_file_version.hashsum, new_file_version.sheet_hashes = self.__get_file_hash(
+            file_path, byte_hash
+        )
+        new_file_version.byte_hash = byte_hash  # Добавляет hash сумму байтов файла
+        if validators is not None:
+            # Валидаторы сервера для условного скачивания в следующих запусках
+            new_file_version.etag = validators.get("etag")
+            new_file_version.http_last_modified = validators.get("http_last_modified")
+            new_file_version.content_length = validators.get("content_length")
 
         # Вернуть запись
         return new_file_version
@@ -803,23 +1097,88 @@ class FileData:
         return vis_file_version
 
     @classmethod
-    def __get_file_hash(cls, file_path: Path):
+    def __get_file_hash(
+        cls, file_path: Path, byte_hash: str | None = None
+    ) -> tuple[str, dict | None]:
+        """
+        Рассчитывает hash сумму файла: для книг Excel - по значениям ячеек, для остальных - по байтам
+        :param file_path: Путь к файлу
+        :param byte_hash: Уже рассчитанная hash сумма байтов файла (опционально)
+        :return: Кортеж (hash сумма, hash суммы листов или None, если файл не книга Excel)
+        """
         suffix = file_path.suffix
+        if suffix == ".xls":
+            # Файл .xls остаётся без конвертации, только если его можно прочитать через xlrd
+            logger.debug(f"Processing XLS file natively: {file_path}")
+            wb = XlsReader.load_workbook(file_path)
+            try:
+                return cls.__get_sheets_hash(wb.worksheets)
+            finally:
+                wb.close()
         if suffix in cls._EXCEL_EXTENSION:
             logger.debug(f"Processing Excel file with extension: {suffix}")
             return cls.__get_excel_file_hash(file_path)
+        elif byte_hash is not None:
+            # Hash сумма байтов рассчитана при скачивании, файл не перечитываем
+            return byte_hash, None
         else:
             logger.debug(f"Processing binary file with extension: {suffix}")
-            return cls.__get_bin_file_hash(file_path)
+            return cls.__get_bin_file_hash(file_path), None
+
+    @classmethod
+    def __get_excel_file_hash(cls, file_path: Path) -> tuple[str, dict]:
+        """
+        Рассчитывает hash суммы значений ячеек книги Excel и каждого её листа.
+        Книга читается в режиме только для чтения, строки по одной добавляются в hash сумму,
+        поэтому память не зависит от размера книги.
+        :param file_path: Путь к файлу
+        :return: Кортеж (hash сумма книги, словарь (название листа) -> (hash сумма листа))
+        """
+        wb = load_workbook(str(file_path), read_only=True, data_only=True)
+        try:
+            # Без размеров листов строки в режиме только для чтения имеют другую ширину
+            if any(
+                sheet.max_row is None or sheet.max_column is None
+                for sheet in wb.worksheets
+            ):
+                logger.debug(
+                    f"Worksheet dimensions not found, loading file fully: {file_path}"
+                )
+                loaded_wb = load_workbook(str(file_path), data_only=True)
+                return cls.__get_sheets_hash(loaded_wb.worksheets)
+            return cls.__get_sheets_hash(wb.worksheets)
+        finally:
+            # В режиме только для чтения файл остаётся открытым до закрытия книги
+            wb.close()
 
     @staticmethod
-    def __get_excel_file_hash(file_path: Path):
-        wb = load_workbook(str(file_path), data_only=True)
-        data = []
-        for sheet in wb.worksheets:
+    def __get_sheets_hash(sheets: list) -> tuple[str, dict]:
+        """
+        Рассчитывает hash суммы значений строк листов.
+        Строки кодируются так же, как str(список строк всех листов),
+        чтобы hash суммы сохранённых версий не изменились.
+        Hash сумма листа рассчитывается так же по строкам одного листа.
+        :param sheets: Листы книги
+        :return: Кортеж (hash сумма всех листов, словарь (название листа) -> (hash сумма листа))
+        """
+        file_hash = hashlib.sha256(b"[")
+        file_separator = b""
+        sheet_hashes = {}
+        for sheet in sheets:
+            sheet_hash = hashlib.sha256(b"[")
+            sheet_separator = b""
             for row in sheet.iter_rows(values_only=True):
-                data.append(tuple(row))  # Собираем данные
-        return hashlib.sha256(str(data).encode("utf-8")).hexdigest()
+                encoded_row = repr(row).encode("utf-8")
+                file_hash.update(file_separator)
+                file_hash.update(encoded_row)
+                file_separator = b", "
+                sheet_hash.update(sheet_separator)
+                sheet_hash.update(encoded_row)
+                sheet_separator = b", "
+            sheet_hash.update(b"]")
+            sheet_hashes[sheet.title] = sheet_hash.hexdigest()
+        file_hash.update(b"]")
+        return file_hash.hexdigest(), sheet_hashes
 
     @staticmethod
     def __get_bin_file_hash(file_path: Path):
@@ -835,31 +1194,152 @@ class FileData:
         # Возвращаем хэш файла в виде строки
         return sha256_hash.hexdigest()
 
-    def download_file(self, dir: Path | str, chunk_size: int = 8192):
+    def get_temp_file_name(self) -> str:
+        """
+        Возвращает имя временного файла для скачивания.
+        Сокращённые имена (get_file_name) у разных файлов часто совпадают,
+        поэтому к имени добавляется hash сумма ссылки.
+        :return: Имя файла
+        """
+        url_hash = hashlib.sha256(self.__url.encode("utf-8")).hexdigest()[:16]
+        file_name = self.get_file_name()
+        if file_name is None:
+            # Ссылка ведёт не на таблицу, расширение берётся из ссылки
+            return url_hash + Path(self.__get_name_from_url_with_mimetype()).suffix
+        file_path = Path(file_name)
+        return f"{file_path.stem}_{url_hash}{file_path.suffix}"
+
+    def download_file(
+        self, dir: Path | str, chunk_size: int = 8192, timeout: float | None = None
+    ):
         """
         Скачивает файл по ссылке и сохраняет его по заданному пути
         :param dir: Путь для сохранения файла
         :param chunk_size: размер чанка для сохранения
+        :param timeout: Максимальное время скачивания всего файла (секунды, опционально)
         :return: Путь по которому сохранён файл
         """
-        # Попытаться скачать файл
-        download_file = requests.get(self.get_url())
-
-        # Выбросить исключение если файл не был скачан успешно
-        if download_file.status_code != 200:
-            raise Exception(f"File download error. URL: {self.get_url()}")
-
-        dir = Path(dir)
-        # Создаём путь к папке
-        dir.mkdir(parents=True, exist_ok=True)
-
-        # Создать путь к файлу
-        file_path = dir / self.get_file_name()
+        return self.stream_download(dir, chunk_size, timeout)[0]
+
+    def stream_download(
+        self,
+        dir: Path | str,
+        chunk_size: int = 65536,
+        timeout: float | None = None,
+        validators: dict | None = None,
+    ) -> tuple[Path, str, int, dict] | None:
+        """
+        Скачивает файл по ссылке частями и сохраняет его по заданному пути.
+        Части записываются по мере получения и сразу добавляются в hash сумму,
+        поэтому файл не хранится в памяти целиком и не читается с диска повторно.
+        Если заданы валидаторы прошлой версии файла, выполняется условный запрос.
+        :param dir: Путь для сохранения файла
+        :param chunk_size: размер чанка для сохранения
+        :param timeout: Максимальное время скачивания всего файла (секунды, опционально)
+        :param validators: Валидаторы прошлой версии файла (см. get_response_validators, опционально)
+        :return: Кортеж (путь к файлу, hash сумма SHA-256 байтов файла, размер в байтах,
+            валидаторы ответа) или None, если файл не изменился
+        """
+        started_at = time.monotonic()
+
+        # Заголовки условного запроса
+        headers = {}
+        if validators:
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("http_last_modified"):
+                headers["If-Modified-Since"] = validators["http_last_modified"]
+
+        # Попытаться скачать файл. Место в окне запросов к хосту занято, пока файл скачивается
+        with HttpClient.get_default().stream(
+            self.get_url(), headers=headers
+        ) as download_file:
+            # Сервер подтвердил, что файл не изменился, тело ответа не читаем
+            if validators and self.__is_not_modified(download_file, validators):
+                logger.debug(f"File not modified on server: {self.get_url()}")
+                return None
+
+            # Выбросить исключение если файл не был скачан успешно
+            if download_file.status_code != 200:
+                raise Exception(f"File download error. URL: {self.get_url()}")
+
+            dir = Path(dir)
+            # Создаём путь к папке
+            dir.mkdir(parents=True, exist_ok=True)
+
+            # Создать путь к файлу
+            file_path = dir / self.get_temp_file_name()
+
+            # Сохранить файл, одновременно рассчитывая hash сумму
+            sha256_hash = hashlib.sha256()
+            size = 0
+            try:
+                with file_path.open("wb") as file:
+                    for chunk in download_file.iter_content(chunk_size=chunk_size):
+                        if (
+                            timeout is not None
+                            and time.monotonic() - started_at > timeout
+                        ):
+                            raise TimeoutError(
+                                f"File download timed out after {timeout} seconds. URL: {self.get_url()}"
+                            )
+                        file.write(chunk)
+                        sha256_hash.update(chunk)
+                        size += len(chunk)
+            except BaseException:
+                # Не оставляем недокачанный файл
+                file_path.unlink(missing_ok=True)
+                raise
+
+            response_validators = self.get_response_validators(download_file)
+
+        # Вернуть путь, hash сумму, размер и валидаторы
+        return file_path, sha256_hash.hexdigest(), size, response_validators
 
-        # Сохранить файл
-        with file_path.open("wb") as file:
-            for chunk in download_file.iter_content(chunk_size=chunk_size):
-                file.write(chunk)
+    @staticmethod
+    def get_response_validators(response) -> dict:
+        """
+        Возвращает валидаторы ответа сервера, по которым проверяется изменение файла
+        :param response: Ответ сервера
+        :return: Словарь с ключами etag, http_last_modified, content_length
+            (совпадают с полями версии файла)
+        """
+        content_length = response.headers.get("Content-Length")
+        return {
+            "etag": response.headers.get("ETag"),
+            "http_last_modified": response.headers.get("Last-Modified"),
+            "content_length": (
+                int(content_length)
+                if content_length is not None and content_length.isdigit()
+                else None
+            ),
+        }
 
-        # Вернуть путь
-        return file_path
+    @classmethod
+    def __is_not_modified(cls, response, validators: dict) -> bool:
+        """
+        Проверяет, что файл не изменился: сервер ответил 304
+        или вернул те же валидаторы, что и у прошлой версии файла
+        :param response: Ответ сервера
+        :param validators: Валидаторы прошлой версии файла
+        :return: True, если файл можно не скачивать
+        """
+        if response.status_code == 304:
+            return True
+        if response.status_code != 200:
+            return False
+
+        current = cls.get_response_validators(response)
+        # Разные размеры - точно другой файл
+        if (
+            current["content_length"] is not None
+            and validators.get("content_length") is not None
+            and current["content_length"] != validators["content_length"]
+        ):
+            return False
+        if current["etag"] and validators.get("etag"):
+            return current["etag"] == validators["etag"]
+        # Один размер без времени изменения не гарантирует, что файл тот же
+        return bool(current["http_last_modified"]) and (
+            current["http_last_modified"] == validators.get("http_last_modified")
+        )
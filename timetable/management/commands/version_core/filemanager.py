@@ -1,19 +1,36 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import os
 from pathlib import Path
 import traceback
 import shutil
+import tempfile
 import logging
+import threading
+
+from django.db import connection
+from django.utils import timezone
 
 from timetable_project.settings import (
     TEMP_DIR,
     VIS_PATH,
 )  # VIS_PATH — строка из настроек
-from timetable.models import Resource, FileVersion, Tag, Setting, Storage
+from timetable.models import (
+    Resource,
+    FileVersion,
+    Tag,
+    Setting,
+    Storage,
+    TimetableSource,
+)
+from .http_client import HttpClient, RunDeadlineExceeded
 from .parser import WebParser
 from .storage_manager import StorageManager
 from .view_changes import ViewChanges
 from .file_data import FileData
+from .classification_cache import ClassificationCache
+from .xls_converter import XlsConversionError, XlsConverter, XlsReader
 
 # Создаем логгер для текущего модуля
 logger = logging.getLogger(__name__)
@@ -28,10 +45,26 @@ class FileManager:
     MIN_SEC_DELAY_UPDATE = 5
     MAX_SEC_DELAY_UPDATE = 10
     TIMETABLE_LINK = ""
+    # Каждый N-й запуск скачивает и проверяет все файлы, даже если время обновления на сайте не изменилось
+    FULL_VERIFY_EVERY_N_RUNS = 8
+    # Максимальное количество источников расписаний, обрабатываемых одновременно
+    MAX_PARALLEL_SOURCES = 4
+    # Хранить результаты классификации файлов между запусками
+    USE_CLASSIFICATION_CACHE = True
+    # Количество файлов одного источника, скачиваемых одновременно
+    DOWNLOAD_WORKERS = 8
+    # Максимальное время скачивания одного файла (секунды)
+    DOWNLOAD_TIMEOUT = 300
+    # Читать файлы .xls через xlrd без конвертации в .xlsx (копия .xlsx создаётся только для визуализации)
+    READ_XLS_NATIVELY = False
 
     def __init__(self):
         os.environ["TMPDIR"] = str(TEMP_DIR)
         self.__storages = []
+        # Хранилища используются из потоков разных источников по очереди
+        self.__storage_lock = threading.RLock()
+        # Количество ссылок из analyze_url, пропущенных без начального пути (см. get_sources)
+        self.__skipped_link_count = 0
         try:
             self.TIMETABLE_LINK = Setting.objects.get(key="analyze_url").value.split(
                 ";"
@@ -49,105 +82,560 @@ class FileManager:
 
     def update_timetable(self):
         logger.info("Starting timetable update process")
-        used_resource_ids = set()
+        http_client = HttpClient.get_default()
+        http_client.start_run()
+
+        # Известные пути файлов не классифицируются повторно
+        classification_cache = None
+        if self.USE_CLASSIFICATION_CACHE:
+            classification_cache = ClassificationCache.get_default(
+                FileData.CLASSIFIER_VERSION
+            )
+            FileData.set_classification_cache(classification_cache)
 
-        for ind, el in enumerate(self.TIMETABLE_LINK):
+        try:
+            self.__update_timetable()
+        finally:
+            http_client.finish_run()
+            cache_stats = FileData.get_classification_cache_stats()
+            if classification_cache is not None:
+                FileData.set_classification_cache(None)
+                classification_cache.save()
+                cache_stats["persistent"] = classification_cache.get_stats()
+            for name, stats in cache_stats.items():
+                logger.info(
+                    f"Classification cache {name}: {stats['hits']} hits, "
+                    f"{stats['misses']} misses, {stats['size']} entries"
+                )
+            xls_converter = XlsConverter.get_default()
+            xls_converter.clean_cache()
+            conversion_stats = xls_converter.get_stats()
             logger.info(
-                f"Processing timetable link {ind+1}/{len(self.TIMETABLE_LINK)}: {el}"
+                f"XLS conversion cache: {conversion_stats['hits']} hits, "
+                f"{conversion_stats['misses']} misses"
             )
-            files = WebParser.get_files_from_webpage(
-                el, FileManager.TIMETABLE_START_PATH[ind]
+
+    def __update_timetable(self):
+        http_client = HttpClient.get_default()
+        full_verify = self.__is_full_verify_run()
+        sources = self.get_sources()
+
+        # Источники обрабатываются параллельно, ошибка одного не влияет на остальные
+        max_workers = max(min(len(sources), self.MAX_PARALLEL_SOURCES), 1)
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="timetable-source"
+        ) as executor:
+            futures = [
+                executor.submit(self.__run_source_update, source, ind, full_verify)
+                for ind, source in enumerate(sources)
+            ]
+            results = [future.result() for future in futures]
+
+        used_resource_ids = set()
+        for source_resource_ids in results:
+            if source_resource_ids is not None:
+                used_resource_ids.update(source_resource_ids)
+        # Ресурсы пропущенных ссылок тоже не были проверены
+        failed_count = results.count(None) + self.__skipped_link_count
+        source_count = len(sources) + self.__skipped_link_count
+
+        if http_client.is_deadline_exceeded():
+            # Не все файлы были проверены, поэтому нельзя считать остальные ресурсы устаревшими
+            logger.warning(
+                "Update run deadline exceeded, skipping marking resources as deprecated"
+            )
+        elif failed_count:
+            # Ресурсы источника с ошибкой не были проверены
+            logger.warning(
+                f"{failed_count} of {source_count} sources failed, skipping marking resources as deprecated"
             )
-            logger.info(f"Found {len(files)} files from webpage")
+        elif used_resource_ids:
+            deprecated_count = self.make_other_resource_deprecated(used_resource_ids)
+            logger.info(f"Marked {deprecated_count} resources as deprecated")
+        else:
+            logger.warning("No files were processed during timetable update")
 
-            for file_data in files:
-                logger.info(
-                    f"Processing file - Path: {file_data.get_path()}, Name: {file_data.get_name()}"
+        logger.info("Timetable update process completed")
+
+    def get_sources(self) -> list[TimetableSource]:
+        """
+        Возвращает используемые источники расписаний.
+        Если источники не заданы, они создаются из настройки analyze_url
+        (ссылки через ";") без сохранения в базу данных. Ссылки, для которых
+        нет начального пути в TIMETABLE_START_PATH, пропускаются.
+        :return: Список источников
+        """
+        self.__skipped_link_count = 0
+        sources = list(TimetableSource.objects.filter(enabled=True).order_by("id"))
+        if sources:
+            logger.info(f"Loaded {len(sources)} timetable sources")
+            return sources
+
+        for ind, link in enumerate(self.TIMETABLE_LINK):
+            # Без начального пути и типа расписания файлы попали бы не в тот раздел
+            if ind >= len(self.TIMETABLE_START_PATH):
+                logger.error(
+                    f"No start path for timetable link {link}, skipping it. "
+                    f"Add a timetable source to set its start path and timetable type"
                 )
+                self.__skipped_link_count += 1
+                continue
+            sources.append(
+                TimetableSource(url=link, start_path=self.TIMETABLE_START_PATH[ind])
+            )
+        return sources
+
+    def __run_source_update(
+        self, source: TimetableSource, ind: int, full_verify: bool
+    ) -> set | None:
+        """
+        Обрабатывает один источник расписаний в отдельном потоке
+        :param source: Источник расписаний
+        :param ind: Номер источника в текущем запуске
+        :param full_verify: Нужно скачать и проверить все файлы
+        :return: Идентификаторы найденных ресурсов или None, если обработка завершилась ошибкой
+        """
+        # У каждого источника своя папка для временных файлов
+        temp_dir = Path(TEMP_DIR) / f"source_{source.id or ind + 1}"
+        temp_dir.mkdir(parents=True, exist_ok=True)
+        used_resource_ids = set()
+        try:
+            file_count = self.__update_source(
+                source, full_verify, temp_dir, used_resource_ids
+            )
+        except Exception as e:
+            logger.error(f"Error processing source {source}: {e}", exc_info=True)
+            return None
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            # Соединение с базой данных открывается отдельно в каждом потоке
+            connection.close()
+
+        if file_count == 0:
+            logger.error(f"No files found for source {source}")
+            return None
+        return used_resource_ids
+
+    def __update_source(
+        self,
+        source: TimetableSource,
+        full_verify: bool,
+        temp_dir: Path,
+        used_resource_ids: set,
+    ) -> int:
+        """
+        Находит на сайте файлы источника и обновляет по ним ресурсы и версии файлов
+        :param source: Источник расписаний
+        :param full_verify: Нужно скачать и проверить все файлы
+        :param temp_dir: Папка для временных файлов источника
+        :param used_resource_ids: Множество, в которое добавляются идентификаторы найденных ресурсов
+        :return: Количество найденных файлов
+        """
+        http_client = HttpClient.get_default()
+        skipped_count = 0
+        logger.info(f"Processing timetable source {source}")
+
+        # Файлы обрабатываются по мере их нахождения на сайте.
+        # При полной проверке сайт обходится целиком, без поддеревьев из кэша
+        files = WebParser.iter_files_from_webpage(
+            source.url,
+            source.start_path,
+            max_workers=source.max_workers,
+            reuse_subtrees=not full_verify,
+        )
+        file_count = 0
+
+        # Файлы скачиваются и конвертируются в пуле потоков, а работа с базой данных
+        # выполняется в потоке источника в порядке нахождения файлов на сайте
+        pending = deque()  # Очередь кортежей (файл, задача скачивания)
+        max_pending = self.DOWNLOAD_WORKERS * 2
+        with ThreadPoolExecutor(
+            max_workers=self.DOWNLOAD_WORKERS, thread_name_prefix="timetable-download"
+        ) as executor:
+            try:
+                for file_data in files:
+                    file_count += 1
+                    if http_client.is_deadline_exceeded():
+                        logger.error(
+                            "Update run deadline exceeded, stopping file processing"
+                        )
+                        break
 
-                try:
-                    file_path = file_data.download_file(TEMP_DIR)
-                    logger.debug(f"Downloaded file to: {file_path}")
-                    file_path = self.convert_xls_to_xlsx(file_path)
-                    logger.debug(f"File after conversion: {file_path}")
-                except Exception as e:
-                    logger.error(
-                        f"Error downloading or converting file: {e}", exc_info=True
+                    logger.info(
+                        f"Processing file - Path: {file_data.get_path()}, Name: {file_data.get_name()}"
+                    )
+
+                    # Быстрая проверка: файл не изменился с прошлого запуска
+                    validators = None
+                    if not full_verify:
+                        unchanged_resource = self.find_unchanged_resource(file_data)
+                        if unchanged_resource is not None:
+                            logger.debug(
+                                f"File not changed since last run, skipping download: {file_data.get_url()}"
+                            )
+                            used_resource_ids.add(unchanged_resource.id)
+                            skipped_count += 1
+                            continue
+
+                    # С прошлой версией сравниваются hash сумма байтов скачанного файла
+                    # и, кроме полной проверки, валидаторы сервера для условного запроса
+                    last_version = self.find_last_version(file_data)
+                    if not full_verify:
+                        validators = self.get_download_validators(last_version)
+
+                    pending.append(
+                        (
+                            file_data,
+                            executor.submit(
+                                self.__download_file,
+                                file_data,
+                                temp_dir,
+                                validators,
+                                last_version.byte_hash if last_version else None,
+                            ),
+                            last_version,
+                        )
                     )
-                    continue
 
-                resource = file_data.get_resource("Занятия")
-                file_version = file_data.get_file_version(file_path)
+                    # Обрабатываем готовые файлы, не дожидаясь конца обхода
+                    while pending and (
+                        pending[0][1].done() or len(pending) >= max_pending
+                    ):
+                        if self.__process_download(
+                            *pending.popleft(), source, temp_dir, used_resource_ids
+                        ):
+                            skipped_count += 1
+
+                while pending:
+                    if self.__process_download(
+                        *pending.popleft(), source, temp_dir, used_resource_ids
+                    ):
+                        skipped_count += 1
+            except RunDeadlineExceeded as e:
+                logger.error(f"Error downloading file: {e}")
+            finally:
+                # При прерывании обработки не начинаем скачивание оставшихся файлов
+                for _, future, _ in pending:
+                    future.cancel()
+
+        # Останавливаем обход, если обработка файлов была прервана
+        files.close()
+        logger.info(
+            f"Processed {file_count} files, skipped {skipped_count} unchanged files from source {source}"
+        )
+        return file_count
+
+    def __download_file(
+        self,
+        file_data: FileData,
+        temp_dir: Path,
+        validators: dict | None = None,
+        last_byte_hash: str | None = None,
+    ):
+        """
+        Скачивает и конвертирует файл, рассчитывает его версию. Выполняется в пуле потоков
+        скачивания, поэтому не обращается к базе данных.
+        Если байты файла совпадают с прошлой версией, файл не конвертируется и не разбирается.
+        :param file_data: Данные файла
+        :param temp_dir: Папка для временных файлов источника
+        :param validators: Валидаторы прошлой версии файла для условного запроса (опционально)
+        :param last_byte_hash: Hash сумма байтов прошлой версии файла (опционально)
+        :return: Кортеж (путь к файлу, новая версия файла) или None, если файл не изменился.
+            Если совпали байты файла, путь равен None, а версия содержит только
+            hash сумму байтов и валидаторы сервера
+        """
+        download = file_data.stream_download(
+            temp_dir, timeout=self.DOWNLOAD_TIMEOUT, validators=validators
+        )
+        if download is None:
+            return None
+        downloaded_path, byte_hash, size, response_validators = download
+        logger.debug(f"Downloaded file to: {downloaded_path} ({size} bytes)")
+        if last_byte_hash is not None and byte_hash == last_byte_hash:
+            downloaded_path.unlink()
+            logger.debug(
+                f"File bytes not changed, skipping parsing: {file_data.get_url()}"
+            )
+            return None, FileVersion(byte_hash=byte_hash, **response_validators)
+
+        file_path = downloaded_path
+        try:
+            if file_path.suffix == ".xls" and not (
+                self.READ_XLS_NATIVELY and XlsReader.can_read(file_path)
+            ):
+                file_path = self.convert_xls_to_xlsx(file_path, byte_hash=byte_hash)
+                logger.debug(f"File after conversion: {file_path}")
+                if file_path.suffix == ".xls":
+                    raise XlsConversionError(f"File was not converted: {file_path}")
+            # Hash сумма хранится для скачанных байтов, в том числе для конвертированных XLS
+            return file_path, file_data.get_file_version(
+                file_path, byte_hash=byte_hash, validators=response_validators
+            )
+        except BaseException:
+            file_path.unlink(missing_ok=True)
+            raise
+
+    def __process_download(
+        self,
+        file_data: FileData,
+        future,
+        last_version: FileVersion | None,
+        source: TimetableSource,
+        temp_dir: Path,
+        used_resource_ids: set,
+    ) -> bool:
+        """
+        Дожидается скачивания файла и обновляет по нему ресурс и версии файла.
+        Ошибка скачивания одного файла не прерывает обработку остальных,
+        кроме превышения времени запуска (RunDeadlineExceeded)
+        :param file_data: Данные файла
+        :param future: Задача скачивания файла (__download_file)
+        :param last_version: Прошлая версия файла, скачанная по той же ссылке
+        :param source: Источник расписаний
+        :param temp_dir: Папка для временных файлов источника
+        :param used_resource_ids: Множество, в которое добавляется идентификатор ресурса
+        :return: True, если файл не изменился с прошлой версии
+        """
+        try:
+            download = future.result()
+        except RunDeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(
+                f"Error downloading or converting file {file_data.get_url()}: {e}",
+                exc_info=True,
+            )
+            return False
+
+        # Сервер подтвердил, что файл не изменился, или совпали байты файла
+        if download is None or download[0] is None:
+            logger.debug(f"File not changed since last version: {file_data.get_url()}")
+            self.update_download_validators(
+                last_version,
+                download[1] if download is not None else None,
+                file_data.get_last_changed_datetime(),
+            )
+            resource = last_version.resource
+            if resource.deprecated:
+                resource.deprecated = False
+                resource.save()
+            used_resource_ids.add(resource.id)
+            return True
+
+        file_path, file_version = download
 
-                resource_from_db = Resource.objects.filter(
-                    path=resource.path, name=resource.name
+        try:
+            resource = file_data.get_resource(source.timetable_type)
+
+            resource_from_db = Resource.objects.filter(
+                path=resource.path, name=resource.name
+            ).first()
+            if resource_from_db:
+                file_version_from_db = FileVersion.objects.filter(
+                    resource_id=resource_from_db.id
                 ).first()
-                if resource_from_db:
-                    file_version_from_db = FileVersion.objects.filter(
-                        resource_id=resource_from_db.id
-                    ).first()
-
-                if (resource_from_db is None) or (
-                    resource_from_db is not None
-                    and file_version.url != file_version_from_db.url
+
+            if (resource_from_db is None) or (
+                resource_from_db is not None
+                and file_version.url != file_version_from_db.url
+            ):
+                logger.info(f"New resource found or URL changed: {resource.name}")
+                resource.save()
+                file_version.resource = resource
+                file_version.save()
+                self.save_file_to_storages(file_path, resource, file_version)
+            else:
+                logger.debug(f"Resource already exists: {resource.name}")
+                tags = [
+                    Tag.objects.get_or_create(name=tag.name, category=tag.category)[0]
+                    for tag in resource.get_not_saved_tags()
+                ]
+                resource_from_db.tags.set(tags)
+                resource = resource_from_db
+                resource.deprecated = False
+                resource.save()
+
+                file_version_from_db = (
+                    FileVersion.objects.filter(resource=resource)
+                    .order_by("-last_changed", "-timestamp")
+                    .first()
+                )
+
+                if file_version_from_db is None or self.need_upload_new_file_version(
+                    file_version, file_version_from_db
                 ):
-                    logger.info(f"New resource found or URL changed: {resource.name}")
-                    resource.save()
+                    logger.info(f"Creating new file version for: {resource.name}")
                     file_version.resource = resource
                     file_version.save()
                     self.save_file_to_storages(file_path, resource, file_version)
+                    self.on_file_version_changed(file_version, temp_dir)
                 else:
-                    logger.debug(f"Resource already exists: {resource.name}")
-                    tags = [
-                        Tag.objects.get_or_create(name=tag.name, category=tag.category)[
-                            0
-                        ]
-                        for tag in resource.get_not_saved_tags()
-                    ]
-                    resource_from_db.tags.set(tags)
-                    resource = resource_from_db
-                    resource.deprecated = False
-                    resource.save()
-
-                    file_version_from_db = (
-                        FileVersion.objects.filter(resource=resource)
-                        .order_by("-last_changed", "-timestamp")
-                        .first()
+                    self.update_download_validators(
+                        file_version_from_db,
+                        file_version,
+                        file_data.get_last_changed_datetime(),
                     )
 
-                    if (
-                        file_version_from_db is None
-                        or self.need_upload_new_file_version(
-                            file_version, file_version_from_db
-                        )
-                    ):
-                        logger.info(f"Creating new file version for: {resource.name}")
-                        file_version.resource = resource
-                        file_version.save()
-                        self.save_file_to_storages(file_path, resource, file_version)
-                        self.on_file_version_changed(file_version)
+            used_resource_ids.add(resource.id)
+            return False
+        finally:
+            if file_path.is_file():
+                file_path.unlink()
+                logger.debug(f"Temporary file deleted: {file_path}")
+
+    def __is_full_verify_run(self) -> bool:
+        """
+        Увеличивает счётчик запусков обновления и определяет, нужна ли в этом запуске полная проверка файлов.
+        Периодичность задаётся настройкой full_verify_runs (по умолчанию FULL_VERIFY_EVERY_N_RUNS).
+        :return: Нужно скачать и проверить все файлы
+        """
+        try:
+            every_n_runs = int(Setting.objects.get(key="full_verify_runs").value)
+        except (Setting.DoesNotExist, ValueError):
+            every_n_runs = self.FULL_VERIFY_EVERY_N_RUNS
 
-                used_resource_ids.add(resource.id)
+        counter, _ = Setting.objects.get_or_create(
+            key="update_run_counter",
+            defaults={"value": "0", "description": "Количество запусков обновления"},
+        )
+        try:
+            run_number = int(counter.value) + 1
+        except ValueError:
+            run_number = 1
+        counter.value = str(run_number)
+        counter.save()
 
-                if file_path.is_file():
-                    file_path.unlink()
-                    logger.debug(f"Temporary file deleted: {file_path}")
+        full_verify = every_n_runs <= 1 or run_number % every_n_runs == 0
+        if full_verify:
+            logger.info(f"Run {run_number}: full verification of all files")
+        return full_verify
 
-        if used_resource_ids:
-            deprecated_count = self.make_other_resource_deprecated(used_resource_ids)
-            logger.info(f"Marked {deprecated_count} resources as deprecated")
-        else:
-            logger.warning("No files were processed during timetable update")
+    @staticmethod
+    def find_last_version(file_data: FileData) -> FileVersion | None:
+        """
+        Ищет последнюю версию ресурса файла, скачанную по той же ссылке
+        :param file_data: Файл, найденный на сайте
+        :return: Версия файла или None
+        """
+        last_version = (
+            FileVersion.objects.filter(
+                resource__path=file_data.get_correct_path(),
+                resource__name=file_data.get_name(),
+            )
+            .select_related("resource")
+            .order_by("-last_changed", "-timestamp")
+            .first()
+        )
+        if last_version is None or last_version.url != file_data.get_url():
+            return None
+        return last_version
 
-        logger.info("Timetable update process completed")
+    @staticmethod
+    def get_download_validators(file_version: FileVersion | None) -> dict | None:
+        """
+        Возвращает валидаторы сервера, сохранённые в версии файла
+        :param file_version: Версия файла
+        :return: Словарь валидаторов (см. FileData.get_response_validators) или None,
+            если условный запрос по версии невозможен
+        """
+        if file_version is None or not (
+            file_version.etag or file_version.http_last_modified
+        ):
+            return None
+        return {
+            "etag": file_version.etag,
+            "http_last_modified": file_version.http_last_modified,
+            "content_length": file_version.content_length,
+        }
 
-    def _download_from_storage(self, storage: StorageManager, local_path: Path):
-        import requests
+    @staticmethod
+    def update_download_validators(
+        last_version: FileVersion,
+        new_version: FileVersion | None,
+        last_changed: datetime | None = None,
+    ):
+        """
+        Сохраняет в последней версии файла новые валидаторы сервера и hash сумму байтов,
+        если файл скачан заново, но его содержимое не изменилось.
+        Так же заполняется hash сумма байтов у версий, созданных до её появления.
+        Новое время обновления с сайта сохраняется, чтобы в следующих запусках
+        файл не скачивался повторно (см. find_unchanged_resource)
+        :param last_version: Последняя версия файла в базе данных
+        :param new_version: Несохранённая версия скачанного файла (None - сервер ответил 304)
+        :param last_changed: Время обновления файла, указанное на сайте (опционально)
+        """
+        changed = []
+        if new_version is not None:
+            fields = ["etag", "http_last_modified", "content_length", "byte_hash"]
+            changed = [
+                field
+                for field in fields
+                if getattr(last_version, field) != getattr(new_version, field)
+            ]
+            for field in changed:
+                setattr(last_version, field, getattr(new_version, field))
+        if last_changed is not None:
+            if timezone.is_naive(last_changed):
+                last_changed = timezone.make_aware(last_changed)
+            # Время только увеличивается, чтобы версия осталась последней среди версий ресурса
+            if (
+                last_version.last_changed is None
+                or last_changed > last_version.last_changed
+            ):
+                last_version.last_changed = last_changed
+                changed.append("last_changed")
+        if changed:
+            last_version.save(update_fields=changed)
 
+    @staticmethod
+    def find_unchanged_resource(file_data: FileData) -> Resource | None:
+        """
+        Ищет ресурс, последняя версия которого скачана по той же ссылке
+        и имеет то же время обновления, что указано на сайте.
+        Версия ищется по ссылке и времени, поэтому неизменившиеся файлы не классифицируются.
+        :param file_data: Файл, найденный на сайте
+        :return: Ресурс или None, если файл нужно скачать
+        """
+        last_changed = file_data.get_last_changed_datetime()
+        if last_changed is None:
+            return None
+        if timezone.is_naive(last_changed):
+            last_changed = timezone.make_aware(last_changed)
+
+        # Версии визуализаций имеют те же ссылку и время, что и исходные версии
+        version = (
+            FileVersion.objects.filter(
+                url=file_data.get_url(),
+                last_changed=last_changed,
+                resource__derived_from__isnull=True,
+            )
+            .select_related("resource")
+            .order_by("-timestamp")
+            .first()
+        )
+        if version is None:
+            return None
+
+        resource = version.resource
+        last_version = (
+            FileVersion.objects.filter(resource=resource)
+            .order_by("-last_changed", "-timestamp")
+            .first()
+        )
+        if last_version is None or last_version.id != version.id:
+            return None
+
+        # Ресурс снова найден на сайте
+        if resource.deprecated:
+            resource.deprecated = False
+            resource.save()
+        return resource
+
+    def _download_from_storage(self, storage: StorageManager, local_path: Path):
         logger.debug(
             f"Downloading file from storage {storage.get_storage_type()} to {local_path}"
         )
-        response = requests.get(storage.download_url)
+        response = HttpClient.get_default().get(storage.download_url)
         if response.status_code == 200:
             with open(local_path, "wb") as f:
                 f.write(response.content)
@@ -157,22 +645,31 @@ class FileManager:
             logger.error(error_msg)
             raise Exception(error_msg)
 
-    def on_file_version_changed(self, file_version: FileVersion):
+    def on_file_version_changed(
+        self, file_version: FileVersion, temp_dir: Path | str = TEMP_DIR
+    ):
         logger.info(f"File version changed detected for: {file_version.resource.name}")
-        self.create_visualization(file_version)
+        with self.__storage_lock:
+            self.create_visualization(file_version, temp_dir)
 
     @classmethod
-    def convert_xls_to_xlsx(cls, xls_file_path: Path | str, dell_xls=True):
+    def convert_xls_to_xlsx(
+        cls, xls_file_path: Path | str, dell_xls=True, byte_hash: str | None = None
+    ):
+        """
+        Конвертирует файл .xls в .xlsx в отдельном процессе (см. XlsConverter)
+        :param xls_file_path: Путь к файлу
+        :param dell_xls: Удалить файл .xls после конвертации
+        :param byte_hash: Hash сумма байтов файла .xls для кэша конвертации (опционально)
+        :return: Путь к файлу .xlsx или исходный путь, если файл не .xls или конвертация не удалась
+        """
         xls_path = Path(xls_file_path)
         if xls_path.suffix != ".xls":
             return xls_path
 
         xlsx_path = xls_path.with_suffix(".xlsx")
         try:
-            from xls2xlsx import XLS2XLSX
-
-            converter = XLS2XLSX(str(xls_path))
-            converter.to_xlsx(str(xlsx_path))
+            XlsConverter.get_default().convert(xls_path, xlsx_path, byte_hash)
             if dell_xls:
                 xls_path.unlink()
                 logger.debug(
@@ -189,6 +686,21 @@ class FileManager:
     def need_upload_new_file_version(
         new_version: FileVersion, last_version: FileVersion
     ):
+        # Книга .xls, прочитанная без конвертации, и её конвертированная копия имеют
+        # разные hash суммы значений (см. READ_XLS_NATIVELY), поэтому версии,
+        # прочитанные по-разному, сравниваются по hash сумме скачанных байтов
+        if (
+            new_version.mimetype != last_version.mimetype
+            and new_version.byte_hash
+            and last_version.byte_hash
+        ):
+            need_update = new_version.byte_hash != last_version.byte_hash
+            if need_update:
+                logger.debug(
+                    f"File version update needed - file bytes changed: {last_version.byte_hash} -> {new_version.byte_hash}"
+                )
+            return need_update
+
         need_update = new_version.hashsum != last_version.hashsum
         if need_update:
             logger.debug(
@@ -203,9 +715,10 @@ class FileManager:
         logger.info(
             f"Saving file {file_path.name} to {len(self.__storages)} storage(s)"
         )
-        for storage in self.__storages:
-            logger.info(f"Uploading file to storage: {storage.get_storage_type()}")
-            storage.add_new_file_version(file_path, resource, file_version)
+        with self.__storage_lock:
+            for storage in self.__storages:
+                logger.info(f"Uploading file to storage: {storage.get_storage_type()}")
+                storage.add_new_file_version(file_path, resource, file_version)
 
     def make_other_resource_deprecated(self, used_resource_ids):
         resources = Resource.objects.exclude(id__in=used_resource_ids).filter(
@@ -218,7 +731,9 @@ class FileManager:
             count += 1
         return count
 
-    def create_visualization(self, f_version: FileVersion):
+    def create_visualization(
+        self, f_version: FileVersion, temp_dir: Path | str = TEMP_DIR
+    ):
         logger.info(f"Creating visualization for resource: {f_version.resource.name}")
         resource = f_version.resource
 
@@ -242,14 +757,43 @@ class FileManager:
 
         logger.info(f"Found {len(file_versions)} file versions for comparison")
 
+        # Папка источника общая с параллельными скачиваниями, поэтому копии
+        # версий из хранилищ скачиваются в отдельную папку, удаляемую после сравнения
+        Path(temp_dir).mkdir(parents=True, exist_ok=True)
+        vis_temp_dir = Path(tempfile.mkdtemp(prefix="visualization_", dir=temp_dir))
+        try:
+            self.__create_visualization(
+                f_version, file_versions, vis_path, vis_temp_dir
+            )
+        finally:
+            shutil.rmtree(vis_temp_dir, ignore_errors=True)
+            logger.debug(f"Removed temporary visualization folder: {vis_temp_dir}")
+
+    def __create_visualization(
+        self,
+        f_version: FileVersion,
+        file_versions,
+        vis_path: Path,
+        vis_temp_dir: Path,
+    ):
+        """
+        Сравнивает версии файла и сохраняет визуализацию изменений
+        :param f_version: Новая версия файла
+        :param file_versions: Версии файла, сохранённые в хранилищах (от новой к старой)
+        :param vis_path: Путь к файлу визуализации
+        :param vis_temp_dir: Папка для скачанных копий версий
+        """
+        resource = f_version.resource
         versions_to_compare = []
         for version in file_versions:
             storage = StorageManager.get_google_storage_by_file_version(version)
             if storage:
-                local_path = TEMP_DIR / Path(storage.path).name
+                local_path = vis_temp_dir / Path(storage.path).name
                 if not local_path.exists():
                     self._download_from_storage(storage, local_path)
-                versions_to_compare.append((str(local_path), version.last_changed))
+                versions_to_compare.append(
+                    (str(local_path), version.last_changed, version.sheet_hashes)
+                )
 
         if len(versions_to_compare) < 2:
             logger.warning(
@@ -257,9 +801,24 @@ class FileManager:
             )
             return
 
+        # Версии сравниваются в исходном формате, чтобы отличия конвертации
+        # не считались изменениями. Изменения подсвечиваются в копии последней версии .xlsx
+        highlight_path = None
+        last_path = Path(versions_to_compare[0][0])
+        if last_path.suffix == ".xls":
+            highlight_path = self.convert_xls_to_xlsx(last_path, dell_xls=False)
+            if highlight_path.suffix == ".xls":
+                logger.error(
+                    f"Failed to convert {last_path} for visualization, skipping"
+                )
+                return
+
         logger.info(f"Creating visualization with {len(versions_to_compare)} versions")
         ViewChanges.view_changes(
-            file_versions=versions_to_compare, output_file=vis_path, expiration_days=7
+            file_versions=versions_to_compare,
+            output_file=vis_path,
+            expiration_days=7,
+            highlight_file=highlight_path,
         )
 
         vis_resource = FileData.get_vis_resource(resource)
@@ -272,14 +831,11 @@ class FileManager:
 
         self.save_file_to_storages(vis_path, vis_resource, vis_file_version)
 
-        if TEMP_DIR.exists():
-            cleaned_files = self.clean_temp_directory()
-            logger.debug(f"Cleaned {cleaned_files} temporary files")
-
-    def clean_temp_directory(self):
+    def clean_temp_directory(self, temp_dir: Path | str = TEMP_DIR):
         count = 0
-        if TEMP_DIR.exists():
-            for item in TEMP_DIR.iterdir():
+        temp_dir = Path(temp_dir)
+        if temp_dir.exists():
+            for item in temp_dir.iterdir():
                 try:
                     if item.is_file():
                         item.unlink()
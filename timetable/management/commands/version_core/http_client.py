@@ -0,0 +1,301 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .rate_limiter import AdaptiveRateLimiter
+
+# Создаем логгер для текущего модуля
+logger = logging.getLogger(__name__)
+
+
+class RunDeadlineExceeded(Exception):
+    """
+    Исключение выбрасывается, если время, отведённое на запуск обновления, истекло
+    """
+
+
+class HttpClient:
+    """
+    Общий HTTP клиент для обхода сайта и скачивания файлов.
+    Переиспользует соединения, ограничивает время ожидания ответа,
+    повторяет запросы при ошибках соединения и ответах 5xx,
+    подстраивает частоту запросов к каждому хосту под его нагрузку
+    и следит за общим временем выполнения запуска обновления.
+    """
+
+    # Время ожидания установки соединения (секунды)
+    CONNECT_TIMEOUT = 10
+
+    # Время ожидания данных от сервера (секунды)
+    READ_TIMEOUT = 60
+
+    # Количество повторов запроса при ошибке
+    MAX_RETRIES = 3
+
+    # Коэффициент экспоненциальной задержки между повторами (секунды)
+    BACKOFF_FACTOR = 1
+
+    # Коды ответа, при которых запрос повторяется транспортом
+    RETRY_STATUSES = (500, 502, 504)
+
+    # Коды ответа перегрузки сервера. Такие запросы повторяются через ограничитель запросов,
+    # чтобы он сразу увидел перегрузку, уменьшил частоту запросов и учёл заголовок Retry-After
+    OVERLOAD_STATUSES = AdaptiveRateLimiter.BACKOFF_STATUSES
+
+    # Методы, запросы которых можно повторять
+    RETRY_METHODS = frozenset(["GET", "HEAD"])
+
+    # Максимальное количество открытых соединений к одному хосту
+    POOL_SIZE = 16
+
+    # Время, отведённое на один запуск обновления (секунды)
+    RUN_DEADLINE = 2 * 60 * 60
+
+    # Ограничивать частоту запросов к хостам адаптивным ограничителем
+    USE_RATE_LIMITER = True
+
+    # Общий для всего процесса экземпляр клиента
+    __default = None
+    __default_lock = threading.Lock()
+
+    def __init__(
+        self,
+        connect_timeout: float | None = None,
+        read_timeout: float | None = None,
+        max_retries: int | None = None,
+        backoff_factor: float | None = None,
+        pool_size: int | None = None,
+    ):
+        """
+        Создаёт сессию с пулом соединений и политикой повторов
+        :param connect_timeout: Время ожидания установки соединения (секунды)
+        :param read_timeout: Время ожидания данных от сервера (секунды)
+        :param max_retries: Количество повторов запроса при ошибке
+        :param backoff_factor: Коэффициент экспоненциальной задержки между повторами
+        :param pool_size: Максимальное количество открытых соединений к одному хосту
+        """
+        self.__connect_timeout = connect_timeout or self.CONNECT_TIMEOUT
+        self.__read_timeout = read_timeout or self.READ_TIMEOUT
+        self.__deadline = None  # Момент окончания запуска (time.monotonic)
+        self.__use_rate_limiter = self.USE_RATE_LIMITER
+        self.__rate_limiters = {}  # Хост -> ограничитель запросов
+        self.__rate_limiters_lock = threading.Lock()
+        self.__max_retries = self.MAX_RETRIES if max_retries is None else max_retries
+        self.__backoff_factor = (
+            self.BACKOFF_FACTOR if backoff_factor is None else backoff_factor
+        )
+
+        retry = Retry(
+            total=self.__max_retries,
+            backoff_factor=self.__backoff_factor,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=self.RETRY_METHODS,
+            # Вернуть последний ответ, чтобы вызывающий код сам проверил код ответа
+            raise_on_status=False,
+        )
+        pool_size = pool_size or self.POOL_SIZE
+        self.__adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+
+        self.__session = requests.Session()
+        self.__session.mount("http://", self.__adapter)
+        self.__session.mount("https://", self.__adapter)
+
+    @classmethod
+    def get_default(cls):
+        """
+        Возвращает общий экземпляр клиента
+        :return: HTTP клиент
+        """
+        with cls.__default_lock:
+            if cls.__default is None:
+                cls.__default = cls()
+            return cls.__default
+
+    def wrap_transport(self, wrapper):
+        """
+        Заменяет транспорт клиента обёрткой над текущим транспортом
+        (запись и воспроизведение ответов, искусственная задержка)
+        :param wrapper: Функция, которая получает текущий транспорт и возвращает новый
+        """
+        self.__adapter = wrapper(self.__adapter)
+        self.__session.mount("http://", self.__adapter)
+        self.__session.mount("https://", self.__adapter)
+        logger.debug(f"HTTP transport set to {type(self.__adapter).__name__}")
+
+    def set_rate_limiting(self, enabled: bool):
+        """
+        Включает или выключает адаптивное ограничение частоты запросов
+        :param enabled: Ограничение включено
+        """
+        self.__use_rate_limiter = enabled
+        logger.debug(f"HTTP rate limiting {'enabled' if enabled else 'disabled'}")
+
+    def start_run(self, deadline: float | None = None):
+        """
+        Начинает отсчёт времени запуска обновления
+        :param deadline: Время, отведённое на запуск (секунды), по умолчанию RUN_DEADLINE
+        """
+        deadline = deadline or self.RUN_DEADLINE
+        self.__deadline = time.monotonic() + deadline
+        logger.debug(f"HTTP run deadline set to {deadline} seconds")
+
+    def finish_run(self):
+        """
+        Завершает отсчёт времени запуска обновления и выводит в лог состояние ограничителей запросов
+        """
+        self.__deadline = None
+        with self.__rate_limiters_lock:
+            rate_limiters = list(self.__rate_limiters.items())
+        for host, rate_limiter in rate_limiters:
+            state = rate_limiter.get_state()
+            logger.info(
+                f"Rate limiter {host}: {state['requests']} requests, "
+                f"{state['backoffs']} backoffs, final rate {state['rate']:.1f} req/s, "
+                f"concurrency {state['concurrency']}"
+            )
+
+    def is_deadline_exceeded(self) -> bool:
+        """
+        Проверяет, истекло ли время запуска обновления
+        :return: Время истекло
+        """
+        return self.__deadline is not None and time.monotonic() >= self.__deadline
+
+    def check_deadline(self):
+        """
+        Выбрасывает исключение, если время запуска обновления истекло
+        """
+        if self.is_deadline_exceeded():
+            raise RunDeadlineExceeded("Update run deadline exceeded")
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        Выполняет GET запрос
+        :param url: Ссылка
+        :param kwargs: Параметры requests (headers, stream и другие)
+        :return: Ответ сервера
+        """
+        return self.request("GET", url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        """
+        Выполняет HEAD запрос
+        :param url: Ссылка
+        :param kwargs: Параметры requests
+        :return: Ответ сервера
+        """
+        return self.request("HEAD", url, **kwargs)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Выполняет запрос с ограничением времени ожидания.
+        Для чтения тела ответа по частям используется stream
+        :param method: HTTP метод
+        :param url: Ссылка
+        :param kwargs: Параметры requests
+        :return: Ответ сервера
+        """
+        with self.__send(method, url, **kwargs) as response:
+            return response
+
+    @contextmanager
+    def stream(self, url: str, method: str = "GET", **kwargs):
+        """
+        Выполняет запрос, тело ответа которого читается по частям.
+        Место в окне одновременных запросов к хосту занято, пока тело ответа читается,
+        поэтому скачивание больших файлов учитывается ограничителем запросов.
+        Ответ закрывается при выходе из контекста
+        :param url: Ссылка
+        :param method: HTTP метод
+        :param kwargs: Параметры requests
+        :return: Контекст, возвращающий ответ сервера
+        """
+        with self.__send(method, url, stream=True, **kwargs) as response:
+            with response:
+                yield response
+
+    @contextmanager
+    def __send(self, method: str, url: str, **kwargs):
+        """
+        Выполняет запрос, повторяя его при перегрузке сервера (OVERLOAD_STATUSES).
+        Место в окне ограничителя запросов занято до выхода из контекста
+        :param method: HTTP метод
+        :param url: Ссылка
+        :param kwargs: Параметры requests
+        :return: Контекст, возвращающий ответ сервера
+        """
+        timeout = kwargs.pop("timeout", None)
+        attempt = 0
+        while True:
+            self.check_deadline()
+            rate_limiter = (
+                self.__get_rate_limiter(url) if self.__use_rate_limiter else None
+            )
+            with rate_limiter.request() if rate_limiter else nullcontext():
+                # Ожидание ограничителя могло занять время запуска
+                self.check_deadline()
+                try:
+                    response = self.__session.request(
+                        method, url, timeout=timeout or self.__get_timeout(), **kwargs
+                    )
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    if rate_limiter is not None:
+                        rate_limiter.on_error(e)
+                    raise
+                if rate_limiter is not None:
+                    rate_limiter.on_response(
+                        response.status_code,
+                        response.elapsed.total_seconds(),
+                        response.headers.get("Retry-After"),
+                    )
+
+                if (
+                    response.status_code not in self.OVERLOAD_STATUSES
+                    or method.upper() not in self.RETRY_METHODS
+                    or attempt >= self.__max_retries
+                ):
+                    yield response
+                    return
+                response.close()
+
+            # Повтор после экспоненциальной задержки, место в окне на это время освобождено
+            attempt += 1
+            delay = self.__backoff_factor * 2 ** (attempt - 1)
+            logger.debug(
+                f"Server overloaded (HTTP {response.status_code}), "
+                f"retry {attempt} of {self.__max_retries} in {delay}s: {url}"
+            )
+            time.sleep(delay)
+
+    def __get_rate_limiter(self, url: str) -> AdaptiveRateLimiter:
+        """
+        Возвращает ограничитель запросов для хоста ссылки
+        :param url: Ссылка
+        :return: Ограничитель запросов
+        """
+        host = urlsplit(url).netloc.lower()
+        with self.__rate_limiters_lock:
+            if host not in self.__rate_limiters:
+                self.__rate_limiters[host] = AdaptiveRateLimiter(host)
+            return self.__rate_limiters[host]
+
+    def __get_timeout(self) -> tuple[float, float]:
+        """
+        Рассчитывает время ожидания запроса с учётом оставшегося времени запуска
+        :return: Кортеж (время установки соединения, время ожидания данных)
+        """
+        connect_timeout = self.__connect_timeout
+        read_timeout = self.__read_timeout
+        if self.__deadline is not None:
+            remaining = max(self.__deadline - time.monotonic(), 0.1)
+            connect_timeout = min(connect_timeout, remaining)
+            read_timeout = min(read_timeout, remaining)
+        return connect_timeout, read_timeout
@@ -0,0 +1,451 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Создаем логгер для текущего модуля
+logger = logging.getLogger(__name__)
+
+
+class HttpArchive:
+    """
+    Архив HTTP ответов на диске для записи и воспроизведения запусков обновления без сети.
+    Хранит индекс (метод и ссылка) -> (код ответа, заголовки, файл тела)
+    и тела ответов, названные по их hash сумме.
+    """
+
+    # Имя файла индекса архива
+    INDEX_FILE_NAME = "index.json"
+
+    # Имя папки с телами ответов
+    BODIES_DIR_NAME = "bodies"
+
+    def __init__(self, directory: Path | str):
+        """
+        Открывает архив, загружая индекс, если он существует
+        :param directory: Папка архива
+        """
+        self.__directory = Path(directory)
+        self.__lock = threading.Lock()
+        self.__entries = self.__load()
+
+    def get(self, method: str, url: str) -> dict | None:
+        """
+        Возвращает записанный ответ
+        :param method: HTTP метод
+        :param url: Ссылка
+        :return: Запись ответа или None
+        """
+        with self.__lock:
+            return self.__entries.get(self.__get_key(method, url))
+
+    def get_body(self, entry: dict) -> bytes:
+        """
+        Читает тело записанного ответа
+        :param entry: Запись ответа
+        :return: Тело ответа
+        """
+        return (self.__directory / self.BODIES_DIR_NAME / entry["body"]).read_bytes()
+
+    def put(
+        self,
+        method: str,
+        url: str,
+        status_code: int,
+        reason: str,
+        headers: dict,
+        body: bytes,
+    ):
+        """
+        Записывает ответ в архив
+        :param method: HTTP метод
+        :param url: Ссылка
+        :param status_code: Код ответа
+        :param reason: Текст кода ответа
+        :param headers: Заголовки ответа
+        :param body: Тело ответа
+        """
+        body_name = hashlib.sha256(body).hexdigest()
+        body_path = self.__get_bodies_dir() / body_name
+        if not body_path.exists():
+            body_path.write_bytes(body)
+        self.__put_entry(method, url, status_code, reason, headers, body_name)
+
+    def create_body_file(self):
+        """
+        Создаёт временный файл для тела ответа, которое записывается по мере чтения
+        :return: Открытый на запись файл (см. put_body_file)
+        """
+        return tempfile.NamedTemporaryFile(
+            dir=self.__get_bodies_dir(), suffix=".tmp", delete=False
+        )
+
+    def put_body_file(
+        self,
+        method: str,
+        url: str,
+        status_code: int,
+        reason: str,
+        headers: dict,
+        body_file_path: Path | str,
+        body_hash: str,
+    ):
+        """
+        Записывает в архив ответ, тело которого уже сохранено во временный файл
+        :param method: HTTP метод
+        :param url: Ссылка
+        :param status_code: Код ответа
+        :param reason: Текст кода ответа
+        :param headers: Заголовки ответа
+        :param body_file_path: Временный файл тела ответа (см. create_body_file)
+        :param body_hash: Hash сумма SHA-256 тела ответа
+        """
+        body_path = self.__get_bodies_dir() / body_hash
+        if body_path.exists():
+            Path(body_file_path).unlink()
+        else:
+            os.replace(body_file_path, body_path)
+        self.__put_entry(method, url, status_code, reason, headers, body_hash)
+
+    def __put_entry(
+        self,
+        method: str,
+        url: str,
+        status_code: int,
+        reason: str,
+        headers: dict,
+        body_name: str,
+    ):
+        """
+        Добавляет запись ответа в индекс архива
+        :param method: HTTP метод
+        :param url: Ссылка
+        :param status_code: Код ответа
+        :param reason: Текст кода ответа
+        :param headers: Заголовки ответа
+        :param body_name: Имя файла тела ответа
+        """
+        with self.__lock:
+            self.__entries[self.__get_key(method, url)] = {
+                "status_code": status_code,
+                "reason": reason,
+                "headers": headers,
+                "body": body_name,
+            }
+        logger.debug(f"Recorded response {status_code} for {method} {url}")
+
+    def save(self):
+        """
+        Сохраняет индекс архива
+        """
+        with self.__lock:
+            data = json.dumps(self.__entries, ensure_ascii=False, indent=1)
+        self.__directory.mkdir(parents=True, exist_ok=True)
+        index_path = self.__directory / self.INDEX_FILE_NAME
+        tmp_path = index_path.with_suffix(index_path.suffix + ".tmp")
+        tmp_path.write_text(data, encoding="utf-8")
+        os.replace(tmp_path, index_path)
+        logger.info(
+            f"HTTP archive saved: {len(self.__entries)} responses in {self.__directory}"
+        )
+
+    def __get_bodies_dir(self) -> Path:
+        """
+        Возвращает папку с телами ответов, создавая её при необходимости
+        :return: Путь к папке
+        """
+        bodies_dir = self.__directory / self.BODIES_DIR_NAME
+        bodies_dir.mkdir(parents=True, exist_ok=True)
+        return bodies_dir
+
+    @staticmethod
+    def __get_key(method: str, url: str) -> str:
+        """
+        Формирует ключ записи
+        :param method: HTTP метод
+        :param url: Ссылка
+        :return: Ключ записи
+        """
+        return f"{method.upper()} {url}"
+
+    def __load(self) -> dict:
+        """
+        Загружает индекс архива
+        :return: Словарь (ключ) -> (запись ответа)
+        """
+        index_path = self.__directory / self.INDEX_FILE_NAME
+        if not index_path.is_file():
+            return {}
+        entries = json.loads(index_path.read_text(encoding="utf-8"))
+        logger.info(f"HTTP archive loaded: {len(entries)} responses from {index_path}")
+        return entries
+
+
+class _RecordingStream:
+    """
+    Тело ответа, которое записывается в архив по мере чтения.
+    Ответ попадает в архив, когда тело прочитано до конца. Если ответ закрыт раньше,
+    остаток тела дочитывается, чтобы архив содержал полный ответ
+    """
+
+    def __init__(self, raw, archive: HttpArchive, record: dict):
+        """
+        :param raw: Исходное тело ответа (urllib3)
+        :param archive: Архив для записи ответа
+        :param record: Параметры записи ответа (method, url, status_code, reason, headers)
+        """
+        self.__raw = raw
+        self.__archive = archive
+        self.__record = record
+        self.__file = archive.create_body_file()
+        self.__hash = hashlib.sha256()
+        self.__size = 0
+
+    def stream(self, amt: int | None = 2**16, decode_content: bool | None = None):
+        """
+        Читает тело ответа частями, записывая их в архив
+        :param amt: Размер части
+        :param decode_content: Раскодировать сжатое тело ответа
+        :return: Генератор частей тела ответа
+        """
+        for chunk in self.__raw.stream(amt, decode_content=decode_content):
+            self.__write(chunk)
+            yield chunk
+        self.__finish()
+
+    def read(self, amt: int | None = None, **kwargs) -> bytes:
+        """
+        Читает часть тела ответа, записывая её в архив
+        :param amt: Размер части (None - всё тело)
+        :return: Часть тела ответа
+        """
+        chunk = self.__raw.read(amt, **kwargs)
+        if chunk:
+            self.__write(chunk)
+        if not chunk or amt is None:
+            self.__finish()
+        return chunk
+
+    def close(self):
+        """
+        Дочитывает непрочитанное тело ответа в архив и закрывает исходный ответ
+        """
+        try:
+            if not self.__file.closed:
+                for _ in self.stream(decode_content=True):
+                    pass
+        finally:
+            self.__discard()
+            self.__raw.close()
+
+    def release_conn(self):
+        self.__raw.release_conn()
+
+    def __write(self, chunk: bytes):
+        """
+        Добавляет часть тела ответа во временный файл и hash сумму
+        :param chunk: Часть тела ответа
+        """
+        self.__file.write(chunk)
+        self.__hash.update(chunk)
+        self.__size += len(chunk)
+
+    def __finish(self):
+        """
+        Записывает полностью прочитанный ответ в архив
+        """
+        if self.__file.closed:
+            return
+        self.__file.close()
+        headers = dict(self.__record["headers"])
+        headers["Content-Length"] = str(self.__size)
+        self.__archive.put_body_file(
+            self.__record["method"],
+            self.__record["url"],
+            self.__record["status_code"],
+            self.__record["reason"],
+            headers,
+            self.__file.name,
+            self.__hash.hexdigest(),
+        )
+
+    def __discard(self):
+        """
+        Удаляет временный файл ответа, который не удалось прочитать до конца
+        """
+        if not self.__file.closed:
+            self.__file.close()
+            Path(self.__file.name).unlink(missing_ok=True)
+
+
+class RecordingAdapter(BaseAdapter):
+    """
+    Транспорт, который выполняет запросы через другой транспорт и записывает ответы в архив.
+    Тело ответа записывается по мере чтения, поэтому потоковое скачивание файлов
+    не буферизуется в памяти
+    """
+
+    # Заголовки условного запроса: при записи всегда нужен полный ответ
+    CONDITIONAL_HEADERS = ("If-None-Match", "If-Modified-Since")
+
+    # Заголовки, которые теряют смысл после чтения тела ответа
+    TRANSPORT_HEADERS = ("Content-Encoding", "Transfer-Encoding", "Connection")
+
+    def __init__(self, adapter: BaseAdapter, archive: HttpArchive):
+        """
+        :param adapter: Транспорт, выполняющий запросы
+        :param archive: Архив для записи ответов
+        """
+        super().__init__()
+        self.__adapter = adapter
+        self.__archive = archive
+
+    def send(self, request, **kwargs):
+        """
+        Выполняет запрос и записывает ответ
+        :param request: Подготовленный запрос
+        :param kwargs: Параметры отправки запроса
+        :return: Ответ сервера
+        """
+        request = request.copy()
+        for header in self.CONDITIONAL_HEADERS:
+            request.headers.pop(header, None)
+
+        response = self.__adapter.send(request, **kwargs)
+
+        headers = {
+            name: value
+            for name, value in response.headers.items()
+            if name not in self.TRANSPORT_HEADERS
+        }
+        response.raw = _RecordingStream(
+            response.raw,
+            self.__archive,
+            {
+                "method": request.method,
+                "url": request.url,
+                "status_code": response.status_code,
+                "reason": response.reason,
+                "headers": headers,
+            },
+        )
+        return response
+
+    def close(self):
+        self.__adapter.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Транспорт, который отвечает на запросы из архива без обращения к сети.
+    Поддерживает условные запросы по записанным ETag и Last-Modified.
+    """
+
+    def __init__(self, archive: HttpArchive):
+        """
+        :param archive: Архив с записанными ответами
+        """
+        super().__init__()
+        self.__archive = archive
+
+    def send(self, request, **kwargs):
+        """
+        Возвращает записанный ответ на запрос
+        :param request: Подготовленный запрос
+        :param kwargs: Параметры отправки запроса
+        :return: Записанный ответ
+        """
+        entry = self.__archive.get(request.method, request.url)
+        # Для HEAD запроса подходят заголовки записанного GET запроса
+        if entry is None and request.method == "HEAD":
+            entry = self.__archive.get("GET", request.url)
+        if entry is None:
+            raise requests.ConnectionError(
+                f"No recorded response for {request.method} {request.url}",
+                request=request,
+            )
+
+        headers = CaseInsensitiveDict(entry["headers"])
+        status_code = entry["status_code"]
+        reason = entry["reason"]
+        if request.method == "HEAD":
+            body = b""
+        else:
+            body = self.__archive.get_body(entry)
+
+        # Страница не изменилась с момента записи
+        if status_code == 200 and self.__is_not_modified(request, headers):
+            status_code, reason, body = 304, "Not Modified", b""
+
+        response = requests.Response()
+        response.status_code = status_code
+        response.reason = reason
+        response.headers = headers
+        response.encoding = get_encoding_from_headers(headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.raw = io.BytesIO(body)
+        response._content = body
+        response._content_consumed = True
+        return response
+
+    @staticmethod
+    def __is_not_modified(request, headers) -> bool:
+        """
+        Проверяет, совпадают ли валидаторы условного запроса с записанными
+        :param request: Подготовленный запрос
+        :param headers: Записанные заголовки ответа
+        :return: Ответ можно заменить на 304
+        """
+        etag = request.headers.get("If-None-Match")
+        if etag is not None:
+            return etag == headers.get("ETag")
+        last_modified = request.headers.get("If-Modified-Since")
+        return last_modified is not None and last_modified == headers.get(
+            "Last-Modified"
+        )
+
+    def close(self):
+        pass
+
+
+class LatencyAdapter(BaseAdapter):
+    """
+    Транспорт, который добавляет искусственную задержку перед каждым запросом
+    """
+
+    def __init__(self, adapter: BaseAdapter, latency: float, jitter: float = 0):
+        """
+        :param adapter: Транспорт, выполняющий запросы
+        :param latency: Задержка перед запросом (секунды)
+        :param jitter: Максимальная случайная добавка к задержке (секунды)
+        """
+        super().__init__()
+        self.__adapter = adapter
+        self.__latency = latency
+        self.__jitter = jitter
+
+    def send(self, request, **kwargs):
+        """
+        Выполняет запрос после задержки
+        :param request: Подготовленный запрос
+        :param kwargs: Параметры отправки запроса
+        :return: Ответ сервера
+        """
+        time.sleep(self.__latency + random.uniform(0, self.__jitter))
+        return self.__adapter.send(request, **kwargs)
+
+    def close(self):
+        self.__adapter.close()
@@ -0,0 +1,199 @@
+from array import array
+from collections import Counter
+
+from .lru_cache import LRUCache
+
+
+class KeywordIndex:
+    """
+    Предварительно скомпилированный список строк для сравнения.
+    Для каждой строки хранит количество каждого символа (индекс по символам) и длину.
+    Степень похожести совпадает с difflib.SequenceMatcher.quick_ratio():
+    2 * M / T, где M - количество общих символов с учётом повторов, T - суммарная длина строк.
+    """
+
+    # Максимальное количество скомпилированных списков в процессе
+    MAX_COMPILED_LISTS = 256
+
+    # Скомпилированные списки: кортеж строк -> индекс
+    __compiled = LRUCache(MAX_COMPILED_LISTS)
+
+    def __init__(self, keywords: list[str]):
+        """
+        Компилирует список строк
+        :param keywords: Список строк для сравнения
+        """
+        self.__keywords = list(keywords)
+        self.__keyword_counts = [Counter(keyword) for keyword in self.__keywords]
+        self.__keyword_lengths = [len(keyword) for keyword in self.__keywords]
+
+    @classmethod
+    def get(cls, keywords: list[str]):
+        """
+        Возвращает скомпилированный список строк. Каждый список компилируется один раз за процесс.
+        :param keywords: Список строк для сравнения
+        :return: Скомпилированный список
+        """
+        key = tuple(keywords)
+        return cls.__compiled.get_or_compute(key, lambda: cls(key))
+
+    def get_keywords(self) -> list[str]:
+        """
+        :return: Список строк для сравнения
+        """
+        return self.__keywords
+
+    def get_best_match(
+        self, string: str, threshold: float | None = None
+    ) -> tuple[float, int]:
+        """
+        Ищет строку из списка с максимальной степенью похожести.
+        Строки, у которых верхняя граница похожести по длине не больше уже найденной,
+        не сравниваются. При равной похожести выбирается строка, которая раньше в списке.
+        Если задан порог, строки с границей ниже порога не сравниваются, а поиск завершается
+        на первой строке, похожесть которой не меньше порога. Тогда результат точен
+        только в части "достигнут порог или нет".
+        :param string: Строка для анализа
+        :param threshold: Порог похожести (опционально)
+        :return: Кортеж (степень похожести, индекс строки в списке) или (-1, -1),
+        если подходящих строк нет
+        """
+        length = len(string)
+        counts = None
+        best_ratio = -1.0
+        best_index = -1
+
+        for index, keyword_length in enumerate(self.__keyword_lengths):
+            total_length = length + keyword_length
+            if total_length == 0:
+                ratio = 1.0
+            else:
+                # Общих символов не больше длины короткой строки
+                bound = 2.0 * min(length, keyword_length) / total_length
+                if bound <= best_ratio or (threshold is not None and bound < threshold):
+                    continue
+                if counts is None:
+                    counts = Counter(string)
+                ratio = 2.0 * self.__count_matches(counts, index) / total_length
+
+            if ratio > best_ratio:
+                best_ratio = ratio
+                best_index = index
+                if threshold is not None and best_ratio >= threshold:
+                    break
+
+        return best_ratio, best_index
+
+    def score_batch(
+        self, string_lists: list[list[str]], threshold: float | None = None
+    ) -> "BatchScores":
+        """
+        Сравнивает со списком строк сразу много списков строк для анализа.
+        Каждая различная строка сравнивается один раз за вызов.
+        :param string_lists: Списки строк для анализа
+        :param threshold: Порог похожести для досрочного завершения поиска (см. get_best_match)
+        :return: Результаты сравнения
+        """
+        scores = BatchScores(self.__keywords)
+        matches = {}  # Строка -> (степень похожести, индекс строки в списке)
+        for strings in string_lists:
+            row = []
+            for string in dict.fromkeys(strings):
+                match = matches.get(string)
+                if match is None:
+                    match = matches[string] = self.get_best_match(string, threshold)
+                row.append((string, match))
+            scores.add_row(row)
+        return scores
+
+    def __count_matches(self, counts: Counter, index: int) -> int:
+        """
+        Считает количество общих символов строки и строки из списка с учётом повторов
+        :param counts: Количество каждого символа в строке
+        :param index: Индекс строки в списке
+        :return: Количество общих символов
+        """
+        keyword_counts = self.__keyword_counts[index]
+        if len(keyword_counts) < len(counts):
+            counts, keyword_counts = keyword_counts, counts
+        matches = 0
+        for char, count in counts.items():
+            keyword_count = keyword_counts.get(char)
+            if keyword_count:
+                matches += count if count < keyword_count else keyword_count
+        return matches
+
+
+class BatchScores:
+    """
+    Результаты пакетного сравнения списков строк со скомпилированным списком.
+    Для каждого списка (строки матрицы) хранятся различные строки в порядке первого появления,
+    их максимальные степени похожести и индексы максимально похожих строк.
+    Значения хранятся в плоских массивах, строки матрицы задаются смещениями.
+    """
+
+    def __init__(self, keywords: list[str]):
+        """
+        :param keywords: Список строк для сравнения
+        """
+        self.__keywords = keywords
+        self.__strings = []  # Строки для анализа всех списков подряд
+        self.__ratios = array("d")  # Степени похожести
+        self.__indexes = array("l")  # Индексы максимально похожих строк (-1 - нет)
+        self.__offsets = array("l", [0])  # Начало каждой строки матрицы
+
+    def add_row(self, row: list[tuple[str, tuple[float, int]]]):
+        """
+        Добавляет строку матрицы
+        :param row: Список кортежей (строка, (степень похожести, индекс строки в списке))
+        """
+        for string, (ratio, index) in row:
+            self.__strings.append(string)
+            self.__ratios.append(max(ratio, 0.0))
+            self.__indexes.append(index)
+        self.__offsets.append(len(self.__strings))
+
+    def get_row_count(self) -> int:
+        """
+        :return: Количество строк матрицы (списков строк для анализа)
+        """
+        return len(self.__offsets) - 1
+
+    def get_strings(self, row: int) -> list[str]:
+        """
+        :param row: Номер строки матрицы
+        :return: Различные строки списка для анализа
+        """
+        return self.__strings[self.__offsets[row] : self.__offsets[row + 1]]
+
+    def get_ratios(self, row: int) -> array:
+        """
+        :param row: Номер строки матрицы
+        :return: Максимальные степени похожести строк списка
+        """
+        return self.__ratios[self.__offsets[row] : self.__offsets[row + 1]]
+
+    def get_similar_strings(self, row: int) -> list[str]:
+        """
+        :param row: Номер строки матрицы
+        :return: Максимально похожие строки для строк списка ("" - если нет)
+        """
+        return [
+            self.__keywords[index] if index >= 0 else ""
+            for index in self.__indexes[self.__offsets[row] : self.__offsets[row + 1]]
+        ]
+
+    def count_in_range(self, row: int, min_ratio: float, max_ratio: float) -> int:
+        """
+        Считает строки списка с коэффициентом похожести на отрезке
+        :param row: Номер строки матрицы
+        :param min_ratio: Минимальное значение коэффициента похожести
+        :param max_ratio: Максимальное значение коэффициента похожести
+        :return: Количество строк
+        """
+        return sum(
+            1
+            for index in range(self.__offsets[row], self.__offsets[row + 1])
+            if self.__indexes[index] >= 0
+            and min_ratio <= self.__ratios[index] <= max_ratio
+        )
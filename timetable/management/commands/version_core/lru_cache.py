@@ -0,0 +1,80 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Потокобезопасный кэш ограниченного размера с вытеснением давно не использованных записей.
+    Считает количество попаданий и промахов.
+    """
+
+    def __init__(self, max_size: int):
+        """
+        :param max_size: Максимальное количество записей
+        """
+        self.__max_size = max_size
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+
+    def get_or_compute(self, key, compute):
+        """
+        Возвращает значение по ключу, вычисляя и запоминая его при отсутствии
+        :param key: Ключ
+        :param compute: Функция без параметров, вычисляющая значение
+        :return: Значение
+        """
+        with self.__lock:
+            if key in self.__entries:
+                self.__hits += 1
+                self.__entries.move_to_end(key)
+                return self.__entries[key]
+            self.__misses += 1
+
+        # Значение вычисляется без блокировки, чтобы не задерживать другие потоки
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        """
+        Запоминает значение (например, при предварительном заполнении кэша)
+        :param key: Ключ
+        :param value: Значение
+        """
+        with self.__lock:
+            self.__entries[key] = value
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__max_size:
+                self.__entries.popitem(last=False)
+
+    def contains(self, key) -> bool:
+        """
+        Проверяет наличие ключа, не меняя счётчики и порядок вытеснения
+        :param key: Ключ
+        :return: Ключ есть в кэше
+        """
+        with self.__lock:
+            return key in self.__entries
+
+    def clear(self):
+        """
+        Очищает кэш и счётчики
+        """
+        with self.__lock:
+            self.__entries.clear()
+            self.__hits = 0
+            self.__misses = 0
+
+    def get_stats(self) -> dict:
+        """
+        Возвращает статистику использования кэша
+        :return: Словарь с количеством попаданий, промахов и записей
+        """
+        with self.__lock:
+            return {
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "size": len(self.__entries),
+            }
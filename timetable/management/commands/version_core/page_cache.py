@@ -0,0 +1,217 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from timetable_project.settings import CACHE_DIR
+
+# Создаем логгер для текущего модуля
+logger = logging.getLogger(__name__)
+
+
+class PageCache:
+    """
+    Постоянный кэш страниц сайта.
+    Для каждой ссылки хранит валидаторы ответа сервера (ETag, Last-Modified),
+    основной контент страницы и извлечённые из него ссылки.
+    Для страниц без валидаторов хранит отпечаток содержимого и файлы,
+    найденные на странице и во всех её дочерних страницах (поддерево).
+    """
+
+    # Имя файла кэша по умолчанию
+    DEFAULT_FILE_NAME = "web_pages.json"
+
+    # Через сколько дней без обращений запись удаляется из кэша
+    MAX_AGE_DAYS = 30
+
+    # Общий для всего процесса экземпляр кэша
+    __default = None
+    __default_lock = threading.Lock()
+
+    def __init__(self, file_path: Path | str):
+        """
+        Загружает кэш из файла, если он существует
+        :param file_path: Путь к файлу кэша
+        """
+        self.__file_path = Path(file_path)
+        self.__lock = threading.Lock()
+        # Кэш сохраняется в конце обхода каждого источника, а источники обходятся параллельно
+        self.__save_lock = threading.Lock()
+        data = self.__load()
+        self.__entries = data.get("pages", {})  # Ссылка -> запись страницы
+        self.__subtrees = data.get("subtrees", {})  # Ссылка -> поддерево страницы
+
+    @classmethod
+    def get_default(cls):
+        """
+        Возвращает общий экземпляр кэша, хранящийся в папке кэша проекта
+        :return: Кэш страниц
+        """
+        with cls.__default_lock:
+            if cls.__default is None:
+                cls.__default = cls(Path(CACHE_DIR) / cls.DEFAULT_FILE_NAME)
+            return cls.__default
+
+    def get(self, url: str) -> dict | None:
+        """
+        Возвращает запись кэша для ссылки
+        :param url: Ссылка на страницу
+        :return: Запись кэша или None
+        """
+        with self.__lock:
+            entry = self.__entries.get(url)
+            if entry is not None:
+                entry["used_at"] = datetime.now().isoformat()
+            return entry
+
+    def get_conditional_headers(self, url: str) -> dict:
+        """
+        Возвращает заголовки условного запроса для ссылки
+        :param url: Ссылка на страницу
+        :return: Словарь заголовков (пустой, если страница не закэширована)
+        """
+        entry = self.get(url)
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(
+        self,
+        url: str,
+        etag: str | None,
+        last_modified: str | None,
+        content: str,
+        links: list,
+    ):
+        """
+        Сохраняет страницу в кэш. Страницы без валидаторов не кэшируются,
+        так как их нельзя проверить условным запросом.
+        :param url: Ссылка на страницу
+        :param etag: Значение заголовка ETag
+        :param last_modified: Значение заголовка Last-Modified
+        :param content: HTML основного контента страницы
+        :param links: Ссылки, извлечённые из контента
+        """
+        with self.__lock:
+            if not etag and not last_modified:
+                self.__entries.pop(url, None)
+                return
+            self.__entries[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "content": content,
+                "links": links,
+                "used_at": datetime.now().isoformat(),
+            }
+
+    def get_subtree(
+        self, url: str, fingerprint: str, max_age_hours: float
+    ) -> tuple[list, datetime] | None:
+        """
+        Возвращает поддерево страницы, если отпечаток её содержимого не изменился
+        :param url: Каноническая ссылка на страницу
+        :param fingerprint: Текущий отпечаток содержимого страницы
+        :param max_age_hours: Максимальное время с момента полной проверки поддерева (часы)
+        :return: Кортеж (список файлов [относительный путь, ссылка, время обновления], время проверки) или None
+        """
+        with self.__lock:
+            subtree = self.__subtrees.get(url)
+            if subtree is None or subtree["fingerprint"] != fingerprint:
+                return None
+            verified_at = datetime.fromisoformat(subtree["verified_at"])
+            if datetime.now() - verified_at > timedelta(hours=max_age_hours):
+                return None
+            subtree["used_at"] = datetime.now().isoformat()
+            return subtree["files"], verified_at
+
+    def put_subtree(
+        self, url: str, fingerprint: str, files: list, verified_at: datetime
+    ):
+        """
+        Сохраняет поддерево страницы
+        :param url: Каноническая ссылка на страницу
+        :param fingerprint: Отпечаток содержимого страницы
+        :param files: Список файлов [относительный путь, ссылка, время обновления] в порядке обхода
+        :param verified_at: Время, когда все страницы поддерева были проверены на сайте
+        """
+        with self.__lock:
+            self.__subtrees[url] = {
+                "fingerprint": fingerprint,
+                "files": files,
+                "verified_at": verified_at.isoformat(),
+                "used_at": datetime.now().isoformat(),
+            }
+
+    def save(self):
+        """
+        Сохраняет кэш в файл, удаляя давно не использованные записи
+        """
+        expiration_date = datetime.now() - timedelta(days=self.MAX_AGE_DAYS)
+        # Сохранения выполняются по очереди, чтобы не писать один временный файл
+        # одновременно и чтобы последним был записан самый новый снимок кэша
+        with self.__save_lock:
+            with self.__lock:
+                self.__entries = self.__remove_expired(self.__entries, expiration_date)
+                self.__subtrees = self.__remove_expired(
+                    self.__subtrees, expiration_date
+                )
+                data = json.dumps(
+                    {"pages": self.__entries, "subtrees": self.__subtrees},
+                    ensure_ascii=False,
+                )
+
+            try:
+                self.__file_path.parent.mkdir(parents=True, exist_ok=True)
+                # Пишем во временный файл и подменяем, чтобы не повредить кэш при сбое.
+                # Имя временного файла уникально для процесса, так как обновление
+                # может быть запущено одновременно несколькими процессами
+                tmp_path = self.__file_path.with_suffix(
+                    f"{self.__file_path.suffix}.{os.getpid()}.tmp"
+                )
+                tmp_path.write_text(data, encoding="utf-8")
+                os.replace(tmp_path, self.__file_path)
+                logger.debug(
+                    f"Page cache saved: {len(self.__entries)} pages, {len(self.__subtrees)} subtrees"
+                )
+            except OSError as e:
+                logger.warning(f"Failed to save page cache {self.__file_path}: {e}")
+
+    @staticmethod
+    def __remove_expired(entries: dict, expiration_date: datetime) -> dict:
+        """
+        Удаляет записи, которые не использовались после заданной даты
+        :param entries: Словарь (ссылка) -> (запись кэша)
+        :param expiration_date: Дата устаревания
+        :return: Словарь без устаревших записей
+        """
+        return {
+            url: entry
+            for url, entry in entries.items()
+            if datetime.fromisoformat(entry["used_at"]) >= expiration_date
+        }
+
+    def __load(self) -> dict:
+        """
+        Загружает записи кэша из файла
+        :return: Словарь с записями страниц ("pages") и поддеревьев ("subtrees")
+        """
+        if not self.__file_path.is_file():
+            return {}
+        try:
+            data = json.loads(self.__file_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load page cache {self.__file_path}: {e}")
+            return {}
+        if not isinstance(data, dict) or "pages" not in data:
+            logger.warning(
+                f"Unknown page cache format, cache reset: {self.__file_path}"
+            )
+            return {}
+        return data
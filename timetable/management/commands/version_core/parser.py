@@ -1,14 +1,28 @@
+import hashlib
+import heapq
+import json
 import logging
+import queue
 import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import quote, unquote, urlsplit, urlunsplit
 
 import requests
 from bs4 import BeautifulSoup
 
 from .file_data import FileData
+from .http_client import HttpClient
+from .page_cache import PageCache
 
 # Создаем логгер для текущего модуля
 logger = logging.getLogger(__name__)
 
+# Маркер окончания обхода в очереди найденных файлов
+_END_OF_CRAWL = object()
+
 
 class WebParser:
     """
@@ -28,122 +42,481 @@ class WebParser:
         link: str = ""  # Ссылка на скачивание файла
         last_update: str = ""  # Время последнего обновления файла
 
+    # Максимальное количество одновременно обрабатываемых страниц
+    MAX_WORKERS = 8
+
+    # Максимальное количество одновременных запросов к одному хосту
+    MAX_WORKERS_PER_HOST = 4
+
+    # Использовать постоянный кэш страниц с условными запросами
+    USE_PAGE_CACHE = True
+
+    # Максимальная глубина вложенности страниц относительно корневой
+    MAX_DEPTH = 10
+
+    # Использовать найденные в прошлый раз файлы неизменившихся страниц без обхода их дочерних страниц
+    REUSE_SUBTREES = True
+
+    # Время, после которого поддерево страницы обходится заново, даже если страница не изменилась (часы)
+    SUBTREE_MAX_AGE_HOURS = 24
+
     @staticmethod
-    def get_files_from_webpage(web_link: str, current_path: str = "") -> list[FileData]:
+    def get_files_from_webpage(
+        web_link: str,
+        current_path: str = "",
+        max_workers: int | None = None,
+        max_workers_per_host: int | None = None,
+        use_page_cache: bool | None = None,
+        reuse_subtrees: bool | None = None,
+    ) -> list[FileData]:
         """
-        Ищет на странице и в её дочерних страницах все файлы
+        Ищет на странице и в её дочерних страницах все файлы.
+        Дочерние страницы обходятся параллельно, порядок и пути файлов
+        совпадают с последовательным обходом в глубину.
+        Каждая страница загружается не более одного раза, повторно найденные файлы пропускаются.
         :param web_link: Ссылка на страницу
         :param current_path: Текущий путь к файлу
+        :param max_workers: Максимальное количество одновременно обрабатываемых страниц
+        :param max_workers_per_host: Максимальное количество одновременных запросов к одному хосту
+        :param use_page_cache: Использовать постоянный кэш страниц (по умолчанию USE_PAGE_CACHE)
+        :param reuse_subtrees: Использовать поддеревья неизменившихся страниц (по умолчанию REUSE_SUBTREES)
         :return: Список всех найденных файлов
         """
         # Контейнер файлов
         files = []
 
-        # Пытаемся получить основной контент страницы
-        try:
-            content = WebParser.__get_page_content(web_link)
-        except Exception as e:
-            logger.error(
-                f"Error in get_files_from_webpage for URL {web_link}: {e}",
-                exc_info=True,
-            )
-            return files
-
-        header3_text = ""  # Заголовок 3 уровня
-        header4_text = ""  # Заголовок 4 уровня
-
-        # Проходим по элементам контента
-        for element in content.descendants:
-            # Проверяем заголовок уровня 3
-            if element.name == "h3":
-                # Запоминаем заголовок 3 уровня
-                header3_text = element.get_text(strip=True)
+        # Файлы передаются в порядке обхода в глубину
+        WebParser.__crawl(
+            web_link,
+            current_path,
+            lambda order_key, file_data: files.append(file_data),
+            max_workers,
+            max_workers_per_host,
+            use_page_cache,
+            reuse_subtrees,
+        )
 
-                # Сбрасываем header4 при нахождении нового header3
-                header4_text = ""
+        # Логируем количество найденных файлов
+        logger.info(f"Found {len(files)} files from webpage: {web_link}")
 
-            # Проверяем заголовок уровня 4
-            elif element.name == "h4":
-                # Запоминаем заголовок 4 уровня
-                header4_text = element.get_text(strip=True)
+        # Возвращаем список всех файлов
+        return files
 
-            # Проверяем список
-            elif element.name == "ul":
-                # Формируем полный путь
-                full_path = WebParser.__add_to_path_some_elements(
-                    current_path, [header3_text, header4_text]
+    @staticmethod
+    def iter_files_from_webpage(
+        web_link: str,
+        current_path: str = "",
+        max_workers: int | None = None,
+        max_workers_per_host: int | None = None,
+        use_page_cache: bool | None = None,
+        reuse_subtrees: bool | None = None,
+    ):
+        """
+        Ищет на странице и в её дочерних страницах все файлы и возвращает их по мере нахождения.
+        Обход выполняется в фоновом потоке, поэтому обработка полученных файлов
+        идёт одновременно с обходом оставшихся страниц.
+        Порядок и пути файлов совпадают с get_files_from_webpage.
+        Если перебор прерван, обход останавливается.
+        :param web_link: Ссылка на страницу
+        :param current_path: Текущий путь к файлу
+        :param max_workers: Максимальное количество одновременно обрабатываемых страниц
+        :param max_workers_per_host: Максимальное количество одновременных запросов к одному хосту
+        :param use_page_cache: Использовать постоянный кэш страниц (по умолчанию USE_PAGE_CACHE)
+        :param reuse_subtrees: Использовать поддеревья неизменившихся страниц (по умолчанию REUSE_SUBTREES)
+        :return: Генератор найденных файлов
+        """
+        files_queue = queue.Queue()  # Очередь найденных файлов
+        stop_event = threading.Event()  # Сигнал остановки обхода
+        crawl_errors = []  # Ошибка фонового обхода
+
+        def crawl():
+            try:
+                WebParser.__crawl(
+                    web_link,
+                    current_path,
+                    lambda order_key, file_data: files_queue.put(file_data),
+                    max_workers,
+                    max_workers_per_host,
+                    use_page_cache,
+                    reuse_subtrees,
+                    stop_event,
                 )
+            except Exception as e:
+                crawl_errors.append(e)
+            finally:
+                files_queue.put(_END_OF_CRAWL)
 
-                # Анализируем все гиперссылки
-                for li in element.find_all("li"):
-                    files += WebParser.__find_files_from_li(li, web_link, full_path)
+        crawl_thread = threading.Thread(
+            target=crawl, name="web-parser-crawl", daemon=True
+        )
+        crawl_thread.start()
 
-        # Логируем количество найденных файлов
-        logger.info(f"Found {len(files)} files from webpage: {web_link}")
+        file_count = 0
+        try:
+            while True:
+                file_data = files_queue.get()
+                if file_data is _END_OF_CRAWL:
+                    break
+                file_count += 1
+                yield file_data
+        finally:
+            # Останавливаем обход, если перебор файлов прерван
+            stop_event.set()
+            crawl_thread.join()
+
+        # Передаём ошибку обхода вызывающему коду
+        if crawl_errors:
+            raise crawl_errors[0]
 
-        # Возвращаем список всех файлов
-        return files
+        # Логируем количество найденных файлов
+        logger.info(f"Found {file_count} files from webpage: {web_link}")
 
     @classmethod
-    def __find_files_from_li(cls, li, web_url, current_path):
+    def __crawl(
+        cls,
+        web_link: str,
+        current_path: str,
+        on_file,
+        max_workers: int | None = None,
+        max_workers_per_host: int | None = None,
+        use_page_cache: bool | None = None,
+        reuse_subtrees: bool | None = None,
+        stop_event: threading.Event | None = None,
+    ):
         """
-        Получает все файлы из элемента <li>
-        :param li: Элемента <li>
-        :param web_url: Ссылка на текущую страницу, на которой размещён этот элемент
-        :param current_path: Текущий путь к файлам
-        :return: Список файлов, найденных по ссылке
+        Обходит страницу и все её дочерние страницы в пуле потоков.
+        Каждому элементу сопоставляется ключ порядка - кортеж индексов элементов
+        на страницах от корня до элемента. Сортировка по ключу даёт порядок обхода в глубину.
+        Файл передаётся в on_file, как только обработаны все страницы с меньшим ключом,
+        поэтому файлы передаются в порядке обхода в глубину, а из повторяющихся файлов
+        остаётся первый в этом порядке.
+        После обхода для каждой полностью обработанной страницы без валидаторов
+        в кэш сохраняется её поддерево, чтобы в следующий раз при неизменном
+        отпечатке страницы не обходить её дочерние страницы.
+        :param web_link: Ссылка на корневую страницу
+        :param current_path: Путь к корневой странице
+        :param on_file: Функция, вызываемая для каждого найденного файла (ключ порядка, файл)
+        :param max_workers: Максимальное количество одновременно обрабатываемых страниц
+        :param max_workers_per_host: Максимальное количество одновременных запросов к одному хосту
+        :param use_page_cache: Использовать постоянный кэш страниц
+        :param reuse_subtrees: Использовать поддеревья неизменившихся страниц
+        :param stop_event: Сигнал остановки обхода: новые страницы не загружаются, файлы не передаются
         """
-        files = []
-        link_tag = li.find("a", href=True)
-        if link_tag:
-            # Получаем имя ссылки
-            link_name = link_tag.text.strip()
-            # Получаем URL ссылки
-            link_url = requests.compat.urljoin(web_url, link_tag["href"])
+        max_workers = max(1, max_workers or cls.MAX_WORKERS)
+        if use_page_cache is None:
+            use_page_cache = cls.USE_PAGE_CACHE
+        if reuse_subtrees is None:
+            reuse_subtrees = cls.REUSE_SUBTREES
+        context = _CrawlContext(
+            _HostConcurrencyLimiter(max_workers_per_host or cls.MAX_WORKERS_PER_HOST),
+            PageCache.get_default() if use_page_cache else None,
+            reuse_subtrees,
+        )
+
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="web-parser"
+        ) as executor:
+            # Страницы в обработке: задача -> (ключ порядка, каноническая ссылка, предки, путь)
+            pending = {}
+
+            def schedule_page(url: str, path: str, key: tuple, ancestors: tuple):
+                """
+                Ставит страницу в очередь обхода
+                :param url: Ссылка на страницу
+                :param path: Путь к странице
+                :param key: Ключ порядка страницы
+                :param ancestors: Канонические ссылки страниц от корня до родительской
+                """
+                if stop_event is not None and stop_event.is_set():
+                    return
+
+                canonical_url = cls.canonicalize_url(url)
+
+                # Защита от циклических ссылок и слишком глубокой вложенности
+                if canonical_url in ancestors:
+                    logger.warning(f"Link cycle detected, skipping page: {url}")
+                    return
+                if len(key) > cls.MAX_DEPTH:
+                    logger.warning(
+                        f"Max crawl depth {cls.MAX_DEPTH} exceeded, skipping page: {url}"
+                    )
+                    return
+
+                node = (key, canonical_url, ancestors + (canonical_url,), path)
+                context.add_pending_page(key)
+
+                # Страница уже загружена: строим элементы из её ссылок
+                if canonical_url in context.pages:
+                    page = context.pages[canonical_url]
+                    future = executor.submit(
+                        cls.__get_page_entries, url, path, context, page
+                    )
+                    pending[future] = node
+                # Страница загружается: дождаться её ссылок
+                elif canonical_url in context.waiting_pages:
+                    context.waiting_pages[canonical_url].append((url, path, node))
+                # Новая страница
+                else:
+                    context.waiting_pages[canonical_url] = []
+                    future = executor.submit(cls.__get_page_entries, url, path, context)
+                    pending[future] = node
+
+            schedule_page(web_link, current_path, (), ())
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page_key, canonical_url, ancestors, page_path = pending.pop(future)
+                    page, entries = future.result()
+                    context.record_page(page_key, canonical_url, page_path, page)
+
+                    # Запоминаем загруженную страницу для повторных обходов
+                    if canonical_url not in context.pages:
+                        context.pages[canonical_url] = page
+                        for url, path, node in context.waiting_pages.pop(
+                            canonical_url, []
+                        ):
+                            future = executor.submit(
+                                cls.__get_page_entries, url, path, context, page
+                            )
+                            pending[future] = node
+
+                    for index, entry in enumerate(entries):
+                        entry_key = page_key + (index,)
+
+                        # Файл откладываем до передачи, дочернюю страницу ставим в очередь
+                        if isinstance(entry, FileData):
+                            context.add_file(entry_key, entry)
+                        else:
+                            link_url, link_path = entry
+                            schedule_page(link_url, link_path, entry_key, ancestors)
+
+                    context.finish_page(page_key)
+
+                # Передаём файлы, порядок которых уже не изменится
+                for order_key, file_data in context.pop_ready_files():
+                    if stop_event is not None and stop_event.is_set():
+                        break
+                    on_file(order_key, file_data)
+
+        # Сохраняем кэш страниц для следующего запуска
+        if context.page_cache is not None:
+            if stop_event is None or not stop_event.is_set():
+                context.store_subtrees()
+            context.page_cache.save()
 
-            # Проверяем, что ссылка ведёт на файл
-            if cls.is_file_with_extension(link_url, [".xls", ".xlsx", ".doc", ".docx"]):
+    @classmethod
+    def __get_page_entries(
+        cls, web_link: str, current_path: str, context, page: dict | None = None
+    ):
+        """
+        Получает элементы одной страницы: файлы и ссылки на дочерние страницы в порядке их следования.
+        Если страница не изменилась с прошлого обхода и её поддерево есть в кэше,
+        элементами становятся все файлы поддерева, а дочерние страницы не обходятся.
+        :param web_link: Ссылка на страницу
+        :param current_path: Текущий путь к файлу
+        :param context: Общие данные обхода
+        :param page: Уже загруженная страница (страница не будет загружаться повторно)
+        :return: Кортеж (страница, список элементов - FileData или кортеж (ссылка, путь) для дочерней страницы)
+        """
+        # Контейнер элементов страницы
+        entries = []
+
+        # Пытаемся загрузить страницу
+        if page is None:
+            try:
+                page = cls.__load_page(web_link, context)
+            except Exception as e:
+                logger.error(
+                    f"Error in get_files_from_webpage for URL {web_link}: {e}",
+                    exc_info=True,
+                )
+                page = {
+                    "links": [],
+                    "fingerprint": None,
+                    "conditional": False,
+                    "subtree": None,
+                }
+                return page, entries
+
+        # Страница не изменилась: берём файлы, найденные в прошлый раз
+        if page["subtree"] is not None:
+            files, _ = page["subtree"]
+            FileData.warm_classification_cache(
+                [current_path + relative_path for relative_path, _, _ in files]
+            )
+            for relative_path, url, last_update in files:
+                entries.append(FileData(current_path + relative_path, url, last_update))
+            logger.info(
+                f"Page not changed, reusing {len(entries)} files found earlier: {web_link}"
+            )
+            return page, entries
+
+        # Эвристики для всех файлов страницы рассчитываются одним пакетом
+        FileData.warm_classification_cache(
+            [
+                cls.__get_link_path(link, current_path)
+                for link in page["links"]
+                if link["is_file"]
+            ]
+        )
+
+        # Превращаем ссылки в файлы и дочерние страницы
+        for link in page["links"]:
+            entries.append(cls.__get_entry_from_link(link, current_path))
+
+        # Логируем содержимое страницы
+        file_count = sum(isinstance(entry, FileData) for entry in entries)
+        logger.info(
+            f"Found {file_count} files and {len(entries) - file_count} child pages on webpage: {web_link}"
+        )
+
+        # Возвращаем страницу и её элементы
+        return page, entries
 
-                # Добавляем новую директорию в путь
-                current_path = cls.__add_to_path(current_path, link_name, True)
+    @classmethod
+    def __load_page(cls, web_link: str, context) -> dict:
+        """
+        Загружает страницу и рассчитывает отпечаток её содержимого
+        :param web_link: Ссылка на страницу
+        :param context: Общие данные обхода
+        :return: Страница - словарь со ссылками ("links"), отпечатком ("fingerprint"),
+        признаком наличия валидаторов ("conditional") и поддеревом из кэша ("subtree"),
+        если его можно использовать
+        """
+        with context.host_limiter.acquire(web_link):
+            links, is_conditional = cls.__get_page_links(web_link, context.page_cache)
+        fingerprint = cls.__get_links_fingerprint(links)
+
+        # Поддерево используется только для страниц, которые нельзя проверить условным запросом
+        subtree = None
+        if context.reuse_subtrees and context.page_cache and not is_conditional:
+            subtree = context.page_cache.get_subtree(
+                cls.canonicalize_url(web_link), fingerprint, cls.SUBTREE_MAX_AGE_HOURS
+            )
 
-                # Извлекаем дату обновления, если она есть
-                last_update = cls.__get_update_time_from_text(li.text)
+        return {
+            "links": links,
+            "fingerprint": fingerprint,
+            "conditional": is_conditional,
+            "subtree": subtree,
+        }
 
-                # Создаем объект файла и добавляем в список
-                file_data = FileData(current_path, link_url, last_update)
+    @classmethod
+    def __get_links_fingerprint(cls, links: list[dict]) -> str:
+        """
+        Рассчитывает отпечаток содержимого страницы по её ссылкам и временам обновления файлов
+        :param links: Ссылки страницы
+        :return: Отпечаток (hash сумма)
+        """
+        normalized_links = [
+            [
+                link["sections"],
+                link["name"],
+                cls.canonicalize_url(link["url"]),
+                link["is_file"],
+                link["last_update"],
+            ]
+            for link in links
+        ]
+        data = json.dumps(normalized_links, ensure_ascii=False)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
 
-                logger.debug(
-                    f"Found file - Path: {current_path}, URL: {link_url}, Last update: {last_update}"
-                )
+    @classmethod
+    def __get_entry_from_link(cls, link: dict, current_path: str):
+        """
+        Создаёт файл или ссылку на дочернюю страницу из ссылки, найденной на странице
+        :param link: Ссылка (словарь с заголовками разделов, именем, адресом и временем обновления)
+        :param current_path: Путь к странице, на которой найдена ссылка
+        :return: FileData или кортеж (ссылка, путь) дочерней страницы
+        """
+        # Формируем полный путь
+        full_path = cls.__get_link_path(link, current_path)
 
-                files.append(file_data)
+        # Проверяем, что ссылка ведёт на файл
+        if link["is_file"]:
+            logger.debug(
+                f"Found file - Path: {full_path}, URL: {link['url']}, Last update: {link['last_update']}"
+            )
 
-            else:
-                # Добавляем новую директорию в путь
-                current_path = cls.__add_to_path(current_path, link_name)
+            # Создаем объект файла
+            return FileData(full_path, link["url"], link["last_update"])
 
-                # Логируем переход по ссылке для отладки
-                logger.debug(f"Following link: {link_name} -> {link_url}")
+        # Логируем переход по ссылке для отладки
+        logger.debug(f"Following link: {link['name']} -> {link['url']}")
 
-                # Добавляем в список все файлы, которые сможем найти на веб странице по этой ссылке
-                files += cls.get_files_from_webpage(link_url, current_path)
+        # Дочерняя страница будет обработана отдельной задачей
+        return link["url"], full_path
 
-        # Вернуть список файлов
-        return files
+    @classmethod
+    def __get_link_path(cls, link: dict, current_path: str) -> str:
+        """
+        Формирует путь файла или дочерней страницы, на которую ведёт ссылка
+        :param link: Ссылка (словарь с заголовками разделов, именем, адресом и временем обновления)
+        :param current_path: Путь к странице, на которой найдена ссылка
+        :return: Путь
+        """
+        full_path = cls.__add_to_path_some_elements(current_path, link["sections"])
+        return cls.__add_to_path(full_path, link["name"], link["is_file"])
 
-    @staticmethod
-    def __get_page_content(url: str):
+    @classmethod
+    def __get_page_links(
+        cls, url: str, page_cache: PageCache | None = None
+    ) -> tuple[list[dict], bool]:
         """
-        Получает основной контент с Web страницы
+        Получает ссылки из основного контента Web страницы.
+        Если страница есть в кэше, выполняется условный запрос, и при ответе 304
+        используются ссылки из кэша без повторного разбора страницы.
         :param url: ссылка Web страницы
-        :return: Основной контент страницы
+        :param page_cache: Кэш страниц
+        :return: Кортеж (список ссылок, страницу можно проверить условным запросом)
         """
+        headers = page_cache.get_conditional_headers(url) if page_cache else {}
+
         # Получение web страницы
-        response = requests.get(url)
+        response = HttpClient.get_default().get(url, headers=headers)
+        if response.status_code == 304:
+            cached_page = page_cache.get(url) if page_cache is not None else None
+            if cached_page is not None:
+                logger.debug(f"Page not modified, using cached content: {url}")
+                return cached_page["links"], True
+            # Записи уже нет в кэше (или ответ 304 пришёл на запрос без валидаторов),
+            # поэтому страница запрашивается заново без условных заголовков
+            logger.debug(f"Page not modified but not cached, requesting again: {url}")
+            response = HttpClient.get_default().get(
+                url, headers={"Cache-Control": "no-cache"}
+            )
         if response.status_code != 200:
             raise Exception(f"Error opening web page. URL: {url}")
 
+        # Получение основного контента и ссылок на странице
+        content = cls.__get_page_content(response, url)
+        links = cls.__get_links_from_content(content, url)
+
+        # Сохраняем страницу в кэш
+        if page_cache is not None:
+            page_cache.put(
+                url,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+                str(content),
+                links,
+            )
+
+        # Вернуть ссылки и признак наличия валидаторов у страницы
+        is_conditional = bool(
+            response.headers.get("ETag") or response.headers.get("Last-Modified")
+        )
+        return links, is_conditional
+
+    @staticmethod
+    def __get_page_content(response, url: str):
+        """
+        Получает основной контент с Web страницы
+        :param response: Ответ сервера с Web страницей
+        :param url: ссылка Web страницы
+        :return: Основной контент страницы
+        """
         # Распарсить HTML страницу сайта
         response.encoding = "utf-8"
         soup = BeautifulSoup(response.text, "html.parser")
@@ -159,6 +532,95 @@ class WebParser:
         # Вернуть основной контент
         return content_wrapper
 
+    @classmethod
+    def __get_links_from_content(cls, content, web_link: str) -> list[dict]:
+        """
+        Извлекает из основного контента страницы все ссылки вместе с заголовками разделов
+        :param content: Основной контент страницы
+        :param web_link: Ссылка на страницу
+        :return: Список ссылок
+        """
+        # Контейнер ссылок
+        links = []
+
+        header3_text = ""  # Заголовок 3 уровня
+        header4_text = ""  # Заголовок 4 уровня
+
+        # Проходим по элементам контента
+        for element in content.descendants:
+            # Проверяем заголовок уровня 3
+            if element.name == "h3":
+                # Запоминаем заголовок 3 уровня
+                header3_text = element.get_text(strip=True)
+
+                # Сбрасываем header4 при нахождении нового header3
+                header4_text = ""
+
+            # Проверяем заголовок уровня 4
+            elif element.name == "h4":
+                # Запоминаем заголовок 4 уровня
+                header4_text = element.get_text(strip=True)
+
+            # Проверяем список (вложенные списки уже обработаны вместе с внешним)
+            elif element.name == "ul" and not cls.__is_nested_list(element, content):
+                # Анализируем все гиперссылки
+                for li in element.find_all("li"):
+                    link = cls.__get_link_from_li(
+                        li, web_link, [header3_text, header4_text]
+                    )
+                    if link is not None:
+                        links.append(link)
+
+        # Вернуть список ссылок
+        return links
+
+    @staticmethod
+    def __is_nested_list(element, content) -> bool:
+        """
+        Проверяет, находится ли список внутри другого списка основного контента
+        :param element: Элемент списка <ul>
+        :param content: Основной контент страницы
+        :return: Список вложен в другой список
+        """
+        for parent in element.parents:
+            if parent is content:
+                return False
+            if parent.name == "ul":
+                return True
+        return False
+
+    @classmethod
+    def __get_link_from_li(cls, li, web_url, sections: list[str]):
+        """
+        Получает ссылку из элемента <li>
+        :param li: Элемента <li>
+        :param web_url: Ссылка на текущую страницу, на которой размещён этот элемент
+        :param sections: Заголовки разделов, в которых находится элемент
+        :return: Ссылка (словарь) или None, если в элементе нет ссылки
+        """
+        link_tag = li.find("a", href=True)
+        if not link_tag:
+            return None
+
+        # Получаем URL ссылки
+        link_url = requests.compat.urljoin(web_url, link_tag["href"])
+
+        # Проверяем, что ссылка ведёт на файл
+        is_file = cls.is_file_with_extension(
+            link_url, [".xls", ".xlsx", ".doc", ".docx"]
+        )
+
+        return {
+            "sections": sections,  # Заголовки разделов
+            "name": link_tag.text.strip(),  # Имя ссылки
+            "url": link_url,  # URL ссылки
+            "is_file": is_file,  # Ссылка ведёт на файл
+            # Дата обновления файла, если она есть
+            "last_update": (
+                cls.__get_update_time_from_text(li.text) if is_file else None
+            ),
+        }
+
     @staticmethod
     def __get_update_time_from_text(text, error_text=__TEXT_NO_LAST_UPDATE_TIME):
         """
@@ -202,6 +664,39 @@ class WebParser:
                 path += "/"
         return path
 
+    @staticmethod
+    def canonicalize_url(url: str) -> str:
+        """
+        Приводит ссылку к каноническому виду для сравнения ссылок между собой:
+        схема и хост в нижнем регистре, без порта по умолчанию, без якоря,
+        с единым процентным кодированием и без завершающего символа '/'
+        :param url: Ссылка
+        :return: Каноническая ссылка
+        """
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+
+        # Хост без порта по умолчанию
+        netloc = (parts.hostname or "").lower()
+        if parts.port is not None and (scheme, parts.port) not in (
+            ("http", 80),
+            ("https", 443),
+        ):
+            netloc += f":{parts.port}"
+
+        # Путь с единым процентным кодированием
+        path = quote(unquote(parts.path), safe="/:@!$&'()*+,;=-._~")
+        path = re.sub(r"/{2,}", "/", path)
+        if len(path) > 1:
+            path = path.rstrip("/")
+        if not path:
+            path = "/"
+
+        # Параметры запроса с единым регистром кодированных символов
+        query = re.sub(r"%[0-9a-fA-F]{2}", lambda m: m.group(0).upper(), parts.query)
+
+        return urlunsplit((scheme, netloc, path, query, ""))
+
     @staticmethod
     def is_file_with_extension(file_path, extensions):
         """
@@ -214,3 +709,175 @@ class WebParser:
             if file_path.endswith(extension):
                 return True
         return False
+
+
+class _CrawlContext:
+    """
+    Общие данные одного обхода сайта
+    """
+
+    def __init__(
+        self, host_limiter, page_cache: PageCache | None, reuse_subtrees: bool
+    ):
+        """
+        :param host_limiter: Ограничитель одновременных запросов к хосту
+        :param page_cache: Кэш страниц или None, если кэш не используется
+        :param reuse_subtrees: Использовать поддеревья неизменившихся страниц
+        """
+        self.host_limiter = host_limiter
+        self.page_cache = page_cache
+        self.reuse_subtrees = reuse_subtrees
+        # Каноническая ссылка загруженной страницы -> страница
+        self.pages = {}
+        # Каноническая ссылка загружаемой страницы -> ожидающие её обходы (ссылка, путь, узел)
+        self.waiting_pages = {}
+
+        self.__pending_keys = []  # Куча ключей порядка необработанных страниц
+        self.__finished_keys = set()  # Ключи обработанных страниц, ещё лежащие в куче
+        self.__files = []  # Куча найденных, но ещё не переданных файлов (ключ, файл)
+        self.__emitted_urls = set()  # Канонические ссылки переданных файлов
+        # Обработанные страницы: ключ порядка -> (каноническая ссылка, путь, страница)
+        self.__page_records = {}
+        self.__found_files = []  # Все найденные файлы (ключ, файл), включая повторы
+
+    def add_pending_page(self, key: tuple):
+        """
+        Регистрирует страницу, поставленную в очередь обхода
+        :param key: Ключ порядка страницы
+        """
+        heapq.heappush(self.__pending_keys, key)
+
+    def finish_page(self, key: tuple):
+        """
+        Отмечает страницу как обработанную
+        :param key: Ключ порядка страницы
+        """
+        self.__finished_keys.add(key)
+
+    def add_file(self, key: tuple, file_data: FileData):
+        """
+        Добавляет найденный файл
+        :param key: Ключ порядка файла
+        :param file_data: Файл
+        """
+        heapq.heappush(self.__files, (key, file_data))
+        self.__found_files.append((key, file_data))
+
+    def record_page(self, key: tuple, canonical_url: str, path: str, page: dict):
+        """
+        Запоминает обработанную страницу для сохранения её поддерева
+        :param key: Ключ порядка страницы
+        :param canonical_url: Каноническая ссылка на страницу
+        :param path: Путь к странице
+        :param page: Страница
+        """
+        self.__page_records[key] = (canonical_url, path, page)
+
+    def store_subtrees(self):
+        """
+        Сохраняет в кэш поддеревья обработанных страниц без валидаторов.
+        Поддерево не сохраняется, если одну из страниц внутри него не удалось загрузить.
+        Время проверки поддерева - самое раннее время проверки использованных внутри него поддеревьев.
+        """
+        now = datetime.now()
+        subtrees = {key: [] for key in self.__page_records}
+        verified_at = {key: now for key in self.__page_records}
+        incomplete_keys = set()
+
+        for key, (_, _, page) in self.__page_records.items():
+            prefixes = [key[:length] for length in range(len(key) + 1)]
+            # Неудачная загрузка делает неполными поддеревья всех предков
+            if page["fingerprint"] is None:
+                incomplete_keys.update(prefixes)
+            # Использованное поддерево было проверено раньше текущего обхода
+            if page["subtree"] is not None:
+                for prefix in prefixes:
+                    if prefix in verified_at:
+                        verified_at[prefix] = min(
+                            verified_at[prefix], page["subtree"][1]
+                        )
+
+        # Распределяем файлы по поддеревьям всех страниц-предков в порядке обхода
+        self.__found_files.sort(key=lambda item: item[0])
+        for key, file_data in self.__found_files:
+            for length in range(len(key)):
+                prefix = key[:length]
+                if prefix not in subtrees:
+                    continue
+                page_path = self.__page_records[prefix][1]
+                if not file_data.get_path().startswith(page_path):
+                    incomplete_keys.add(prefix)
+                    continue
+                subtrees[prefix].append(
+                    [
+                        file_data.get_path()[len(page_path) :],
+                        file_data.get_url(),
+                        file_data.get_last_changed(),
+                    ]
+                )
+
+        for key, files in subtrees.items():
+            canonical_url, _, page = self.__page_records[key]
+            if key in incomplete_keys or page["conditional"]:
+                continue
+            self.page_cache.put_subtree(
+                canonical_url, page["fingerprint"], files, verified_at[key]
+            )
+
+    def pop_ready_files(self) -> list[tuple[tuple, FileData]]:
+        """
+        Возвращает файлы, перед которыми в порядке обхода больше не может появиться новых файлов.
+        Все будущие файлы находятся внутри необработанных страниц, поэтому их ключи
+        больше минимального ключа необработанной страницы.
+        Файлы со ссылками, которые уже были переданы, пропускаются.
+        :return: Список кортежей (ключ порядка, файл) в порядке обхода в глубину
+        """
+        # Убираем из кучи обработанные страницы
+        while self.__pending_keys and self.__pending_keys[0] in self.__finished_keys:
+            self.__finished_keys.discard(heapq.heappop(self.__pending_keys))
+        limit = self.__pending_keys[0] if self.__pending_keys else None
+
+        ready_files = []
+        while self.__files and (limit is None or self.__files[0][0] < limit):
+            key, file_data = heapq.heappop(self.__files)
+
+            # Пропускаем файл, который уже был найден в другом месте сайта
+            canonical_url = WebParser.canonicalize_url(file_data.get_url())
+            if canonical_url in self.__emitted_urls:
+                logger.debug(
+                    f"Duplicate file skipped - Path: {file_data.get_path()}, URL: {file_data.get_url()}"
+                )
+                continue
+            self.__emitted_urls.add(canonical_url)
+
+            ready_files.append((key, file_data))
+        return ready_files
+
+
+class _HostConcurrencyLimiter:
+    """
+    Ограничивает количество одновременных запросов к каждому хосту
+    """
+
+    def __init__(self, max_per_host: int):
+        """
+        :param max_per_host: Максимальное количество одновременных запросов к одному хосту
+        """
+        self.__max_per_host = max(1, max_per_host)
+        self.__semaphores = {}  # Хост -> семафор
+        self.__lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self, url: str):
+        """
+        Занимает слот хоста на время выполнения запроса
+        :param url: Ссылка, по которой выполняется запрос
+        """
+        host = urlsplit(url).netloc.lower()
+        with self.__lock:
+            semaphore = self.__semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.__max_per_host)
+                self.__semaphores[host] = semaphore
+        with semaphore:
+            yield
@@ -0,0 +1,247 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+# Создаем логгер для текущего модуля
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveRateLimiter:
+    """
+    Адаптивный ограничитель запросов к одному хосту.
+    Ограничивает частоту запросов (token bucket) и количество одновременных запросов (окно).
+    Оба ограничения растут, пока сервер отвечает быстро, и уменьшаются вдвое
+    при ответах 429/503, ошибках соединения или росте времени ответа (AIMD).
+    До первого уменьшения рост быстрый (каждый ответ добавляет 1), после - плавный.
+    """
+
+    # Начальная частота запросов (запросов в секунду)
+    INITIAL_RATE = 4.0
+
+    # Минимальная частота запросов (запросов в секунду)
+    MIN_RATE = 0.5
+
+    # Максимальная частота запросов (запросов в секунду)
+    MAX_RATE = 50.0
+
+    # Увеличение частоты запросов за секунду быстрых ответов (запросов в секунду)
+    RATE_INCREASE = 1.0
+
+    # Начальное количество одновременных запросов
+    INITIAL_CONCURRENCY = 2
+
+    # Максимальное количество одновременных запросов
+    MAX_CONCURRENCY = 16
+
+    # Множитель, на который уменьшаются ограничения при перегрузке сервера
+    DECREASE_FACTOR = 0.5
+
+    # Коды ответа, означающие перегрузку сервера
+    BACKOFF_STATUSES = (429, 503)
+
+    # Во сколько раз время ответа должно превысить минимальное, чтобы считаться перегрузкой
+    LATENCY_BACKOFF_RATIO = 3.0
+
+    # Время ответа, ниже которого рост задержки не считается перегрузкой (секунды)
+    LATENCY_FLOOR = 0.5
+
+    # Минимальный промежуток между двумя уменьшениями ограничений (секунды)
+    BACKOFF_COOLDOWN = 2.0
+
+    # Максимальная пауза по заголовку Retry-After (секунды)
+    MAX_RETRY_AFTER = 60.0
+
+    # Коэффициент сглаживания времени ответа
+    LATENCY_SMOOTHING = 0.2
+
+    # Рост минимального времени ответа с каждым ответом (доля)
+    MIN_LATENCY_DRIFT = 0.01
+
+    # Во сколько раз должна вырасти частота запросов, чтобы это попало в лог
+    LOG_RATE_STEP = 1.5
+
+    def __init__(self, name: str):
+        """
+        :param name: Имя ограничителя для логов (обычно хост)
+        """
+        self.__name = name
+        self.__condition = threading.Condition()
+        self.__rate = self.INITIAL_RATE
+        self.__concurrency = float(self.INITIAL_CONCURRENCY)
+        self.__tokens = 1.0
+        self.__refilled_at = time.monotonic()
+        self.__in_flight = 0
+        self.__paused_until = 0.0
+        self.__last_backoff_at = 0.0
+        self.__min_latency = None
+        self.__smoothed_latency = None
+        self.__request_count = 0
+        self.__backoff_count = 0
+        self.__logged_rate = self.__rate
+        self.__slow_start = True  # Быстрый рост до первой перегрузки
+
+    @contextmanager
+    def request(self):
+        """
+        Ожидает разрешения на запрос и занимает место в окне одновременных запросов
+        """
+        self.__acquire()
+        try:
+            yield
+        finally:
+            with self.__condition:
+                self.__in_flight -= 1
+                self.__condition.notify_all()
+
+    def on_response(self, status_code: int, latency: float, retry_after=None):
+        """
+        Учитывает ответ сервера
+        :param status_code: Код ответа
+        :param latency: Время ответа (секунды)
+        :param retry_after: Значение заголовка Retry-After
+        """
+        with self.__condition:
+            self.__request_count += 1
+            if status_code in self.BACKOFF_STATUSES:
+                self.__pause(retry_after)
+                self.__backoff(f"HTTP {status_code}")
+                return
+
+            self.__update_latency(latency)
+            if (
+                self.__smoothed_latency > self.LATENCY_FLOOR
+                and self.__smoothed_latency
+                > self.__min_latency * self.LATENCY_BACKOFF_RATIO
+            ):
+                self.__backoff(
+                    f"response time {self.__smoothed_latency:.2f}s "
+                    f"(min {self.__min_latency:.2f}s)"
+                )
+                return
+
+            if self.__slow_start:
+                # Быстрый рост: частота и окно удваиваются примерно за секунду и за окно ответов
+                rate_increase = self.RATE_INCREASE
+                concurrency_increase = 1
+            else:
+                # Аддитивный рост: примерно RATE_INCREASE в секунду и +1 к окну за окно ответов
+                rate_increase = self.RATE_INCREASE / self.__rate
+                concurrency_increase = 1 / self.__concurrency
+            self.__rate = min(self.__rate + rate_increase, self.MAX_RATE)
+            self.__concurrency = min(
+                self.__concurrency + concurrency_increase, self.MAX_CONCURRENCY
+            )
+            if self.__rate >= self.__logged_rate * self.LOG_RATE_STEP:
+                self.__logged_rate = self.__rate
+                logger.info(
+                    f"Rate limiter {self.__name}: rate increased to {self.__rate:.1f} req/s, "
+                    f"concurrency {int(self.__concurrency)}"
+                )
+            self.__condition.notify_all()
+
+    def on_error(self, error: Exception):
+        """
+        Учитывает ошибку соединения или истечение времени ожидания
+        :param error: Ошибка запроса
+        """
+        with self.__condition:
+            self.__request_count += 1
+            self.__backoff(type(error).__name__)
+
+    def get_state(self) -> dict:
+        """
+        Возвращает текущее состояние ограничителя
+        :return: Словарь с частотой, окном, количеством запросов и уменьшений ограничений
+        """
+        with self.__condition:
+            return {
+                "rate": self.__rate,
+                "concurrency": int(self.__concurrency),
+                "requests": self.__request_count,
+                "backoffs": self.__backoff_count,
+            }
+
+    def __acquire(self):
+        """
+        Ожидает токен и свободное место в окне одновременных запросов
+        """
+        with self.__condition:
+            while True:
+                now = time.monotonic()
+                self.__refill(now)
+                if now < self.__paused_until:
+                    wait = self.__paused_until - now
+                elif self.__in_flight >= int(self.__concurrency):
+                    wait = None  # Ждём завершения одного из запросов
+                elif self.__tokens < 1:
+                    wait = (1 - self.__tokens) / self.__rate
+                else:
+                    self.__tokens -= 1
+                    self.__in_flight += 1
+                    return
+                self.__condition.wait(wait)
+
+    def __refill(self, now: float):
+        """
+        Пополняет запас токенов за прошедшее время
+        :param now: Текущее время (time.monotonic)
+        """
+        burst = max(int(self.__concurrency), 1)
+        self.__tokens = min(
+            self.__tokens + (now - self.__refilled_at) * self.__rate, burst
+        )
+        self.__refilled_at = now
+
+    def __update_latency(self, latency: float):
+        """
+        Обновляет минимальное и сглаженное время ответа
+        :param latency: Время ответа (секунды)
+        """
+        # Минимум медленно растёт, чтобы постоянное замедление сервера со временем стало нормой
+        if self.__min_latency is None:
+            self.__min_latency = latency
+        else:
+            self.__min_latency = min(
+                latency, self.__min_latency * (1 + self.MIN_LATENCY_DRIFT)
+            )
+        if self.__smoothed_latency is None:
+            self.__smoothed_latency = latency
+        else:
+            self.__smoothed_latency += self.LATENCY_SMOOTHING * (
+                latency - self.__smoothed_latency
+            )
+
+    def __pause(self, retry_after):
+        """
+        Приостанавливает запросы на время из заголовка Retry-After
+        :param retry_after: Значение заголовка Retry-After (секунды)
+        """
+        try:
+            delay = min(float(retry_after), self.MAX_RETRY_AFTER)
+        except (TypeError, ValueError):
+            return
+        self.__paused_until = max(self.__paused_until, time.monotonic() + delay)
+        logger.warning(f"Rate limiter {self.__name}: paused for {delay:.1f}s")
+
+    def __backoff(self, reason: str):
+        """
+        Мультипликативно уменьшает частоту и окно запросов
+        :param reason: Причина уменьшения для лога
+        """
+        now = time.monotonic()
+        # Ответы на запросы, отправленные до уменьшения, не уменьшают ограничения повторно
+        if now - self.__last_backoff_at < self.BACKOFF_COOLDOWN:
+            return
+        self.__last_backoff_at = now
+        self.__backoff_count += 1
+        self.__slow_start = False
+        self.__rate = max(self.__rate * self.DECREASE_FACTOR, self.MIN_RATE)
+        self.__concurrency = max(self.__concurrency * self.DECREASE_FACTOR, 1.0)
+        self.__logged_rate = self.__rate
+        # Сглаженное время ответа заново набирается после уменьшения
+        self.__smoothed_latency = None
+        logger.warning(
+            f"Rate limiter {self.__name}: backoff after {reason}, "
+            f"rate {self.__rate:.1f} req/s, concurrency {int(self.__concurrency)}"
+        )
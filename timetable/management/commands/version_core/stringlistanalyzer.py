@@ -1,5 +1,7 @@
 import difflib
 
+from .keyword_index import KeywordIndex
+
 class StringListAnalyzer:
     """
     Класс анализа двух наборов строк.
@@ -35,14 +37,24 @@ class StringListAnalyzer:
         Выполняет сравнение двух списков строк
         :return: Текущий экземпляр класса
         """
+        # Быстрый анализ выполняется по скомпилированному списку строк для сравнения
+        if (self.__quick_analyze):
+            keyword_index = KeywordIndex.get(self.__compare_strings)
+            for analyze_string in self.__analyze_strings:
+                # Повторяющиеся строки дают тот же результат
+                if analyze_string in self.__max_ratio_strings:
+                    continue
+                ratio, index = keyword_index.get_best_match(analyze_string)
+                if index >= 0:
+                    self.__max_ratio_strings[analyze_string] = ratio
+                    self.__most_similar_strings[analyze_string] = self.__compare_strings[index]
+            return self
+
         # Для каждой пары строк из списка анализируемых и сравниваемых строк
         for analyze_string in self.__analyze_strings:
             for compare_string in self.__compare_strings:
                 # Рассчитать коэффициент похожести
-                if (self.__quick_analyze):
-                    ratio = difflib.SequenceMatcher(None, analyze_string, compare_string).quick_ratio()
-                else:
-                    ratio = difflib.SequenceMatcher(None, analyze_string, compare_string).ratio()
+                ratio = difflib.SequenceMatcher(None, analyze_string, compare_string).ratio()
 
                 # Обновить значения, если текущий коэффициент больше предыдущего
                 if ratio > self.__max_ratio_strings.get(analyze_string, -1):
@@ -51,6 +63,18 @@ class StringListAnalyzer:
 
         return self
 
+    @staticmethod
+    def score_batch(analyze_lists:list[list[str]], compare_strings:list[str], threshold:float | None = None):
+        """
+        Выполняет быстрый анализ сразу многих списков строк с одним списком для сравнения,
+        не создавая анализатор для каждого списка
+        :param analyze_lists: Списки строк для анализа
+        :param compare_strings: Список строк для сравнения
+        :param threshold: Порог похожести, после достижения которого поиск для строки завершается (опционально)
+        :return: Результаты сравнения (BatchScores), строка результата соответствует списку для анализа
+        """
+        return KeywordIndex.get(compare_strings).score_batch(analyze_lists, threshold)
+
     def get_analyze_strings(self):
         """
         Возвращает список строк для анализа
@@ -0,0 +1,250 @@
+import hashlib
+import html
+import io
+import logging
+import random
+import threading
+from datetime import datetime, timedelta
+
+from openpyxl import Workbook
+
+# Создаем логгер для текущего модуля
+logger = logging.getLogger(__name__)
+
+
+class SyntheticSite:
+    """
+    Искусственный сайт расписания со структурой, которую ожидает WebParser:
+    основной контент в блоке content-wrapper, разделы h3/h4 и списки ul/li
+    со ссылками на дочерние страницы и файлы расписания.
+    Файлы .xlsx создаются с помощью openpyxl, файлы .xls отдаются как HTML таблица
+    (такой формат открывает xls2xlsx).
+    """
+
+    # Заголовки разделов 3 уровня
+    HEADERS3 = ["Бакалавриат", "Магистратура", "Специалитет", "Аспирантура"]
+
+    # Заголовки разделов 4 уровня
+    HEADERS4 = [
+        "Очная форма обучения",
+        "Заочная форма обучения",
+        "Очно-заочная форма обучения",
+    ]
+
+    # Факультеты
+    FACULTIES = ["ФЭВТ", "ФАТ", "ХТФ", "ФТКМ", "ФТПП", "ФАСТИ", "ИАиС"]
+
+    # Сокращения форм обучения в именах файлов
+    FORMS = ["ОН", "ЗО", "ОЗ"]
+
+    # Дата, от которой отсчитываются времена обновления файлов
+    BASE_DATE = datetime(2024, 9, 1, 8, 0, 0)
+
+    def __init__(
+        self,
+        children: int = 3,
+        depth: int = 3,
+        files_per_page: int = 5,
+        xls_ratio: float = 0.5,
+        seed: int = 0,
+    ):
+        """
+        Генерирует структуру сайта
+        :param children: Количество дочерних страниц у каждой страницы, кроме самых глубоких
+        :param depth: Глубина вложенности страниц
+        :param files_per_page: Количество файлов на каждой странице
+        :param xls_ratio: Доля файлов в формате .xls
+        :param seed: Начальное значение генератора случайных чисел
+        """
+        self.__random = random.Random(seed)
+        self.__lock = threading.Lock()
+        self.__xls_ratio = xls_ratio
+        self.__pages = {}  # Путь страницы -> список элементов
+        self.__files = {}  # Путь файла -> (имя, время обновления, версия)
+        self.__xlsx_cache = {}  # (путь файла, версия) -> содержимое файла .xlsx
+        self.__generate_page("/", 0, children, depth, files_per_page)
+        logger.info(
+            f"Synthetic site generated: {len(self.__pages)} pages, {len(self.__files)} files"
+        )
+
+    def get_page_count(self) -> int:
+        """
+        :return: Количество страниц сайта
+        """
+        return len(self.__pages)
+
+    def get_file_count(self) -> int:
+        """
+        :return: Количество файлов сайта
+        """
+        return len(self.__files)
+
+    def render(self, path: str) -> tuple[str, bytes] | None:
+        """
+        Формирует ответ для пути запроса
+        :param path: Путь запроса
+        :return: Кортеж (тип содержимого, тело ответа) или None, если пути нет на сайте
+        """
+        if path in self.__pages:
+            return "text/html; charset=utf-8", self.__render_page(path)
+        if path in self.__files:
+            if path.endswith(".xlsx"):
+                return (
+                    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    self.__render_xlsx(path),
+                )
+            return "application/vnd.ms-excel", self.__render_xls(path)
+        return None
+
+    def mutate(self, rate: float) -> int:
+        """
+        Обновляет случайную часть файлов: меняет их время обновления и содержимое
+        :param rate: Доля файлов, которые нужно обновить
+        :return: Количество обновлённых файлов
+        """
+        with self.__lock:
+            paths = [path for path in self.__files if self.__random.random() < rate]
+            for path in paths:
+                name, updated, version = self.__files[path]
+                updated += timedelta(minutes=self.__random.randint(1, 60 * 24))
+                self.__files[path] = (name, updated, version + 1)
+        logger.info(f"Synthetic site: {len(paths)} files updated")
+        return len(paths)
+
+    def __generate_page(
+        self, path: str, level: int, children: int, depth: int, files_per_page: int
+    ):
+        """
+        Рекурсивно генерирует страницу и её дочерние страницы
+        :param path: Путь страницы
+        :param level: Уровень вложенности страницы
+        :param children: Количество дочерних страниц
+        :param depth: Глубина вложенности сайта
+        :param files_per_page: Количество файлов на странице
+        """
+        entries = []
+        self.__pages[path] = entries
+
+        if level < depth:
+            for index in range(children):
+                child_path = f"{path}p{index}/"
+                name = (
+                    f"{self.__random.choice(self.FACULTIES)} - раздел {level}.{index}"
+                )
+                entries.append((self.__get_sections(), name, child_path, False))
+                self.__generate_page(
+                    child_path, level + 1, children, depth, files_per_page
+                )
+
+        for _ in range(files_per_page):
+            extension = ".xls" if self.__random.random() < self.__xls_ratio else ".xlsx"
+            file_path = f"/files/{len(self.__files)}{extension}"
+            name = (
+                f"{self.__random.choice(self.FORMS)}_"
+                f"{self.__random.choice(self.FACULTIES)}_"
+                f"{self.__random.randint(1, 5)} курс"
+            )
+            updated = self.BASE_DATE + timedelta(
+                minutes=self.__random.randint(0, 60 * 24 * 180)
+            )
+            self.__files[file_path] = (name, updated, 0)
+            entries.append((self.__get_sections(), name, file_path, True))
+
+        # Элементы одного раздела идут подряд, как на настоящем сайте
+        entries.sort(key=lambda entry: entry[0])
+
+    def __get_sections(self) -> tuple[str, str]:
+        """
+        :return: Случайные заголовки разделов 3 и 4 уровня
+        """
+        return (
+            self.__random.choice(self.HEADERS3),
+            self.__random.choice(self.HEADERS4),
+        )
+
+    def __render_page(self, path: str) -> bytes:
+        """
+        Формирует HTML страницы
+        :param path: Путь страницы
+        :return: HTML страницы
+        """
+        parts = ['<html><body><div class="header"></div><div class="content-wrapper">']
+        current_sections = None
+        with self.__lock:
+            for sections, name, link, is_file in self.__pages[path]:
+                if sections != current_sections:
+                    if current_sections is not None:
+                        parts.append("</ul>")
+                    if current_sections is None or sections[0] != current_sections[0]:
+                        parts.append(f"<h3>{html.escape(sections[0])}</h3>")
+                    parts.append(f"<h4>{html.escape(sections[1])}</h4><ul>")
+                    current_sections = sections
+
+                item = f'<a href="{link}">{html.escape(name)}</a>'
+                if is_file:
+                    updated = self.__files[link][1]
+                    item += f" (обновлено {updated:%Y-%m-%d %H:%M:%S})"
+                parts.append(f"<li>{item}</li>")
+        if current_sections is not None:
+            parts.append("</ul>")
+        parts.append("</div></body></html>")
+        return "".join(parts).encode("utf-8")
+
+    def __get_file_rows(self, path: str) -> list[list]:
+        """
+        Генерирует содержимое файла расписания
+        :param path: Путь файла
+        :return: Строки таблицы
+        """
+        with self.__lock:
+            name, updated, version = self.__files[path]
+        seed = int(hashlib.sha256(f"{path}:{version}".encode()).hexdigest()[:8], 16)
+        file_random = random.Random(seed)
+
+        rows = [[name, f"Версия {version}", f"{updated:%Y-%m-%d %H:%M:%S}"]]
+        groups = [f"{name[:6]}-{index + 1}" for index in range(4)]
+        rows.append(["День", "Пара"] + groups)
+        subjects = ["Математика", "Физика", "Программирование", "История", "Химия"]
+        for day in ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб"]:
+            for pair in range(1, 5):
+                rows.append(
+                    [day, pair] + [file_random.choice(subjects) for _ in groups]
+                )
+        return rows
+
+    def __render_xlsx(self, path: str) -> bytes:
+        """
+        Формирует файл .xlsx
+        :param path: Путь файла
+        :return: Содержимое файла
+        """
+        # openpyxl записывает в файл время сохранения, поэтому одна версия
+        # файла создаётся один раз, чтобы повторные скачивания совпадали побайтно
+        with self.__lock:
+            key = (path, self.__files[path][2])
+            content = self.__xlsx_cache.get(key)
+        if content is not None:
+            return content
+
+        workbook = Workbook()
+        sheet = workbook.active
+        for row in self.__get_file_rows(path):
+            sheet.append(row)
+        stream = io.BytesIO()
+        workbook.save(stream)
+
+        with self.__lock:
+            return self.__xlsx_cache.setdefault(key, stream.getvalue())
+
+    def __render_xls(self, path: str) -> bytes:
+        """
+        Формирует файл .xls в виде HTML таблицы
+        :param path: Путь файла
+        :return: Содержимое файла
+        """
+        parts = ['<html><head><meta charset="utf-8"></head><body><table>']
+        for row in self.__get_file_rows(path):
+            cells = "".join(f"<td>{html.escape(str(value))}</td>" for value in row)
+            parts.append(f"<tr>{cells}</tr>")
+        parts.append("</table></body></html>")
+        return "".join(parts).encode("utf-8")
@@ -0,0 +1,202 @@
+import re
+from typing import NamedTuple
+
+from .lru_cache import LRUCache
+
+
+class Token(NamedTuple):
+    """
+    Лексема строки
+    """
+
+    kind: str  # Тип лексемы (Tokenizer.WORD, NUMBER, RANGE, DELIMITER, SYMBOL)
+    text: str  # Текст лексемы
+    start: int  # Индекс начала лексемы в строке
+    end: int  # Индекс конца лексемы в строке (не включительно)
+
+
+class TokenStream:
+    """
+    Результат лексического анализа одной строки.
+    Хранит последовательность элементарных лексем: слов из букв, чисел, разделителей
+    и прочих символов. Части строки между разделителями и слова с диапазонами чисел
+    строятся по этой последовательности без повторного разбора строки.
+    Возвращаемые списки общие для всех пользователей кэша, их нельзя изменять.
+    """
+
+    # Промежуток между числами диапазона
+    __RANGE_GAP_PATTERN = re.compile(r"\s*-\s*")
+
+    def __init__(self, string: str, tokens: list[Token]):
+        """
+        :param string: Исходная строка
+        :param tokens: Элементарные лексемы строки
+        """
+        self.__string = string
+        self.__tokens = tokens
+        self.__pieces = None
+
+    def get_string(self) -> str:
+        """
+        :return: Исходная строка
+        """
+        return self.__string
+
+    def get_tokens(self) -> list[Token]:
+        """
+        :return: Элементарные лексемы строки
+        """
+        return self.__tokens
+
+    def get_pieces(self) -> list[str]:
+        """
+        Возвращает части строки между разделителями.
+        Результат совпадает с re.split по разделителям: соседние разделители дают пустую часть.
+        :return: Список частей строки
+        """
+        if self.__pieces is None:
+            pieces = []
+            piece_start = 0
+            for token in self.__tokens:
+                if token.kind == Tokenizer.DELIMITER:
+                    pieces.append(self.__string[piece_start : token.start])
+                    piece_start = token.end
+            pieces.append(self.__string[piece_start:])
+            self.__pieces = pieces
+        return self.__pieces
+
+    def get_words(self, start: int = 0, end: int | None = None) -> list[Token]:
+        """
+        Ищет слова и диапазоны чисел в части строки.
+        Результат совпадает с re.findall(r"\\b(\\d+\\s*-\\s*\\d+|\\w+)\\b") для среза строки:
+        слово - это последовательность букв, цифр и "_", граничащая со срезом или другими символами,
+        диапазон - два слова из цифр, между которыми стоит "-" и, возможно, пробелы.
+        :param start: Начало части строки
+        :param end: Конец части строки (не включительно), по умолчанию - конец строки
+        :return: Лексемы типа WORD, NUMBER (слово из цифр) и RANGE
+        """
+        if end is None or end > len(self.__string):
+            end = len(self.__string)
+        if start >= end:
+            return []
+
+        # Последовательности символов слов с учётом границ части строки
+        runs = []  # Список [начало, конец, состоит только из цифр]
+        for token in self.__tokens:
+            if token.end <= start:
+                continue
+            if token.start >= end:
+                break
+            if token.kind not in Tokenizer.WORD_CHARACTER_KINDS and token.text != "_":
+                continue
+            token_start = max(token.start, start)
+            token_end = min(token.end, end)
+            is_number = token.kind == Tokenizer.NUMBER
+            if runs and runs[-1][1] == token_start:
+                runs[-1][1] = token_end
+                runs[-1][2] = False
+            else:
+                runs.append([token_start, token_end, is_number])
+
+        # Соседние числа, разделённые "-", образуют диапазон
+        words = []
+        index = 0
+        while index < len(runs):
+            run_start, run_end, is_number = runs[index]
+            if is_number and index + 1 < len(runs) and runs[index + 1][2]:
+                next_start, next_end, _ = runs[index + 1]
+                if self.__RANGE_GAP_PATTERN.fullmatch(
+                    self.__string, run_end, next_start
+                ):
+                    words.append(
+                        Token(
+                            Tokenizer.RANGE,
+                            self.__string[run_start:next_end],
+                            run_start,
+                            next_end,
+                        )
+                    )
+                    index += 2
+                    continue
+            words.append(
+                Token(
+                    Tokenizer.NUMBER if is_number else Tokenizer.WORD,
+                    self.__string[run_start:run_end],
+                    run_start,
+                    run_end,
+                )
+            )
+            index += 1
+        return words
+
+
+class Tokenizer:
+    """
+    Лексический анализатор строк (путей и имён файлов).
+    Разбирает строку за один проход заранее скомпилированным выражением
+    и запоминает результат для повторно встречающихся строк.
+    """
+
+    # Слово из букв
+    WORD = "word"
+
+    # Число
+    NUMBER = "number"
+
+    # Диапазон чисел (только в результатах TokenStream.get_words)
+    RANGE = "range"
+
+    # Разделитель частей строки
+    DELIMITER = "delimiter"
+
+    # Прочий символ
+    SYMBOL = "symbol"
+
+    # Типы лексем, состоящих из символов слов (кроме "_", который разбирается отдельно)
+    WORD_CHARACTER_KINDS = (WORD, NUMBER)
+
+    # Максимальное количество запомненных результатов разбора
+    CACHE_SIZE = 4096
+
+    # Элементарные лексемы: числа, слова из букв и одиночные символы
+    __TOKEN_PATTERN = re.compile(r"(\d+)|([^\W\d_]+)|(.)", re.DOTALL)
+
+    def __init__(self, delimiters: list[str]):
+        """
+        :param delimiters: Символы, разделяющие части строки
+        """
+        self.__delimiters = frozenset(delimiters)
+        self.__cache = LRUCache(self.CACHE_SIZE)
+
+    def tokenize(self, string: str) -> TokenStream:
+        """
+        Разбирает строку на лексемы
+        :param string: Строка
+        :return: Результат разбора
+        """
+        return self.__cache.get_or_compute(string, lambda: self.__tokenize(string))
+
+    def clear_cache(self):
+        """
+        Очищает запомненные результаты разбора
+        """
+        self.__cache.clear()
+
+    def __tokenize(self, string: str) -> TokenStream:
+        """
+        Разбирает строку на лексемы без использования кэша
+        :param string: Строка
+        :return: Результат разбора
+        """
+        tokens = []
+        for match in self.__TOKEN_PATTERN.finditer(string):
+            if match.lastindex == 1:
+                kind = self.NUMBER
+            elif match.lastindex == 2:
+                kind = self.WORD
+            elif match.group() in self.__delimiters:
+                kind = self.DELIMITER
+            else:
+                kind = self.SYMBOL
+            tokens.append(Token(kind, match.group(), match.start(), match.end()))
+        return TokenStream(string, tokens)
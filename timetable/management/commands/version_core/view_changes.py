@@ -7,6 +7,7 @@ from openpyxl import load_workbook
 from openpyxl.styles import PatternFill, Font, Border, Alignment
 from openpyxl.comments import Comment
 from xls2xlsx import XLS2XLSX
+from .xls_converter import XlsReader
 import math
 
 # Создаем логгер для текущего модуля
@@ -32,11 +33,14 @@ class ViewChanges:
         return file_hash
 
     @staticmethod
-    def compare_files(file1, file2, time1, time2):
+    def compare_files(file1, file2, time1, time2, sheet_names=None):
         """
         Сравнивает два файла и возвращает список различий.
         Возвращает список кортежей с информацией о различиях:
         (sheet_name, row, col, old_value, new_value, change_time)
+        sheet_names: названия сравниваемых листов (по умолчанию - все листы).
+                    Если листы заданы, файлы читаются в режиме только для чтения,
+                    и ячейки остальных листов не загружаются
         """
         logger.info(
             f"Comparing files: {file1} (from {time1}) and {file2} (from {time2})"
@@ -44,34 +48,48 @@ class ViewChanges:
         differences = []
 
         try:
-            wb1 = load_workbook(file1, rich_text=True)
-            wb2 = load_workbook(file2, rich_text=True)
+            read_only = sheet_names is not None
+            wb1 = ViewChanges.load_values_workbook(file1, read_only)
+            wb2 = ViewChanges.load_values_workbook(file2, read_only)
             logger.debug(f"Workbooks loaded successfully")
 
             for sheet_name in wb1.sheetnames:
-                if sheet_name in wb2.sheetnames:
+                if sheet_name in wb2.sheetnames and (
+                    sheet_names is None or sheet_name in sheet_names
+                ):
                     ws1 = wb1[sheet_name]
                     ws2 = wb2[sheet_name]
                     logger.debug(f"Comparing sheet: {sheet_name}")
 
-                    for row in range(1, ws1.max_row + 1):
-                        for col in range(1, ws1.max_column + 1):
-                            cell1 = ws1.cell(row=row, column=col)
-                            cell2 = ws2.cell(row=row, column=col)
-
-                            if cell1.value != cell2.value:
+                    # Значения листов читаются построчно: в режиме только для чтения
+                    # обращение к отдельной ячейке заново читает лист
+                    rows1 = list(ws1.iter_rows(values_only=True))
+                    rows2 = list(ws2.iter_rows(values_only=True))
+                    max_row = max(len(rows1), 1)
+                    max_col = max((len(row) for row in rows1), default=1)
+
+                    for row in range(1, max_row + 1):
+                        values1 = rows1[row - 1] if row <= len(rows1) else ()
+                        values2 = rows2[row - 1] if row <= len(rows2) else ()
+                        for col in range(1, max_col + 1):
+                            value1 = values1[col - 1] if col <= len(values1) else None
+                            value2 = values2[col - 1] if col <= len(values2) else None
+
+                            if value1 != value2:
                                 change_time = time2 if time2 else datetime.now()
                                 differences.append(
                                     (
                                         sheet_name,
                                         row,
                                         col,
-                                        cell1.value,
-                                        cell2.value,
+                                        value1,
+                                        value2,
                                         change_time,
                                     )
                                 )
 
+            wb1.close()
+            wb2.close()
             logger.info(f"Found {len(differences)} differences between files")
 
         except Exception as e:
@@ -81,6 +99,31 @@ class ViewChanges:
 
         return differences
 
+    @staticmethod
+    def load_values_workbook(file_path, read_only=False):
+        """
+        Открывает книгу для чтения значений ячеек.
+        Файлы .xls читаются через xlrd без конвертации (см. XlsReader)
+        """
+        if str(file_path).endswith(".xls"):
+            return XlsReader.load_workbook(file_path)
+        return load_workbook(file_path, read_only=read_only, rich_text=True)
+
+    @staticmethod
+    def get_changed_sheets(sheet_hashes1, sheet_hashes2):
+        """
+        Возвращает названия листов, hash суммы которых различаются в двух версиях файла.
+        Листы, которых нет в одной из версий, не сравниваются.
+        Возвращает None, если hash суммы листов одной из версий неизвестны
+        """
+        if sheet_hashes1 is None or sheet_hashes2 is None:
+            return None
+        return [
+            sheet_name
+            for sheet_name, sheet_hash in sheet_hashes1.items()
+            if sheet_name in sheet_hashes2 and sheet_hashes2[sheet_name] != sheet_hash
+        ]
+
     @staticmethod
     def create_comment_text(change_history):
         """Создает текст комментария с историей изменений."""
@@ -191,7 +234,14 @@ class ViewChanges:
 
     @staticmethod
     def compare_all_versions(file_versions_list):
-        """Сравнивает все версии файлов и возвращает объединенные изменения."""
+        """
+        Сравнивает все версии файлов и возвращает объединенные изменения.
+        file_versions_list: список кортежей (file_path, change_time)
+                    или (file_path, change_time, sheet_hashes).
+                    Если известны hash суммы листов обеих версий, сравниваются только изменившиеся листы.
+                    Версии разных форматов (.xls без конвертации и .xlsx) не сравниваются:
+                    значения ячеек в них читаются по-разному
+        """
         logger.info("Starting comparison of all file versions")
         all_changes = {}
 
@@ -203,13 +253,16 @@ class ViewChanges:
 
         # Сортируем список версий по дате (от старой к новой)
         sorted_versions = sorted(
-            file_versions_list,
+            [
+                (version[0], version[1], version[2] if len(version) > 2 else None)
+                for version in file_versions_list
+            ],
             key=lambda x: x[1],  # Сортируем по второму элементу кортежа (дате)
         )
 
         # Преобразуем даты в читаемый формат (необязательно, только для отображения)
         formatted_versions = [
-            (path, dt.strftime("%Y-%m-%d %H:%M:%S")) for path, dt in sorted_versions
+            (path, dt.strftime("%Y-%m-%d %H:%M:%S")) for path, dt, _ in sorted_versions
         ]
         logger.debug(f"Sorted versions: {formatted_versions}")
 
@@ -217,16 +270,33 @@ class ViewChanges:
 
         # Сравниваем последовательные пары файлов
         for i in range(len(sorted_versions) - 1):
-            file1, time1 = sorted_versions[i]
-            file2, time2 = sorted_versions[i + 1]
+            file1, time1, sheet_hashes1 = sorted_versions[i]
+            file2, time2, sheet_hashes2 = sorted_versions[i + 1]
 
             logger.debug(
                 f"Comparing version {i+1} ({time1}) with version {i+2} ({time2})"
             )
 
+            # Отличия чтения форматов не должны считаться изменениями
+            if os.path.splitext(file1)[1] != os.path.splitext(file2)[1]:
+                logger.debug(
+                    f"Versions {i+1} and {i+2} have different formats, skipping"
+                )
+                continue
+
+            # Листы с одинаковыми hash суммами не сравниваем
+            sheet_names = ViewChanges.get_changed_sheets(sheet_hashes1, sheet_hashes2)
+            if sheet_names is not None and not sheet_names:
+                logger.debug(
+                    f"No sheets changed between versions {i+1} and {i+2}, skipping"
+                )
+                continue
+
             try:
                 # Сравниваем файлы
-                differences = ViewChanges.compare_files(file1, file2, time1, time2)
+                differences = ViewChanges.compare_files(
+                    file1, file2, time1, time2, sheet_names
+                )
                 logger.debug(
                     f"Found {len(differences)} differences between versions {i+1} and {i+2}"
                 )
@@ -269,12 +339,14 @@ class ViewChanges:
         return all_changes
 
     @staticmethod
-    def view_changes(file_versions, output_file, expiration_days):
+    def view_changes(file_versions, output_file, expiration_days, highlight_file=None):
         """
         Основная функция для просмотра изменений между всеми версиями.
-        file_versions: список кортежей (file_path, change_time)
+        file_versions: список кортежей (file_path, change_time) или (file_path, change_time, sheet_hashes)
         output_file: путь к файлу, в который будут записаны изменения
         expiration_days: срок годности изменений в днях
+        highlight_file: файл .xlsx, в котором подсвечиваются изменения (по умолчанию последняя версия).
+            Используется, если последняя версия хранится в формате, который нельзя сохранить (.xls)
         """
         logger.info(
             f"Starting view_changes process. Output file: {output_file}, expiration days: {expiration_days}"
@@ -295,6 +367,10 @@ class ViewChanges:
             last_file = None
             logger.warning("No file versions available for processing")
 
+        if last_file and highlight_file is not None:
+            logger.debug(f"Using converted copy for highlighting: {highlight_file}")
+            last_file = str(highlight_file)
+
         if last_file:
             ViewChanges.highlight_differences(last_file, all_changes, expiration_days)
             if last_file != output_file:
@@ -0,0 +1,385 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Ограничение памяти доступно не на всех платформах
+    resource = None
+
+# Создаем логгер для текущего модуля
+logger = logging.getLogger(__name__)
+
+
+class XlsConversionError(Exception):
+    """
+    Исключение выбрасывается, если файл .xls не удалось конвертировать в .xlsx
+    """
+
+
+def _convert_in_process(
+    xls_path: str, xlsx_path: str, memory_limit_mb: int | None, connection
+):
+    """
+    Конвертирует файл в отдельном процессе. Ошибка передаётся родительскому процессу через соединение
+    :param xls_path: Путь к файлу .xls
+    :param xlsx_path: Путь к создаваемому файлу .xlsx
+    :param memory_limit_mb: Ограничение памяти процесса (мегабайты, опционально)
+    :param connection: Соединение для передачи текста ошибки
+    """
+    try:
+        from xls2xlsx import XLS2XLSX
+
+        # Ограничение действует на конвертацию, а не на импорт библиотек
+        if memory_limit_mb and resource is not None:
+            limit = memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+        XLS2XLSX(xls_path).to_xlsx(xlsx_path)
+    except BaseException as e:
+        try:
+            connection.send(f"{type(e).__name__}: {e}")
+        except BaseException:
+            # При нехватке памяти текст ошибки может не отправиться
+            pass
+        os._exit(1)
+    connection.close()
+
+
+class XlsConverter:
+    """
+    Конвертация файлов .xls в .xlsx в отдельных процессах.
+    Зависший или потребляющий слишком много памяти процесс завершается, не затрагивая обновление.
+    Результаты хранятся в кэше по hash сумме байтов исходного файла,
+    поэтому неизменившийся файл не конвертируется повторно.
+    """
+
+    # Максимальное количество одновременно работающих процессов конвертации
+    MAX_PROCESSES = 2
+
+    # Максимальное время конвертации одного файла (секунды)
+    TIMEOUT = 120
+
+    # Ограничение памяти процесса конвертации (мегабайты, None - без ограничения)
+    MEMORY_LIMIT_MB = 1024
+
+    # Папка кэша конвертированных файлов внутри папки кэша проекта
+    CACHE_DIR_NAME = "xls_conversion"
+
+    # Через сколько дней без обращений конвертированный файл удаляется из кэша
+    MAX_AGE_DAYS = 30
+
+    # Общий для всего процесса экземпляр
+    __default = None
+    __default_lock = threading.Lock()
+
+    def __init__(
+        self,
+        cache_dir: Path | str | None = None,
+        max_processes: int | None = None,
+        timeout: float | None = None,
+        memory_limit_mb: int | None = MEMORY_LIMIT_MB,
+    ):
+        """
+        :param cache_dir: Папка кэша (None - без кэша)
+        :param max_processes: Максимальное количество процессов (по умолчанию MAX_PROCESSES)
+        :param timeout: Максимальное время конвертации (по умолчанию TIMEOUT)
+        :param memory_limit_mb: Ограничение памяти процесса (по умолчанию MEMORY_LIMIT_MB)
+        """
+        self.__cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.__timeout = timeout if timeout is not None else self.TIMEOUT
+        self.__memory_limit_mb = memory_limit_mb
+        self.__semaphore = threading.BoundedSemaphore(
+            max_processes or self.MAX_PROCESSES
+        )
+        # Процессы запускаются заново, а не копируются: копирование процесса
+        # с работающими потоками может оставить захваченными их блокировки
+        self.__context = multiprocessing.get_context("spawn")
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+
+    @classmethod
+    def get_default(cls):
+        """
+        Возвращает общий экземпляр, хранящий кэш в папке кэша проекта
+        :return: Конвертер
+        """
+        # Настройки импортируются здесь, чтобы процессы конвертации, которые заново
+        # импортируют этот модуль, не загружали настройки проекта
+        from timetable_project.settings import CACHE_DIR
+
+        with cls.__default_lock:
+            if cls.__default is None:
+                cls.__default = cls(Path(CACHE_DIR) / cls.CACHE_DIR_NAME)
+            return cls.__default
+
+    def convert(
+        self, xls_path: Path | str, xlsx_path: Path | str, byte_hash: str | None = None
+    ) -> Path:
+        """
+        Конвертирует файл .xls в .xlsx, используя кэш
+        :param xls_path: Путь к файлу .xls
+        :param xlsx_path: Путь к создаваемому файлу .xlsx
+        :param byte_hash: Hash сумма SHA-256 байтов файла .xls (по умолчанию рассчитывается)
+        :return: Путь к файлу .xlsx
+        """
+        xls_path = Path(xls_path)
+        xlsx_path = Path(xlsx_path)
+        cached_path = None
+        if self.__cache_dir is not None:
+            if byte_hash is None:
+                byte_hash = self.__get_file_hash(xls_path)
+            cached_path = self.__cache_dir / f"{byte_hash}.xlsx"
+            if cached_path.is_file():
+                shutil.copyfile(cached_path, xlsx_path)
+                # Время изменения отмечает последнее обращение к записи кэша
+                os.utime(cached_path)
+                with self.__lock:
+                    self.__hits += 1
+                logger.debug(f"Converted file taken from cache: {xls_path}")
+                return xlsx_path
+            with self.__lock:
+                self.__misses += 1
+
+        with self.__semaphore:
+            self.__run(xls_path, xlsx_path)
+
+        if cached_path is not None:
+            try:
+                self.__cache_dir.mkdir(parents=True, exist_ok=True)
+                # Копируем во временный файл и подменяем, чтобы в кэше не было недописанных файлов
+                tmp_path = cached_path.with_name(
+                    f"{cached_path.name}.{threading.get_ident()}.tmp"
+                )
+                shutil.copyfile(xlsx_path, tmp_path)
+                os.replace(tmp_path, cached_path)
+            except OSError as e:
+                logger.warning(f"Failed to cache converted file {xls_path}: {e}")
+        return xlsx_path
+
+    def clean_cache(self) -> int:
+        """
+        Удаляет из кэша давно не использованные файлы
+        :return: Количество удалённых файлов
+        """
+        if self.__cache_dir is None or not self.__cache_dir.is_dir():
+            return 0
+        expiration_time = time.time() - self.MAX_AGE_DAYS * 24 * 60 * 60
+        removed = 0
+        for file_path in self.__cache_dir.iterdir():
+            try:
+                if file_path.stat().st_mtime < expiration_time:
+                    file_path.unlink()
+                    removed += 1
+            except OSError as e:
+                logger.warning(f"Failed to remove cached file {file_path}: {e}")
+        if removed:
+            logger.debug(f"Removed {removed} files from XLS conversion cache")
+        return removed
+
+    def get_stats(self) -> dict:
+        """
+        Возвращает статистику использования кэша
+        :return: Словарь с количеством попаданий и промахов
+        """
+        with self.__lock:
+            return {"hits": self.__hits, "misses": self.__misses}
+
+    def __run(self, xls_path: Path, xlsx_path: Path):
+        """
+        Конвертирует файл в отдельном процессе с ограничением времени
+        :param xls_path: Путь к файлу .xls
+        :param xlsx_path: Путь к создаваемому файлу .xlsx
+        """
+        tmp_path = xlsx_path.with_name(f"{xlsx_path.stem}.converting.xlsx")
+        receiver, sender = self.__context.Pipe(duplex=False)
+        process = self.__context.Process(
+            target=_convert_in_process,
+            args=(str(xls_path), str(tmp_path), self.__memory_limit_mb, sender),
+            daemon=True,
+        )
+        started_at = datetime.now()
+        try:
+            process.start()
+            sender.close()
+            process.join(self.__timeout)
+            if process.is_alive():
+                process.kill()
+                process.join()
+                raise XlsConversionError(
+                    f"Conversion timed out after {self.__timeout} seconds: {xls_path}"
+                )
+            if process.exitcode != 0:
+                message = f"process exit code {process.exitcode}"
+                try:
+                    if receiver.poll():
+                        message = receiver.recv()
+                except (EOFError, OSError):
+                    pass
+                raise XlsConversionError(f"Conversion failed: {xls_path}: {message}")
+            os.replace(tmp_path, xlsx_path)
+        finally:
+            receiver.close()
+            tmp_path.unlink(missing_ok=True)
+        logger.debug(
+            f"Converted {xls_path} in {(datetime.now() - started_at).total_seconds():.2f}s"
+        )
+
+    @staticmethod
+    def __get_file_hash(file_path: Path) -> str:
+        """
+        Рассчитывает hash сумму байтов файла
+        :param file_path: Путь к файлу
+        :return: Hash сумма SHA-256
+        """
+        sha256_hash = hashlib.sha256()
+        with file_path.open("rb") as file:
+            for chunk in iter(lambda: file.read(65536), b""):
+                sha256_hash.update(chunk)
+        return sha256_hash.hexdigest()
+
+
+class XlsReader:
+    """
+    Чтение книг .xls без конвертации через xlrd.
+    Книга и листы повторяют используемую часть интерфейса openpyxl
+    (worksheets, sheetnames, книга[название], title, iter_rows(values_only=True)),
+    поэтому расчёт hash сумм и сравнение версий работают с ними так же, как с .xlsx.
+    Значения ячеек приводятся к типам openpyxl, но hash суммы книги .xls и её
+    конвертированной копии не совпадают, поэтому версии, прочитанные по-разному,
+    сравниваются по hash сумме байтов и не сравниваются при визуализации.
+    """
+
+    class Sheet:
+        """
+        Лист книги .xls. Строки читаются при обращении к листу
+        """
+
+        def __init__(self, book, name: str):
+            """
+            :param book: Книга xlrd
+            :param name: Название листа
+            """
+            self.__book = book
+            self.title = name
+
+        def iter_rows(self, values_only: bool = True):
+            """
+            Возвращает значения строк листа одной ширины
+            :param values_only: Должно быть True: из .xls читаются только значения ячеек
+            :return: Генератор кортежей значений
+            """
+            # Проверяется до создания генератора, чтобы ошибка возникла в месте вызова
+            if not values_only:
+                raise ValueError("Only cell values can be read from .xls")
+            return self.__iter_values()
+
+        def __iter_values(self):
+            """
+            Читает значения строк листа, после чтения выгружает лист из памяти
+            :return: Генератор кортежей значений
+            """
+            sheet = self.__book.sheet_by_name(self.title)
+            try:
+                for row_index in range(sheet.nrows):
+                    values = [
+                        XlsReader.get_cell_value(self.__book, cell)
+                        for cell in sheet.row(row_index)
+                    ]
+                    values.extend([None] * (sheet.ncols - len(values)))
+                    yield tuple(values)
+            finally:
+                self.__book.unload_sheet(self.title)
+
+    class Workbook:
+        """
+        Книга .xls, листы которой загружаются по требованию
+        """
+
+        def __init__(self, file_path: Path | str):
+            """
+            :param file_path: Путь к файлу .xls
+            """
+            import xlrd
+
+            self.__book = xlrd.open_workbook(str(file_path), on_demand=True)
+            self.sheetnames = self.__book.sheet_names()
+            self.worksheets = [
+                XlsReader.Sheet(self.__book, name) for name in self.sheetnames
+            ]
+
+        def __getitem__(self, name: str):
+            return self.worksheets[self.sheetnames.index(name)]
+
+        def close(self):
+            self.__book.release_resources()
+
+    @staticmethod
+    def is_available() -> bool:
+        """
+        Проверяет, установлен ли xlrd
+        :return: True, если книги .xls можно читать без конвертации
+        """
+        try:
+            import xlrd
+        except ImportError:
+            return False
+        return True
+
+    @staticmethod
+    def can_read(file_path: Path | str) -> bool:
+        """
+        Проверяет, что файл можно прочитать через xlrd.
+        Сайт может отдавать под расширением .xls таблицы HTML, которые читаются только при конвертации
+        :param file_path: Путь к файлу
+        :return: True, если книга открывается
+        """
+        if not XlsReader.is_available():
+            return False
+        try:
+            XlsReader.load_workbook(file_path).close()
+        except Exception as e:
+            logger.debug(f"File cannot be read by xlrd: {file_path}: {e}")
+            return False
+        return True
+
+    @staticmethod
+    def load_workbook(file_path: Path | str):
+        """
+        Открывает книгу .xls
+        :param file_path: Путь к файлу
+        :return: Книга
+        """
+        return XlsReader.Workbook(file_path)
+
+    @staticmethod
+    def get_cell_value(book, cell):
+        """
+        Приводит значение ячейки xlrd к типу, который вернул бы openpyxl
+        :param book: Книга xlrd
+        :param cell: Ячейка xlrd
+        :return: Значение ячейки
+        """
+        import xlrd
+
+        if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK):
+            return None
+        if cell.ctype == xlrd.XL_CELL_BOOLEAN:
+            return bool(cell.value)
+        if cell.ctype == xlrd.XL_CELL_ERROR:
+            return xlrd.error_text_from_code.get(cell.value)
+        if cell.ctype == xlrd.XL_CELL_DATE:
+            try:
+                return xlrd.xldate_as_datetime(cell.value, book.datemode)
+            except xlrd.xldate.XLDateError:
+                return cell.value
+        if cell.ctype == xlrd.XL_CELL_NUMBER and float(cell.value).is_integer():
+            return int(cell.value)
+        return cell.value
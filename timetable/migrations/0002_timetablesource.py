@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("timetable", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TimetableSource",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "url",
+                    models.TextField(verbose_name="Ссылка на страницу с расписаниями"),
+                ),
+                (
+                    "start_path",
+                    models.TextField(verbose_name="Начальный путь ресурсов"),
+                ),
+                (
+                    "timetable_type",
+                    models.CharField(
+                        default="Занятия", max_length=127, verbose_name="Тип расписания"
+                    ),
+                ),
+                (
+                    "max_workers",
+                    models.PositiveIntegerField(
+                        blank=True,
+                        default=None,
+                        null=True,
+                        verbose_name="Количество потоков обхода страниц",
+                    ),
+                ),
+                (
+                    "enabled",
+                    models.BooleanField(
+                        default=True, verbose_name="Источник используется"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Источник расписаний",
+                "verbose_name_plural": "Источники расписаний",
+                "db_table": "timetable_source",
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("timetable", "0002_timetablesource"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="fileversion",
+            name="content_length",
+            field=models.BigIntegerField(
+                blank=True,
+                default=None,
+                null=True,
+                verbose_name="Размер файла по ответу сервера",
+            ),
+        ),
+        migrations.AddField(
+            model_name="fileversion",
+            name="etag",
+            field=models.CharField(
+                blank=True,
+                default=None,
+                max_length=255,
+                null=True,
+                verbose_name="ETag ответа сервера",
+            ),
+        ),
+        migrations.AddField(
+            model_name="fileversion",
+            name="http_last_modified",
+            field=models.CharField(
+                blank=True,
+                default=None,
+                max_length=64,
+                null=True,
+                verbose_name="Last-Modified ответа сервера",
+            ),
+        ),
+    ]
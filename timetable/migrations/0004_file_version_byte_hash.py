@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("timetable", "0003_file_version_http_validators"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="fileversion",
+            name="byte_hash",
+            field=models.CharField(
+                blank=True,
+                default=None,
+                max_length=64,
+                null=True,
+                verbose_name="Хэш-сумма байтов скачанного файла",
+            ),
+        ),
+    ]
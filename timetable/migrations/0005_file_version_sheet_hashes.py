@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("timetable", "0004_file_version_byte_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="fileversion",
+            name="sheet_hashes",
+            field=models.JSONField(
+                blank=True,
+                default=None,
+                null=True,
+                verbose_name="Хэш-суммы листов книги",
+            ),
+        ),
+    ]
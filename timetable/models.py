@@ -103,6 +103,11 @@ class FileVersion(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания версии")  # Дата создания
     last_changed = models.DateTimeField(null=True, blank=True, default=None, verbose_name="Дата последнего изменения")  # Последнее изменение
     hashsum = models.CharField(max_length=255, verbose_name="Хэш-сумма файла")  # Хэш
+    sheet_hashes = models.JSONField(null=True, blank=True, default=None, verbose_name="Хэш-суммы листов книги")  # Название листа -> хэш
+    byte_hash = models.CharField(max_length=64, null=True, blank=True, default=None, verbose_name="Хэш-сумма байтов скачанного файла")  # Хэш байтов
+    etag = models.CharField(max_length=255, null=True, blank=True, default=None, verbose_name="ETag ответа сервера")  # Валидатор ETag
+    http_last_modified = models.CharField(max_length=64, null=True, blank=True, default=None, verbose_name="Last-Modified ответа сервера")  # Валидатор Last-Modified
+    content_length = models.BigIntegerField(null=True, blank=True, default=None, verbose_name="Размер файла по ответу сервера")  # Content-Length
 
     class Meta:
         db_table = 'file_version'
@@ -159,6 +164,31 @@ class Snapshot(models.Model):
     def get_url(self):
         return static(self.path)
 
+class TimetableSource(models.Model):
+    """
+    Таблица timetable_source хранит страницы сайта, с которых загружаются расписания.
+    """
+    id = models.BigAutoField(primary_key=True)
+    url = models.TextField(verbose_name="Ссылка на страницу с расписаниями")  # Корневая страница
+    start_path = models.TextField(verbose_name="Начальный путь ресурсов")  # Путь, к которому добавляются разделы сайта
+    timetable_type = models.CharField(max_length=127, default="Занятия", verbose_name="Тип расписания")  # Занятия, Экзамены...
+    max_workers = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        default=None,
+        verbose_name="Количество потоков обхода страниц"
+    )  # None - значение по умолчанию
+    enabled = models.BooleanField(default=True, verbose_name="Источник используется")
+
+    class Meta:
+        db_table = 'timetable_source'
+        verbose_name = 'Источник расписаний'
+        verbose_name_plural = 'Источники расписаний'
+        app_label = 'timetable'
+
+    def __str__(self):
+        return f"{self.timetable_type}: {self.url}"
+
 class Setting(models.Model):
     key = models.CharField(max_length=255, primary_key=True)  # Уникальное имя настройки
     value = models.TextField()  # Значение настройки
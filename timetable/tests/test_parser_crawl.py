@@ -0,0 +1,143 @@
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import SimpleTestCase
+
+from timetable.management.commands.version_core.http_client import HttpClient
+from timetable.management.commands.version_core.parser import WebParser
+from timetable.management.commands.version_core.synthetic_site import SyntheticSite
+
+
+def start_site(render, latency):
+    """
+    Запускает локальный сайт в фоновом потоке
+    :param render: Функция (путь) -> (тип содержимого, тело ответа) или None
+    :param latency: Функция (путь) -> задержка ответа (секунды)
+    :return: Кортеж (сервер, ссылка на корневую страницу)
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency(self.path))
+            result = render(self.path)
+            if result is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            content_type, body = result
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/"
+
+
+class CrawlOrderTest(SimpleTestCase):
+    """
+    Параллельный обход должен давать те же файлы в том же порядке,
+    что и последовательный обход в глубину, независимо от времени ответа страниц
+    """
+
+    def setUp(self):
+        # Проверяется порядок обхода, а не ограничение частоты запросов
+        HttpClient.get_default().set_rate_limiting(False)
+        self.servers = []
+
+    def tearDown(self):
+        HttpClient.get_default().set_rate_limiting(HttpClient.USE_RATE_LIMITER)
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    def crawl(self, url: str, max_workers: int) -> list[tuple]:
+        files = WebParser.get_files_from_webpage(
+            url, "Корень/", max_workers=max_workers, use_page_cache=False
+        )
+        return [(f.get_path(), f.get_url(), f.get_last_changed()) for f in files]
+
+    def test_synthetic_site_matches_sequential_order(self):
+        for seed in range(3):
+            with self.subTest(seed=seed):
+                site = SyntheticSite(children=3, depth=2, files_per_page=3, seed=seed)
+
+                # Случайная, но своя для каждой страницы задержка меняет порядок ответов
+                def latency(path: str, seed=seed) -> float:
+                    return random.Random(f"{seed}:{path}").uniform(0, 0.05)
+
+                server, url = start_site(site.render, latency)
+                self.servers.append(server)
+
+                sequential = self.crawl(url, max_workers=1)
+                self.assertEqual(len(sequential), site.get_file_count())
+                for max_workers in (4, 16):
+                    self.assertEqual(self.crawl(url, max_workers), sequential)
+
+    def test_duplicates_keep_first_position_in_depth_first_order(self):
+        def page(body: str) -> tuple[str, bytes]:
+            html = (
+                f'<html><body><div class="content-wrapper">{body}</div></body></html>'
+            )
+            return "text/html; charset=utf-8", html.encode("utf-8")
+
+        def item(link: str, name: str) -> str:
+            return (
+                f'<li><a href="{link}">{name}</a> (обновлено 2024-01-01 10:00:00)</li>'
+            )
+
+        pages = {
+            "/": page(
+                "<h3>Бакалавриат</h3><ul>"
+                + item("/a/", "Раздел А")
+                + item("/b/", "Раздел Б")
+                + item("/files/root.xlsx", "Корневой файл")
+                + "</ul>"
+            ),
+            "/a/": page(
+                "<h4>Очная форма обучения</h4><ul>"
+                + item("/files/a.xlsx", "Файл А")
+                + item("/files/shared.xlsx", "Общий файл")
+                + item("/c/", "Раздел В")
+                + "</ul>"
+            ),
+            "/b/": page(
+                "<h4>Заочная форма обучения</h4><ul>"
+                + item("/files/shared.xlsx", "Общий файл")
+                + item("/files/b.xlsx", "Файл Б")
+                + item("/c/", "Раздел В")
+                + "</ul>"
+            ),
+            "/c/": page("<ul>" + item("/files/c.xlsx", "Файл В") + "</ul>"),
+        }
+        # Первая по порядку ветка отвечает последней
+        server, url = start_site(pages.get, lambda path: 0.3 if path == "/a/" else 0)
+        self.servers.append(server)
+
+        sequential = self.crawl(url, max_workers=1)
+        self.assertEqual(
+            [file_url[len(url) - 1 :] for _, file_url, _ in sequential],
+            [
+                "/files/a.xlsx",
+                "/files/shared.xlsx",
+                "/files/c.xlsx",
+                "/files/b.xlsx",
+                "/files/root.xlsx",
+            ],
+        )
+        # Повторно найденные файл и страница остаются в ветке, которая идёт раньше при обходе
+        paths = {file_url[len(url) - 1 :]: path for path, file_url, _ in sequential}
+        self.assertIn("Раздел А", paths["/files/shared.xlsx"])
+        self.assertIn("Раздел А", paths["/files/c.xlsx"])
+
+        for _ in range(3):
+            self.assertEqual(self.crawl(url, max_workers=8), sequential)
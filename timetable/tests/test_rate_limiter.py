@@ -0,0 +1,157 @@
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from timetable.management.commands.version_core import rate_limiter
+from timetable.management.commands.version_core.rate_limiter import (
+    AdaptiveRateLimiter,
+)
+
+
+class FakeClock:
+    """
+    Часы, которые идут только при явном вызове advance
+    """
+
+    def __init__(self):
+        # Не ноль, чтобы первое уменьшение ограничений не попало в интервал после времени 0
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class FakeCondition(type(threading.Condition())):
+    """
+    Условие, ожидание которого сдвигает часы вместо настоящего ожидания
+    """
+
+    def __init__(self, clock: FakeClock):
+        super().__init__()
+        self.clock = clock
+        self.waits = []
+
+    def wait(self, timeout=None):
+        if timeout is None:
+            raise AssertionError("Request would wait for another request forever")
+        self.waits.append(timeout)
+        self.clock.advance(timeout)
+        return True
+
+
+class AdaptiveRateLimiterTest(SimpleTestCase):
+    # Время быстрого ответа сервера (секунды)
+    FAST = 0.05
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(rate_limiter, "time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.limiter = AdaptiveRateLimiter("test")
+        self.condition = FakeCondition(self.clock)
+        self.limiter._AdaptiveRateLimiter__condition = self.condition
+
+    def assertState(self, rate: float, concurrency: int, backoffs: int):
+        state = self.limiter.get_state()
+        self.assertAlmostEqual(state["rate"], rate)
+        self.assertEqual(state["concurrency"], concurrency)
+        self.assertEqual(state["backoffs"], backoffs)
+
+    def test_slow_start_increases_by_one_per_response(self):
+        self.assertState(4, 2, 0)
+        for rate, concurrency in [(5, 3), (6, 4), (7, 5)]:
+            self.limiter.on_response(200, self.FAST)
+            self.assertState(rate, concurrency, 0)
+
+        for _ in range(20):
+            self.limiter.on_response(200, self.FAST)
+        self.assertState(27, AdaptiveRateLimiter.MAX_CONCURRENCY, 0)
+        self.assertEqual(self.limiter.get_state()["requests"], 23)
+
+    def test_overload_status_halves_limits_once_per_cooldown(self):
+        for _ in range(4):
+            self.limiter.on_response(200, self.FAST)
+        self.assertState(8, 6, 0)
+
+        self.limiter.on_response(503, self.FAST)
+        self.assertState(4, 3, 1)
+
+        # Ответы на запросы, отправленные до уменьшения, ограничения не меняют
+        self.clock.advance(AdaptiveRateLimiter.BACKOFF_COOLDOWN / 2)
+        self.limiter.on_response(429, self.FAST)
+        self.assertState(4, 3, 1)
+
+        self.clock.advance(AdaptiveRateLimiter.BACKOFF_COOLDOWN / 2)
+        self.limiter.on_response(429, self.FAST)
+        self.assertState(2, 1, 2)
+        self.assertEqual(self.limiter.get_state()["requests"], 7)
+
+    def test_additive_increase_after_backoff(self):
+        self.limiter.on_response(503, self.FAST)
+        self.assertState(2, 1, 1)
+
+        # Частота растёт на RATE_INCREASE / rate, окно - на 1 / окно
+        expected = [(2.5, 2), (2.9, 2), (3.2448276, 2)]
+        for rate, concurrency in expected:
+            self.limiter.on_response(200, self.FAST)
+            self.assertState(rate, concurrency, 1)
+
+    def test_limits_do_not_drop_below_minimum(self):
+        for _ in range(5):
+            self.limiter.on_error(TimeoutError())
+            self.clock.advance(AdaptiveRateLimiter.BACKOFF_COOLDOWN)
+        self.assertState(AdaptiveRateLimiter.MIN_RATE, 1, 5)
+
+    def test_latency_growth_backs_off(self):
+        for _ in range(3):
+            self.limiter.on_response(200, 0.1)
+        self.assertState(7, 5, 0)
+
+        # Сглаженное время 0.48 с ещё ниже LATENCY_FLOOR
+        self.limiter.on_response(200, 2.0)
+        self.assertState(8, 6, 0)
+
+        # Сглаженное время 0.78 с выше порога и больше трёх минимальных
+        self.limiter.on_response(200, 2.0)
+        self.assertState(4, 3, 1)
+
+    def test_steady_slow_server_does_not_back_off(self):
+        for _ in range(5):
+            self.limiter.on_response(200, 1.0)
+        self.assertState(9, 7, 0)
+
+    def test_requests_wait_for_tokens(self):
+        for _ in range(3):
+            with self.limiter.request():
+                pass
+        # Первый запрос использует начальный токен, следующие ждут 1 / rate
+        self.assertEqual(self.condition.waits, [0.25, 0.25])
+
+    def test_retry_after_pauses_requests(self):
+        self.limiter.on_response(503, self.FAST, retry_after="5")
+        self.assertState(2, 1, 1)
+
+        for _ in range(2):
+            with self.limiter.request():
+                pass
+        # Пауза из Retry-After, затем ожидание токена при уменьшенной частоте
+        self.assertEqual(self.condition.waits, [5.0, 0.5])
+
+    def test_retry_after_is_capped(self):
+        self.limiter.on_response(429, self.FAST, retry_after="3600")
+        with self.limiter.request():
+            pass
+        self.assertEqual(self.condition.waits, [AdaptiveRateLimiter.MAX_RETRY_AFTER])
+
+    def test_invalid_retry_after_only_backs_off(self):
+        self.limiter.on_response(503, self.FAST, retry_after="soon")
+        self.assertState(2, 1, 1)
+        with self.limiter.request():
+            pass
+        self.assertEqual(self.condition.waits, [])
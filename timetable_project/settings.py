@@ -38,6 +38,10 @@ Path(LOG_DIR).mkdir(parents=True, exist_ok=True)
 TEMP_DIR = str(BASE_DIR / "temp")
 Path(TEMP_DIR).mkdir(parents=True, exist_ok=True)
 
+# Кэш данных между запусками обновления
+CACHE_DIR = str(BASE_DIR / "cache")
+Path(CACHE_DIR).mkdir(parents=True, exist_ok=True)
+
 # === БЕЗОПАСНОСТЬ ===
 SECRET_KEY = os.environ.get(
     "DJANGO_SECRET_KEY",